@@ -0,0 +1,140 @@
+"""ASGI middleware applying admission control to the heavy endpoints.
+
+Each gated endpoint gets its own ``AdmissionController``, so a surge of
+renders cannot take the slots ingest needs. Requests are gated before their
+body is read, so a rejected upload costs almost nothing. The slot is held
+until the response has been sent in full, which includes streamed responses.
+Limits apply per worker process and are read from the environment:
+
+    ADMISSION_<GATE>_CONCURRENCY   requests admitted at once
+    ADMISSION_<GATE>_QUEUE         requests allowed to wait for a slot
+    ADMISSION_<GATE>_TIMEOUT_S     longest wait before a 503
+    ADMISSION_<GATE>_PER_CLIENT    running plus waiting requests per client (429 beyond)
+
+``<GATE>`` is the upper-cased gate name (``RENDER``, ``INGEST``,
+``NEW_TITLE``, ``NEW_TITLE_BATCH``, ``VALIDATE_BATCH``). ``ADMISSION_ENABLED=0`` turns the
+middleware off. Clients are told apart by the ``ADMISSION_CLIENT_HEADER``
+header (default ``X-Client-Id``) and otherwise by remote address.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import os
+from typing import Dict, Mapping, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils import pool
+from app.utils.admission import AdmissionController, Rejected
+
+
+__all__ = ["AdmissionMiddleware", "GATED_ENDPOINTS", "GateConfig", "build_gates", "gate_stats"]
+
+
+ENABLED_ENV_VARIABLE = "ADMISSION_ENABLED"
+CLIENT_HEADER_ENV_VARIABLE = "ADMISSION_CLIENT_HEADER"
+DEFAULT_CLIENT_HEADER = "X-Client-Id"
+
+# POST path -> gate name.
+GATED_ENDPOINTS: Dict[str, str] = {
+    "/v1/render": "render",
+    "/v1/ingest-pdf": "ingest",
+    "/v1/new-title-request": "new_title",
+    "/v1/new-title-request/batch": "new_title_batch",
+    "/v1/validate/batch": "validate_batch",
+}
+
+
+@dataclass(slots=True)
+class GateConfig:
+    concurrency: int
+    queue_size: int
+    timeout_s: float
+    per_client: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, gate: str, default: "GateConfig") -> "GateConfig":
+        prefix = f"ADMISSION_{gate.upper()}_"
+        per_client = os.getenv(prefix + "PER_CLIENT")
+        return cls(
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", default.concurrency)),
+            queue_size=int(os.getenv(prefix + "QUEUE", default.queue_size)),
+            timeout_s=float(os.getenv(prefix + "TIMEOUT_S", default.timeout_s)),
+            per_client=int(per_client) if per_client else default.per_client,
+        )
+
+    def controller(self, gate: str) -> AdmissionController:
+        # By default one client may hold half of the running-plus-queued capacity.
+        per_client = self.per_client or max(1, (self.concurrency + self.queue_size) // 2)
+        return AdmissionController(gate, self.concurrency, self.queue_size, self.timeout_s, per_client)
+
+
+def _default_configs() -> Dict[str, GateConfig]:
+    cpus = pool.default_workers()
+    # Admitted requests queue again on the cost-aware scheduler (app/services/scheduler.py), which decides
+    # execution order; the gates admit a few per CPU so that ordering has something to choose from.
+    return {
+        "render": GateConfig(concurrency=4 * cpus, queue_size=4 * cpus, timeout_s=10.0),
+        "ingest": GateConfig(concurrency=2 * cpus, queue_size=2 * cpus, timeout_s=30.0),
+        "new_title": GateConfig(concurrency=4 * cpus, queue_size=4 * cpus, timeout_s=10.0),
+        # A batch fans out over its own process pool, so only a couple run at once.
+        "new_title_batch": GateConfig(concurrency=2, queue_size=4, timeout_s=30.0),
+        "validate_batch": GateConfig(concurrency=2, queue_size=4, timeout_s=30.0),
+    }
+
+
+def build_gates() -> Dict[str, AdmissionController]:
+    return {gate: GateConfig.from_env(gate, default).controller(gate) for gate, default in _default_configs().items()}
+
+
+_GATES: Dict[str, AdmissionController] = {}
+
+
+def gate_stats() -> Dict[str, Dict[str, object]]:
+    return {name: gate.stats() for name, gate in _GATES.items()}
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        gates: Optional[Mapping[str, AdmissionController]] = None,
+        endpoints: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.app = app
+        self.enabled = os.getenv(ENABLED_ENV_VARIABLE, "1").lower() not in ("0", "false", "no")
+        self.gates = dict(gates) if gates is not None else build_gates()
+        self.endpoints = dict(endpoints) if endpoints is not None else dict(GATED_ENDPOINTS)
+        self.client_header = os.getenv(CLIENT_HEADER_ENV_VARIABLE, DEFAULT_CLIENT_HEADER).lower().encode("latin-1")
+        _GATES.update(self.gates)
+
+    def _client(self, scope: Scope) -> str:
+        for name, value in scope.get("headers", ()):
+            if name == self.client_header and value:
+                return "id:" + value.decode("latin-1")
+        client = scope.get("client")
+        return "addr:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http" or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+        gate = self.gates.get(self.endpoints.get(scope["path"], ""))
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            ticket = await gate.acquire(self._client(scope))
+        except Rejected as exc:
+            response = JSONResponse(
+                {"detail": exc.detail}, status_code=exc.status_code, headers={"Retry-After": str(exc.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(ticket)
@@ -0,0 +1,31 @@
+"""Liveness and readiness probes.
+
+``/healthz`` answers 200 whenever the process is serving requests.
+``/readyz`` answers 503 until the start-up warm-up (``app/services/warmup.py``)
+has finished, so load balancers and rolling deploys only route traffic to
+warm workers. Both report on the worker process that answers.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services import warmup
+
+
+__all__ = ["router"]
+
+
+router = APIRouter()
+
+
+@router.get("/healthz", include_in_schema=False)
+def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+def readyz():
+    state = warmup.status()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
@@ -0,0 +1,71 @@
+"""Request metrics middleware and the Prometheus ``/metrics`` endpoint.
+
+Requests are labelled by route template (``/v1/ingest-jobs/{job_id}``), not
+by raw path, so label cardinality stays bounded; requests that match no route
+are counted as ``unmatched``. See ``app/utils/metrics.py`` for the exported
+series and multi-worker setup.
+"""
+
+from __future__ import annotations
+
+import time
+
+from fastapi import APIRouter, HTTPException, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.admission import GATED_ENDPOINTS
+from app.utils import metrics
+
+
+__all__ = ["MetricsMiddleware", "router"]
+
+
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    try:
+        body, content_type = metrics.render_latest()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return Response(content=body, media_type=content_type)
+
+
+def _endpoint(scope: Scope) -> str:
+    template = getattr(scope.get("route"), "path", None)
+    if template:
+        # Routes of an included router may report their path without the include prefix ("/v1"); the
+        # request path carries it in front of as many segments as the template has.
+        return scope["path"].rsplit("/", template.count("/"))[0] + template
+    # Requests turned away by admission control never reach the router.
+    if scope["path"] in GATED_ENDPOINTS:
+        return scope["path"]
+    return UNMATCHED_ENDPOINT
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not metrics.available():
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.observe_request(_endpoint(scope), scope["method"], status, time.perf_counter() - started)
@@ -0,0 +1,92 @@
+"""ASGI middleware for opt-in, authenticated request profiling.
+
+Profiling is off unless ``PROFILING_TOKEN`` is set. A request opts in with
+``?profile=1`` or ``X-Profile: 1`` and must carry the token in
+``X-Profile-Token``; a wrong or missing token gets ``403``. A profiled
+response carries a ``Server-Timing`` header with the pipeline spans (parse,
+compose by element type, draw, QR, PDF/A, save, ...) and an ``X-Profile-Id``
+header. Scheduled work (render, ingest, new title) is also captured with
+cProfile and written to ``PROFILING_DIR`` (default ``var/profiles``) as
+``<time>-<method>_<path>-<id>.prof`` once the response has been sent.
+
+Streamed responses send their headers before the work is done, so their
+``Server-Timing`` only covers what ran before the first byte.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import os
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import profiling
+
+
+__all__ = ["ProfilingMiddleware"]
+
+
+LOGGER = logging.getLogger(__name__)
+
+TOKEN_ENV_VARIABLE = "PROFILING_TOKEN"
+DIR_ENV_VARIABLE = "PROFILING_DIR"
+DEFAULT_PROFILE_DIR = "var/profiles"
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+_TRUTHY = ("1", "true", "yes", "on")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.token = os.getenv(TOKEN_ENV_VARIABLE, "")
+        self.directory = os.getenv(DIR_ENV_VARIABLE, DEFAULT_PROFILE_DIR)
+
+    def _requested(self, scope: Scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                return value.decode("latin-1").strip().lower() in _TRUTHY
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return any(value.lower() in _TRUTHY for value in query.get("profile", ()))
+
+    def _authorised(self, scope: Scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == TOKEN_HEADER:
+                return hmac.compare_digest(value, self.token.encode("latin-1"))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.token or scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._authorised(scope):
+            response = JSONResponse({"detail": "Profiling requires a valid X-Profile-Token."}, status_code=403)
+            await response(scope, receive, send)
+            return
+
+        profile = profiling.Profile(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing())
+                headers.append("X-Profile-Id", profile.id)
+            await send(message)
+
+        token = profiling.activate(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiling.deactivate(token)
+            try:
+                path = await run_in_threadpool(profile.dump, self.directory)
+            except OSError as exc:
+                LOGGER.warning("Unable to write profile %s: %s", profile.id, exc)
+            else:
+                if path is not None:
+                    LOGGER.info("Wrote profile %s for %s to %s", profile.id, profile.label, path)
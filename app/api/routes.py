@@ -1,21 +1,89 @@
+import asyncio
 import glob
+import hashlib
 import io
 import json
 import os
+import shutil
+import tempfile
+import zipfile
 from datetime import date, datetime
-from decimal import Decimal
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, File, Form, Header, HTTPException, Query, Request, Response, UploadFile
 from fastapi.responses import StreamingResponse
 from lxml import etree
-from pydantic import BaseModel, Field, condecimal
-
-from app.services import ascii_parser, pdf_ingest, renderer, title_numbers, title_request_builder, xml_validator
+from pydantic import BaseModel, Field, ValidationError, condecimal
+from starlette.concurrency import run_in_threadpool
+
+from app.services import (
+    ascii_parser,
+    batch_validation,
+    business_rules,
+    idempotency,
+    ingest_backends,
+    ingest_cache,
+    ingest_jobs,
+    pdf_ingest,
+    renderer,
+    scheduler,
+    title_numbers,
+    title_request_builder,
+    title_requests,
+    xml_validator,
+)
+from app.utils import pool
 
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+MAX_PDF_UPLOAD_ENV_VARIABLE = "PDF_INGEST_MAX_UPLOAD_BYTES"
+DEFAULT_MAX_PDF_UPLOAD_BYTES = 256 * 1024 * 1024
+SPOOL_DIR_ENV_VARIABLE = "PDF_INGEST_SPOOL_DIR"
+MAX_JOB_UPLOAD_ENV_VARIABLE = "PDF_INGEST_MAX_JOB_UPLOAD_BYTES"
+DEFAULT_MAX_JOB_UPLOAD_BYTES = 16 * 1024 * 1024 * 1024
+MAX_VALIDATE_BATCH_ENV_VARIABLE = "SPIN2_VALIDATE_BATCH_MAX_BYTES"
+DEFAULT_MAX_VALIDATE_BATCH_BYTES = 2 * 1024 * 1024 * 1024
+JOB_EVENT_POLL_INTERVAL_S = 1.0
+JOB_EVENT_HEARTBEAT_S = 15.0
+MAX_TITLE_BATCH_BYTES_ENV_VARIABLE = "NEW_TITLE_BATCH_MAX_BYTES"
+DEFAULT_MAX_TITLE_BATCH_BYTES = 64 * 1024 * 1024
+MAX_TITLE_BATCH_ITEMS_ENV_VARIABLE = "NEW_TITLE_BATCH_MAX_ITEMS"
+DEFAULT_MAX_TITLE_BATCH_ITEMS = 10000
+
+
+def _max_pdf_upload_bytes() -> int:
+    return int(os.getenv(MAX_PDF_UPLOAD_ENV_VARIABLE, DEFAULT_MAX_PDF_UPLOAD_BYTES))
+
+
+async def _spool_upload(file: UploadFile, suffix: str, max_bytes: int) -> Tuple[str, str, int]:
+    """Copy an upload to a temporary file in fixed-size chunks.
+
+    Returns ``(path, sha256, size)``. The digest is computed as the chunks
+    arrive, and the copy stops with a 413 as soon as ``max_bytes`` is
+    exceeded, so memory stays at one chunk regardless of upload size.
+    """
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix="upload-", suffix=suffix, dir=os.getenv(SPOOL_DIR_ENV_VARIABLE), delete=False) as tmp:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds the {max_bytes} byte limit.")
+                digest.update(chunk)
+                tmp.write(chunk)
+        except HTTPException:
+            os.unlink(tmp.name)
+            raise
+        except Exception as exc:  # pragma: no cover - upload read guard
+            os.unlink(tmp.name)
+            raise HTTPException(status_code=400, detail=f"Unable to read upload: {exc}") from exc
+    return tmp.name, digest.hexdigest(), size
+
 class XMLBody(BaseModel):
     xml: str
     template_id: Optional[str] = "alberta_title_v1"
@@ -121,38 +189,250 @@ async def parse_ascii(file: Optional[UploadFile] = File(None), ascii_text: Optio
     return {"xml": xml}
 
 @router.post("/validate")
-async def validate_xml(body: XMLBody):
+async def validate_xml(body: XMLBody, rules: bool = Query(False, description="Also apply business rules")):
     ok, errors = xml_validator.validate(body.xml)
+    if rules:
+        rules_ok, rule_errors = business_rules.evaluate(body.xml)
+        ok = ok and rules_ok
+        errors = errors + rule_errors
     return {"ok": ok, "errors": errors}
 
-@router.post("/ingest-pdf")
-async def ingest_pdf(file: UploadFile = File(...)):
+def _stream_batch_results(items, workers: Optional[int], rules: bool, cleanup_path: Optional[str] = None):
+    summary = batch_validation.BatchSummary()
     try:
-        data = await file.read()
-    except Exception as exc:  # pragma: no cover - upload read guard
-        raise HTTPException(status_code=400, detail=f"Unable to read uploaded PDF: {exc}") from exc
+        for result in batch_validation.validate_batch(items, workers=workers, rules=rules):
+            summary.record(result)
+            yield json.dumps(result.asdict()) + "\n"
+        summary.finish()
+        yield json.dumps({"summary": summary.asdict()}) + "\n"
+    finally:
+        if cleanup_path:
+            try:
+                os.unlink(cleanup_path)
+            except OSError:  # pragma: no cover - best-effort cleanup
+                pass
+
+
+@router.post("/validate/batch")
+async def validate_xml_batch(
+    file: UploadFile = File(...),
+    workers: Optional[int] = Form(None),
+    rules: bool = Form(False),
+):
+    filename = (file.filename or "").lower()
+    is_zip = filename.endswith(".zip") or file.content_type in ("application/zip", "application/x-zip-compressed")
+    if not is_zip and not filename.endswith(batch_validation.NDJSON_SUFFIXES) and file.content_type not in (
+        "application/x-ndjson",
+        "application/jsonl",
+    ):
+        raise HTTPException(status_code=400, detail="Upload a ZIP of XML files or an NDJSON stream of documents.")
+    if workers is not None and workers < 0:
+        raise HTTPException(status_code=400, detail="workers must be zero or positive.")
+
+    # Spool the upload to disk so the response can stream after the request body is gone.
+    max_bytes = int(os.getenv(MAX_VALIDATE_BATCH_ENV_VARIABLE, DEFAULT_MAX_VALIDATE_BATCH_BYTES))
+    spooled_path, _digest, _size = await _spool_upload(file, ".zip" if is_zip else ".ndjson", max_bytes)
+
+    if is_zip and not zipfile.is_zipfile(spooled_path):
+        os.unlink(spooled_path)
+        raise HTTPException(status_code=400, detail="Uploaded batch is not a valid ZIP archive.")
+
+    return StreamingResponse(
+        _stream_batch_results(
+            batch_validation.iter_source(spooled_path),
+            # Client-chosen, so never more processes than cores or than the bulk lane may use.
+            min(scheduler.bulk_workers(workers), pool.default_workers()),
+            rules,
+            cleanup_path=spooled_path,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+def _scheduled(priority: Optional[str], cost: float):
+    """A runner that queues work on the cost-aware scheduler in the lane named by ``X-Priority``."""
+
+    lane = (priority or scheduler.INTERACTIVE).strip().lower()
+    if lane not in scheduler.LANES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown X-Priority '{priority}'; expected one of {', '.join(scheduler.LANES)}."
+        )
+    return partial(scheduler.get_scheduler().run, cost=cost, lane=lane)
 
-    if not data:
-        raise HTTPException(status_code=400, detail="Uploaded PDF is empty.")
 
+def _pdf_page_count(path: str) -> int:
     try:
-        xml_candidates, confidence = pdf_ingest.pdf_to_xml_candidates(data)
+        with pdf_ingest._open_document(path) as doc:
+            return doc.page_count
+    except Exception:  # unreadable PDFs are reported by the ingest itself
+        return 0
+
+
+def _check_ingest_options(mode: str, backend: str) -> None:
+    if mode not in pdf_ingest.INGEST_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown ingest mode '{mode}'; expected one of {', '.join(pdf_ingest.INGEST_MODES)}.",
+        )
+    if backend not in ingest_backends.BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown ingest backend '{backend}'; expected one of {', '.join(ingest_backends.BACKENDS)}.",
+        )
+
+
+@router.post("/ingest-pdf")
+async def ingest_pdf(
+    file: UploadFile = File(...),
+    mode: str = Form("auto"),
+    template_id: str = Form(pdf_ingest.DEFAULT_TEMPLATE_ID),
+    backend: str = Form(pdf_ingest.DEFAULT_BACKEND),
+    priority: Optional[str] = Header(None, alias="X-Priority"),
+):
+    _check_ingest_options(mode, backend)
+
+    # Spool and hash while receiving: memory stays flat and a cache hit needs no second pass.
+    spooled_path, digest, size = await _spool_upload(file, ".pdf", _max_pdf_upload_bytes())
+    try:
+        if not size:
+            raise HTTPException(status_code=400, detail="Uploaded PDF is empty.")
+        outcome = ingest_cache.lookup(digest, mode, template_id, backend)
+        if outcome is None:
+            pages = await run_in_threadpool(_pdf_page_count, spooled_path)
+            run = _scheduled(priority, scheduler.estimate_ingest_cost(pages, size))
+            outcome = await run(
+                lambda: ingest_cache.ingest(
+                    spooled_path, pdf_sha256=digest, mode=mode, template_id=template_id, backend=backend
+                )
+            )
     except HTTPException:
         raise
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=422, detail=f"Failed to ingest PDF: {exc}") from exc
+    finally:
+        os.unlink(spooled_path)
+
+    return outcome.asdict()
+
+def _get_ingest_job(job_id: str) -> ingest_jobs.IngestJob:
+    job = ingest_jobs.get_store().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job not found: {job_id}")
+    return job
+
+
+@router.post("/ingest-jobs", status_code=202)
+async def submit_ingest_job(
+    file: Optional[UploadFile] = File(None),
+    directory: Optional[str] = Form(None),
+    mode: str = Form("auto"),
+    backend: str = Form(pdf_ingest.DEFAULT_BACKEND),
+):
+    """Queue a ZIP of PDFs, or a server-side directory, for background ingest."""
+
+    _check_ingest_options(mode, backend)
+    if (file is None) == (directory is None):
+        raise HTTPException(status_code=400, detail="Provide either a ZIP upload or a server-side directory.")
+
+    job_id = ingest_jobs.new_job_id()
+    if directory is not None:
+        if not ingest_jobs.allowed_directory(directory):
+            raise HTTPException(
+                status_code=403,
+                detail=f"Directory is outside {ingest_jobs.JOB_SOURCE_ROOTS_ENV_VARIABLE}: {directory}",
+            )
+        if not os.path.isdir(directory):
+            raise HTTPException(status_code=404, detail=f"Directory not found: {directory}")
+        source_kind, source = "directory", str(Path(directory).resolve())
+    else:
+        max_bytes = int(os.getenv(MAX_JOB_UPLOAD_ENV_VARIABLE, DEFAULT_MAX_JOB_UPLOAD_BYTES))
+        spooled_path, _, _ = await _spool_upload(file, ".zip", max_bytes)
+        if not zipfile.is_zipfile(spooled_path):
+            os.unlink(spooled_path)
+            raise HTTPException(status_code=400, detail="Upload is not a ZIP archive.")
+        target = ingest_jobs.job_dir() / job_id
+        target.mkdir(parents=True, exist_ok=True)
+        source_kind, source = "zip", str(target / ingest_jobs.ZIP_SOURCE_NAME)
+        shutil.move(spooled_path, source)
+
+    job = ingest_jobs.get_store().create_job(job_id, source_kind, source, mode, backend)
+    ingest_jobs.enqueue(job_id)
+    return job.asdict()
+
+
+@router.get("/ingest-jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    return _get_ingest_job(job_id).asdict()
+
+
+@router.get("/ingest-jobs/{job_id}/files")
+async def list_ingest_job_files(
+    job_id: str,
+    status: Optional[str] = Query(None),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    _get_ingest_job(job_id)
+    if status is not None and status not in ingest_jobs.FILE_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown file status '{status}'; expected one of {', '.join(ingest_jobs.FILE_STATUSES)}.",
+        )
+    files = ingest_jobs.get_store().files(job_id, status=status, offset=offset, limit=limit)
+    return {"job_id": job_id, "offset": offset, "files": files}
+
+
+@router.get("/ingest-jobs/{job_id}/events")
+async def stream_ingest_job_events(job_id: str):
+    """Server-sent ``progress`` events until the job ends with ``completed`` or ``failed``."""
+
+    _get_ingest_job(job_id)
+
+    async def events():
+        last_payload = None
+        quiet_since = asyncio.get_running_loop().time()
+        while True:
+            job = _get_ingest_job(job_id)
+            payload = json.dumps(job.asdict())
+            now = asyncio.get_running_loop().time()
+            if payload != last_payload:
+                yield f"event: progress\ndata: {payload}\n\n"
+                last_payload, quiet_since = payload, now
+            elif now - quiet_since >= JOB_EVENT_HEARTBEAT_S:
+                yield ": keep-alive\n\n"
+                quiet_since = now
+            if job.finished:
+                yield f"event: {job.status}\ndata: {payload}\n\n"
+                return
+            await asyncio.sleep(JOB_EVENT_POLL_INTERVAL_S)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/ingest-jobs/{job_id}/resume", status_code=202)
+async def resume_ingest_job(job_id: str):
+    job = _get_ingest_job(job_id)
+    if job.status == "completed":
+        raise HTTPException(status_code=409, detail=f"Ingest job {job_id} already completed.")
+    if ingest_jobs.is_claimed(job):
+        raise HTTPException(status_code=409, detail=f"Ingest job {job_id} is already running.")
+    ingest_jobs.enqueue(job_id)
+    return _get_ingest_job(job_id).asdict()
 
-    return {"xml_candidates": xml_candidates, "confidence": confidence}
 
 @router.post("/render")
-async def render_pdf(body: XMLBody):
+async def render_pdf(body: XMLBody, priority: Optional[str] = Header(None, alias="X-Priority")):
     if body.xml is None or not body.xml.strip():
         raise HTTPException(status_code=400, detail="XML payload is required to generate a PDF.")
 
+    run = _scheduled(priority, scheduler.estimate_render_cost(body.xml))
     try:
-        pdf_bytes = renderer.render(body.xml, template_id=body.template_id, options=body.options or {})
+        pdf_bytes = await renderer.render_async(
+            body.xml, template_id=body.template_id, options=body.options or {}, runner=run
+        )
     except HTTPException:
         raise
     except etree.XMLSyntaxError as exc:
@@ -167,71 +447,129 @@ async def render_pdf(body: XMLBody):
     return StreamingResponse(io.BytesIO(pdf_bytes), media_type="application/pdf")
 
 
+def _new_title_response(request: Dict[str, Any]) -> idempotency.StoredResponse:
+    product = title_requests.produce_title(request)
+    return idempotency.StoredResponse(
+        body=product.pdf,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{product.filename}"',
+            "X-Title-Number": product.build.title_number,
+            "X-Registration-Number": product.build.registration_number,
+            "X-LINC-Number": product.build.linc_number,
+        },
+    )
+
+
 @router.post("/new-title-request")
-async def create_new_title_request(body: NewTitleRequest):
+async def create_new_title_request(
+    body: NewTitleRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    priority: Optional[str] = Header(None, alias="X-Priority"),
+):
+    """Build, validate and render one title.
+
+    Retries are idempotent: the completed PDF is stored under the
+    ``Idempotency-Key`` header, or under the seed the title numbers are
+    derived from (reference number, buyer and purchase date) when no header is
+    sent. A repeat is answered from the store, and a repeat that arrives while
+    the first request is still running waits for it instead of rendering again.
+    """
+
+    request = body.model_dump()
+    if idempotency_key is not None:
+        idempotency_key = idempotency_key.strip()
+        if not idempotency_key or len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400, detail=f"Idempotency-Key must be 1 to {idempotency.MAX_KEY_LENGTH} characters."
+            )
+        key = f"new-title-request:key:{idempotency_key}"
+    else:
+        seed = title_request_builder.request_seed(body.reference_number, body.buyer_name, body.purchase_date)
+        key = f"new-title-request:seed:{seed}"
+
+    run = _scheduled(priority, scheduler.estimate_title_request_cost(request))
     try:
-        owner_groups = [group.model_dump() for group in body.owner_groups] if body.owner_groups else None
-        build_result = title_request_builder.build_new_title_xml(
-            reference_number=body.reference_number,
-            buyer_name=body.buyer_name,
-            purchase_price=Decimal(body.purchase_price),
-            purchase_date=body.purchase_date,
-            legal_description=body.legal_description,
-            municipality_name=body.municipality,
-            municipality_code=body.municipality_code,
-            title_number=body.title_number,
-            registration_number=body.registration_number,
-            linc_number=body.linc_number,
-            rights_type=body.rights_type or title_request_builder.DEFAULT_RIGHTS_TYPE,
-            estate=body.estate or title_request_builder.DEFAULT_ESTATE,
-            tenancy_type=body.tenancy_type or title_request_builder.DEFAULT_TENANCY_TYPE,
-            owner_groups=owner_groups,
+        stored, replayed = await idempotency.execute_async(
+            key,
+            idempotency.fingerprint(request),
+            lambda: _new_title_response(request),
+            strict=idempotency_key is not None,
+            runner=run,
         )
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except idempotency.IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except title_requests.TitleRequestError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
 
-    valid, validation_errors = xml_validator.validate(build_result.xml)
-    if not valid:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "message": "Generated XML failed SPIN2 validation.",
-                "errors": validation_errors,
-            },
-        )
+    response = Response(content=stored.body, media_type=stored.media_type, headers=stored.headers)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
 
-    template_id = body.template_id or title_request_builder.DEFAULT_TEMPLATE_ID
-    options = body.render_options or {}
-    if "pdfa" not in options:
-        options = {**options, "pdfa": True}
 
+def _max_title_batch_bytes() -> int:
+    return int(os.getenv(MAX_TITLE_BATCH_BYTES_ENV_VARIABLE, DEFAULT_MAX_TITLE_BATCH_BYTES))
+
+
+def _validated_title_item(item: title_requests.TitleBatchItem) -> title_requests.TitleBatchItem:
+    if item.request is None:
+        return item
     try:
-        pdf_bytes = renderer.render(build_result.xml, template_id=template_id, options=options)
-    except HTTPException:
-        raise
-    except etree.XMLSyntaxError as exc:
-        raise HTTPException(status_code=500, detail=f"Generated XML not well-formed: {exc}") from exc
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=404, detail=str(exc)) from exc
-    except RuntimeError as exc:
-        raise HTTPException(status_code=503, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=422, detail=f"Failed to render generated PDF: {exc}") from exc
-
-    buffer = io.BytesIO(pdf_bytes)
-    response = StreamingResponse(buffer, media_type="application/pdf")
-    filename = f"title_{build_result.title_number}.pdf"
-    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response.headers["X-Title-Number"] = build_result.title_number
-    response.headers["X-Registration-Number"] = build_result.registration_number
-    response.headers["X-LINC-Number"] = build_result.linc_number
+        request = NewTitleRequest.model_validate(item.request)
+    except ValidationError as exc:
+        errors = [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+        return title_requests.TitleBatchItem(item.index, item.source, request=item.request, error=errors)
+    return title_requests.TitleBatchItem(item.index, item.source, request=request.model_dump())
+
+
+@router.post("/new-title-request/batch")
+async def create_new_title_request_batch(request: Request, workers: Optional[int] = Query(None, ge=0)):
+    """Build, validate and render many new title requests, streaming back a ZIP of PDFs and a manifest.
+
+    The body is a JSON array of ``NewTitleRequest`` payloads, or NDJSON (one
+    payload per line) when sent as ``application/x-ndjson``. Items that fail
+    are listed in ``manifest.json`` with their error and do not stop the batch.
+    """
+
+    max_bytes = _max_title_batch_bytes()
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds the {max_bytes} byte limit.")
+
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    try:
+        if content_type in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+            items = list(title_requests.iter_ndjson(bytes(body).splitlines()))
+        else:
+            items = list(title_requests.iter_json_array(bytes(body)))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {exc}") from exc
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch contains no new title requests.")
+    max_items = int(os.getenv(MAX_TITLE_BATCH_ITEMS_ENV_VARIABLE, DEFAULT_MAX_TITLE_BATCH_ITEMS))
+    if len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds the {max_items} item limit.")
+
+    items = [_validated_title_item(item) for item in items]
+    results = title_requests.produce_batch(items, workers=scheduler.bulk_workers(workers))
+    response = StreamingResponse(title_requests.stream_zip(results), media_type="application/zip")
+    response.headers["Content-Disposition"] = 'attachment; filename="titles.zip"'
+    response.headers["X-Batch-Items"] = str(len(items))
     return response
 
 class ReserveBody(BaseModel):
     strategy: Optional[str] = "sequential"
     seed: Optional[str] = None
+    count: int = Field(default=1, ge=1, le=title_numbers.MAX_RESERVE_COUNT)
 
 @router.post("/reserve-title-number")
-async def reserve_title_number(body: ReserveBody):
-    tn = title_numbers.reserve(strategy=body.strategy, seed=body.seed)
-    return {"title_number": tn}
+def reserve_title_number(body: ReserveBody):
+    # Sync handler: an occasional block lease touches SQLite, so keep it off the event loop.
+    try:
+        numbers = title_numbers.reserve_many(body.count, strategy=body.strategy, seed=body.seed)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"title_number": numbers[0], "title_numbers": numbers}
@@ -3,7 +3,12 @@ import os
 
 from fastapi import FastAPI
 
+from app.api.admission import AdmissionMiddleware
+from app.api.health import router as health_router
+from app.api.metrics import MetricsMiddleware, router as metrics_router
+from app.api.profiling import ProfilingMiddleware
 from app.api.routes import router as api_router
+from app.services import ingest_jobs, warmup
 
 
 APP_DIR = Path(__file__).resolve().parent
@@ -23,6 +28,12 @@ def _collect_missing_assets() -> list[str]:
 
 
 app = FastAPI(title="Title Document Creator API (Pro)", version="1.0.0")
+# Innermost, so Server-Timing describes the work rather than time spent queued at the gates.
+app.add_middleware(ProfilingMiddleware)
+# Bound concurrent and queued work on the heavy endpoints; see app/api/admission.py for the limits.
+app.add_middleware(AdmissionMiddleware)
+# Outermost, so requests turned away by admission control are counted too.
+app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
@@ -36,4 +47,18 @@ async def _ensure_domain_assets() -> None:
         )
 
 
+@app.on_event("startup")
+async def _start_warm_up() -> None:
+    # Runs in the background; /readyz reports 503 until it has finished.
+    warmup.start()
+
+
+@app.on_event("startup")
+async def _resume_ingest_jobs() -> None:
+    # Jobs interrupted by a restart pick up from their remaining pending files.
+    ingest_jobs.resume_jobs()
+
+
 app.include_router(api_router, prefix="/v1")
+app.include_router(metrics_router)
+app.include_router(health_router)
@@ -18,6 +18,8 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 import yaml
 from lxml import etree
 
+from app.utils import metrics
+
 
 __all__ = ["parse_ascii_to_xml", "build_document_tree", "Spin2AsciiParser"]
 
@@ -592,6 +594,7 @@ def build_document_tree(document: Dict[str, Any]) -> etree._Element:
     return root
 
 
+@metrics.timed("ascii_parse")
 def parse_ascii_to_xml(ascii_text: str, mapping_path: str) -> str:
     """Parse SPIN 2 ASCII content into canonical XML.
 
@@ -0,0 +1,202 @@
+"""File-level parallel ingest of directories of legacy title PDFs."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+import glob
+import os
+from pathlib import Path
+import time
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from app.services import ingest_cache, pdf_ingest
+from app.utils import pool
+from app.utils.hashing import sha256_file
+
+
+__all__ = ["IngestResult", "IngestSummary", "iter_pdf_paths", "ingest_batch"]
+
+
+PDF_SUFFIXES = (".pdf",)
+
+
+@dataclass(slots=True)
+class IngestResult:
+    source: str
+    xml_candidates: List[str]
+    confidence: float
+    elapsed_ms: float
+    error: Optional[str] = None
+    sha256: Optional[str] = None
+    cached: bool = False
+    duplicate_of: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.xml_candidates)
+
+    def asdict(self) -> Dict[str, object]:
+        return {
+            "source": self.source,
+            "xml_candidates": self.xml_candidates,
+            "confidence": self.confidence,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "error": self.error,
+            "sha256": self.sha256,
+            "cached": self.cached,
+            "duplicate_of": self.duplicate_of,
+        }
+
+
+@dataclass
+class IngestSummary:
+    """Running totals and throughput for a batch ingest."""
+
+    total: int = 0
+    extracted: int = 0
+    failed: int = 0
+    cached: int = 0
+    duplicates: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    def record(self, result: IngestResult) -> None:
+        self.total += 1
+        if result.duplicate_of is not None:
+            self.duplicates += 1
+            return
+        if result.cached:
+            self.cached += 1
+        if result.ok:
+            self.extracted += 1
+        else:
+            self.failed += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed_s(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return max(end - self.started_at, 0.0)
+
+    def asdict(self) -> Dict[str, object]:
+        elapsed = self.elapsed_s
+        return {
+            "total": self.total,
+            "extracted": self.extracted,
+            "failed": self.failed,
+            "cached": self.cached,
+            "duplicates": self.duplicates,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_second": round(self.total / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+def iter_pdf_paths(source: Union[str, Path]) -> Iterator[str]:
+    """Yield PDF paths from a directory (recursively), a single file, or a glob."""
+
+    text = str(source)
+    path = Path(text)
+    if path.is_dir():
+        candidates: Iterable[str] = (
+            str(candidate) for candidate in sorted(path.rglob("*")) if candidate.suffix.lower() in PDF_SUFFIXES
+        )
+    elif path.is_file():
+        candidates = [text]
+    else:
+        candidates = sorted(glob.glob(text, recursive=True))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            yield candidate
+
+
+def _ingest_path(path: str, mode: str = "auto", backend: str = pdf_ingest.DEFAULT_BACKEND) -> IngestResult:
+    started = time.perf_counter()
+    try:
+        candidates, confidence = pdf_ingest.pdf_to_xml_candidates(path, mode=mode, backend=backend)
+    except Exception as exc:
+        return IngestResult(path, [], 0.0, (time.perf_counter() - started) * 1000, error=str(exc))
+    return IngestResult(path, candidates, confidence, (time.perf_counter() - started) * 1000)
+
+
+def _ingest_hashed(
+    item: Tuple[str, str], mode: str = "auto", backend: str = pdf_ingest.DEFAULT_BACKEND
+) -> IngestResult:
+    path, digest = item
+    started = time.perf_counter()
+    try:
+        outcome = ingest_cache.ingest(path, pdf_sha256=digest, mode=mode, backend=backend)
+    except Exception as exc:
+        return IngestResult(path, [], 0.0, (time.perf_counter() - started) * 1000, error=str(exc), sha256=digest)
+    return IngestResult(
+        path,
+        outcome.xml_candidates,
+        outcome.confidence,
+        (time.perf_counter() - started) * 1000,
+        sha256=digest,
+        cached=outcome.cached,
+    )
+
+
+def _ingest_deduplicated(
+    paths: Iterable[str], workers: Optional[int], mode: str, backend: str, known: Optional[Mapping[str, str]] = None
+) -> Iterator[IngestResult]:
+    seen: Dict[str, str] = dict(known or {})
+    skipped: List[IngestResult] = []
+
+    def unique() -> Iterator[Tuple[str, str]]:
+        for path in paths:
+            try:
+                digest = sha256_file(path)
+            except OSError as exc:
+                skipped.append(IngestResult(path, [], 0.0, 0.0, error=str(exc)))
+                continue
+            first = seen.get(digest)
+            if first is not None:
+                skipped.append(IngestResult(path, [], 0.0, 0.0, sha256=digest, duplicate_of=first))
+                continue
+            seen[digest] = path
+            # Files ingested by an earlier run are answered from the cache without a worker round-trip.
+            cached = ingest_cache.lookup(digest, mode, backend=backend)
+            if cached is not None:
+                skipped.append(
+                    IngestResult(path, cached.xml_candidates, cached.confidence, 0.0, sha256=digest, cached=True)
+                )
+                continue
+            yield path, digest
+
+    for result in pool.imap_unordered(partial(_ingest_hashed, mode=mode, backend=backend), unique(), workers=workers):
+        while skipped:
+            yield skipped.pop(0)
+        yield result
+    while skipped:
+        yield skipped.pop(0)
+
+
+def ingest_batch(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    mode: str = "auto",
+    skip_duplicates: bool = False,
+    backend: str = pdf_ingest.DEFAULT_BACKEND,
+    known: Optional[Mapping[str, str]] = None,
+) -> Iterator[IngestResult]:
+    """Ingest many PDFs on a process pool, yielding results as they finish.
+
+    Each file is processed by a single worker; page-level parallelism is
+    disabled inside pool workers so the two modes never nest.
+
+    With ``skip_duplicates`` every file is hashed up front: byte-identical
+    copies of a file already seen in this run are reported with
+    ``duplicate_of`` instead of being ingested again, and files found in the
+    ingest cache are answered from it. Fresh results are written to the cache.
+    ``known`` maps the SHA-256 of files handled before this run (a resumed
+    job's finished files) to what their copies report as ``duplicate_of``.
+    ``backend`` selects the text-line extractor (see ``ingest_backends``).
+    """
+
+    if skip_duplicates:
+        return _ingest_deduplicated(paths, workers, mode, backend, known)
+    return pool.imap_unordered(partial(_ingest_path, mode=mode, backend=backend), paths, workers=workers)
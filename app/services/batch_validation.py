@@ -0,0 +1,249 @@
+"""Batch XML validation over directories, globs, NDJSON streams, and ZIP archives."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+import glob
+import json
+import os
+from pathlib import Path
+import time
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Union
+import zipfile
+
+from app.services import business_rules, xml_validator
+from app.utils import pool
+
+
+__all__ = [
+    "BatchItem",
+    "BatchResult",
+    "BatchSummary",
+    "iter_source",
+    "iter_directory",
+    "iter_glob",
+    "iter_ndjson",
+    "iter_zip",
+    "validate_batch",
+]
+
+
+XML_SUFFIXES = (".xml",)
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+@dataclass(slots=True)
+class BatchItem:
+    """A single document queued for validation.
+
+    File-backed items carry only ``path`` so the worker reads the document
+    itself; streamed items (NDJSON lines, ZIP members) carry the XML inline.
+    Inputs that could not be decoded carry ``error`` so every input still
+    produces exactly one result.
+    """
+
+    source: str
+    xml: Optional[str] = None
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class BatchResult:
+    source: str
+    ok: bool
+    errors: List[Dict[str, Optional[int | str]]]
+    elapsed_ms: float
+
+    def asdict(self) -> Dict[str, object]:
+        return {
+            "source": self.source,
+            "ok": self.ok,
+            "errors": self.errors,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+@dataclass
+class BatchSummary:
+    """Running totals and throughput for a batch run."""
+
+    total: int = 0
+    valid: int = 0
+    invalid: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    def record(self, result: BatchResult) -> None:
+        self.total += 1
+        if result.ok:
+            self.valid += 1
+        else:
+            self.invalid += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed_s(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return max(end - self.started_at, 0.0)
+
+    @property
+    def docs_per_second(self) -> float:
+        elapsed = self.elapsed_s
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def asdict(self) -> Dict[str, object]:
+        return {
+            "total": self.total,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "docs_per_second": round(self.docs_per_second, 2),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Sources
+
+
+def iter_directory(path: Union[str, Path], pattern: str = "**/*.xml") -> Iterator[BatchItem]:
+    root = Path(path)
+    for candidate in sorted(root.glob(pattern)):
+        if candidate.is_file():
+            yield BatchItem(source=str(candidate), path=str(candidate))
+
+
+def iter_glob(pattern: str) -> Iterator[BatchItem]:
+    for candidate in sorted(glob.glob(pattern, recursive=True)):
+        if os.path.isfile(candidate):
+            yield BatchItem(source=candidate, path=candidate)
+
+
+def iter_ndjson(stream: IO, source_name: str = "ndjson") -> Iterator[BatchItem]:
+    """Yield items from an NDJSON stream.
+
+    Each line is either a JSON string holding the XML or an object with an
+    ``xml`` member and an optional ``id`` used to label the result.
+    """
+
+    for line_no, raw in enumerate(stream, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        raw = raw.strip()
+        if not raw:
+            continue
+        label = f"{source_name}:{line_no}"
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            yield _invalid_item(label, f"Invalid NDJSON line: {exc.msg}")
+            continue
+        if isinstance(record, str):
+            yield BatchItem(source=label, xml=record)
+        elif isinstance(record, dict) and isinstance(record.get("xml"), str):
+            yield BatchItem(source=str(record.get("id") or label), xml=record["xml"])
+        else:
+            yield _invalid_item(label, "NDJSON line must be a string or an object with an 'xml' member.")
+
+
+def iter_zip(archive: Union[str, Path, IO[bytes]]) -> Iterator[BatchItem]:
+    with zipfile.ZipFile(archive) as zf:
+        for info in sorted(zf.infolist(), key=lambda item: item.filename):
+            if info.is_dir() or not info.filename.lower().endswith(XML_SUFFIXES):
+                continue
+            data = zf.read(info)
+            try:
+                xml = data.decode("utf-8")
+            except UnicodeDecodeError:
+                yield _invalid_item(info.filename, "Archive member must be UTF-8 encoded.")
+                continue
+            yield BatchItem(source=info.filename, xml=xml)
+
+
+def iter_source(source: Union[str, Path]) -> Iterator[BatchItem]:
+    """Dispatch a CLI-style source spec to the matching iterator.
+
+    Directories are walked recursively for ``*.xml``; ``.zip`` and
+    ``.ndjson``/``.jsonl`` files are opened as archives and streams; anything
+    else is treated as a glob pattern.
+    """
+
+    text = str(source)
+    path = Path(text)
+    if path.is_dir():
+        return iter_directory(path)
+    lower = text.lower()
+    if path.is_file() and lower.endswith(".zip"):
+        return iter_zip(path)
+    if path.is_file() and lower.endswith(NDJSON_SUFFIXES):
+        return _iter_ndjson_file(path)
+    return iter_glob(text)
+
+
+def _iter_ndjson_file(path: Path) -> Iterator[BatchItem]:
+    with path.open("r", encoding="utf-8") as fh:
+        yield from iter_ndjson(fh, source_name=str(path))
+
+
+def _invalid_item(source: str, message: str) -> BatchItem:
+    return BatchItem(source=source, error=message)
+
+
+# ---------------------------------------------------------------------------
+# Workers
+
+
+def _init_worker() -> None:
+    # Compile the schema and rule set once per worker process; a missing XSD
+    # is reported per document by ``xml_validator.validate`` instead of
+    # killing the pool.
+    business_rules.default_rules()
+    try:
+        xml_validator._load_schema()
+    except Exception:  # pragma: no cover - surfaced per item
+        pass
+
+
+def _failed(item: BatchItem, message: str, started: float) -> BatchResult:
+    issue = xml_validator.ValidationIssue(message=message, line=None, column=None, xpath=None)
+    return BatchResult(item.source, False, [issue.asdict()], (time.perf_counter() - started) * 1000)
+
+
+def _validate_item(item: BatchItem, rules: bool = False) -> BatchResult:
+    started = time.perf_counter()
+    if item.error is not None:
+        return _failed(item, item.error, started)
+
+    xml = item.xml
+    if xml is None and item.path is not None:
+        try:
+            xml = Path(item.path).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as exc:
+            return _failed(item, f"Unable to read document: {exc}", started)
+
+    ok, errors = xml_validator.validate(xml or "")
+    if rules and xml:
+        rules_ok, rule_errors = business_rules.evaluate(xml)
+        ok = ok and rules_ok
+        errors = errors + rule_errors
+    return BatchResult(item.source, ok, errors, (time.perf_counter() - started) * 1000)
+
+
+def validate_batch(
+    items: Iterable[BatchItem],
+    workers: Optional[int] = None,
+    rules: bool = False,
+) -> Iterator[BatchResult]:
+    """Validate many documents, yielding results as they finish.
+
+    ``workers`` defaults to the CPU count; ``0`` or ``1`` validates inline in
+    the calling process. With ``rules`` the business rules from
+    ``business_rules`` are applied after the schema. Results are yielded in
+    completion order, not input order; use ``BatchResult.source`` to
+    correlate them.
+    """
+
+    return pool.imap_unordered(partial(_validate_item, rules=rules), items, workers=workers, initializer=_init_worker)
@@ -0,0 +1,234 @@
+"""Declarative business rules evaluated alongside XSD validation.
+
+The SPIN 2 schema cannot express cross-field constraints such as tenancy
+interests summing to 100%. Rules here are declared as data: a context path the
+rule fires on, named XPath selectors evaluated relative to the context element,
+and a Python predicate over the selected values. ``compile_rules`` turns the
+declarations into XPath objects and a tag index once; ``evaluate`` then walks
+each document a single time and dispatches every element to the rules keyed on
+its tag.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from lxml import etree
+
+from .xml_validator import ValidationIssue
+
+
+__all__ = ["RuleSpec", "CompiledRules", "DEFAULT_RULES", "compile_rules", "evaluate", "default_rules"]
+
+
+Predicate = Callable[[Mapping[str, Any]], Optional[str]]
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """Declaration of a single rule.
+
+    ``context`` is a tag path such as ``Title/Instruments/Instrument``; the rule
+    fires on every element whose trailing ancestors match it. ``select`` maps
+    names to XPath expressions evaluated relative to that element, and
+    ``predicate`` receives the selected values and returns a failure message or
+    ``None``.
+    """
+
+    rule_id: str
+    description: str
+    context: str
+    select: Mapping[str, str]
+    predicate: Predicate
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    spec: RuleSpec
+    context_tags: Tuple[str, ...]
+    selectors: Tuple[Tuple[str, etree.XPath], ...]
+
+    def matches(self, element: etree._Element) -> bool:
+        node: Optional[etree._Element] = element
+        # The tag index already matched context_tags[-1]; confirm the ancestors.
+        for tag in reversed(self.context_tags[:-1]):
+            node = node.getparent() if node is not None else None
+            if node is None or node.tag != tag:
+                return False
+        return True
+
+
+@dataclass
+class CompiledRules:
+    by_tag: Dict[str, List[_CompiledRule]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return sum(len(rules) for rules in self.by_tag.values())
+
+
+def compile_rules(specs: Sequence[RuleSpec]) -> CompiledRules:
+    compiled = CompiledRules()
+    for spec in specs:
+        tags = tuple(part for part in spec.context.strip("/").split("/") if part)
+        if not tags:
+            raise ValueError(f"Rule '{spec.rule_id}' has an empty context path")
+        selectors = tuple((name, etree.XPath(expr)) for name, expr in spec.select.items())
+        compiled.by_tag.setdefault(tags[-1], []).append(_CompiledRule(spec, tags, selectors))
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# Predicates
+
+
+def _parse_interest(value: str) -> Optional[Fraction]:
+    text = value.strip().replace(" ", "")
+    if not text:
+        return None
+    try:
+        if "/" in text:
+            numerator, denominator = text.split("/", 1)
+            return Fraction(int(numerator), int(denominator))
+        # Bare numbers are read as percentages, matching how SPIN 2 prints "100".
+        return Fraction(Decimal(text.rstrip("%"))) / 100
+    except (ValueError, ZeroDivisionError, InvalidOperation):
+        return None
+
+
+def _interests_total_one(values: Mapping[str, Any]) -> Optional[str]:
+    interests: List[str] = [str(item) for item in values["interests"]]
+    if not interests:
+        return None
+    total = Fraction(0)
+    for raw in interests:
+        parsed = _parse_interest(raw)
+        if parsed is None:
+            return f"Unrecognised tenancy interest '{raw}'."
+        total += parsed
+    if total != 1:
+        percent = float(total * 100)
+        return f"Tenancy group interests total {percent:g}% instead of 100%."
+    return None
+
+
+_LINC_PATTERN = re.compile(r"\d{10}")
+
+
+def _linc_is_ten_digits(values: Mapping[str, Any]) -> Optional[str]:
+    linc = values["linc"]
+    if _LINC_PATTERN.fullmatch(linc):
+        return None
+    return f"LINC number '{linc}' must be exactly 10 digits."
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+
+def _instrument_not_after_title(values: Mapping[str, Any]) -> Optional[str]:
+    registered = _parse_date(values["registration_date"])
+    created = _parse_date(values["title_create_date"])
+    if registered is None or created is None:
+        return None
+    if registered > created:
+        return (
+            f"Instrument registration date {registered.isoformat()} is later than "
+            f"the title create date {created.isoformat()}."
+        )
+    return None
+
+
+DEFAULT_RULES: Tuple[RuleSpec, ...] = (
+    RuleSpec(
+        rule_id="tenancy-interest-total",
+        description="Interests across a title's tenancy groups sum to 100%.",
+        context="Title/Owners",
+        select={"interests": "TenancyGroup/Interest[normalize-space()]/text()"},
+        predicate=_interests_total_one,
+    ),
+    RuleSpec(
+        rule_id="linc-number-format",
+        description="Every LINC number is exactly 10 digits.",
+        context="Parcel/LINCNumber",
+        select={"linc": "string(.)"},
+        predicate=_linc_is_ten_digits,
+    ),
+    RuleSpec(
+        rule_id="instrument-date-not-after-title",
+        description="Instrument registration dates are not later than the title create date.",
+        context="Title/Instruments/Instrument",
+        select={
+            "registration_date": "string(RegistrationDate)",
+            "title_create_date": "string(ancestor::Title[1]/CreateDate)",
+        },
+        predicate=_instrument_not_after_title,
+    ),
+)
+
+_DEFAULT_COMPILED: Optional[CompiledRules] = None
+
+
+def default_rules() -> CompiledRules:
+    global _DEFAULT_COMPILED
+    if _DEFAULT_COMPILED is None:
+        _DEFAULT_COMPILED = compile_rules(DEFAULT_RULES)
+    return _DEFAULT_COMPILED
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+
+
+def _iter_rule_issues(root: etree._Element, rules: CompiledRules):
+    by_tag = rules.by_tag
+    if not by_tag:
+        return
+    tree = root.getroottree()
+    for element in root.iter(*by_tag):
+        for rule in by_tag[element.tag]:
+            if not rule.matches(element):
+                continue
+            values = {name: selector(element) for name, selector in rule.selectors}
+            message = rule.spec.predicate(values)
+            if message:
+                yield ValidationIssue(
+                    message=f"[{rule.spec.rule_id}] {message}",
+                    line=element.sourceline,
+                    column=None,
+                    xpath=tree.getpath(element),
+                )
+
+
+def evaluate(
+    document: Union[str, etree._Element],
+    rules: Optional[CompiledRules] = None,
+) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
+    """Apply business rules to a document in one traversal.
+
+    Returns ``(ok, issues[])`` in the same shape as ``xml_validator.validate``;
+    each message is prefixed with the failing rule id.
+    """
+
+    compiled = rules if rules is not None else default_rules()
+    if isinstance(document, str):
+        if not document.strip():
+            return False, [ValidationIssue(message="XML payload is empty.", line=None, column=None, xpath=None).asdict()]
+        try:
+            root = etree.fromstring(document.encode("utf-8"))
+        except etree.XMLSyntaxError as exc:
+            line, column = (exc.position if exc.position else (None, None))
+            issue = ValidationIssue(message=f"XML not well-formed: {exc.msg}", line=line, column=column, xpath=None)
+            return False, [issue.asdict()]
+    else:
+        root = document
+
+    issues = [issue.asdict() for issue in _iter_rule_issues(root, compiled)]
+    return not issues, issues
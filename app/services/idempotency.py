@@ -0,0 +1,358 @@
+"""Idempotent replay of completed responses, shared by every worker process.
+
+A client retrying a timed-out request should get the response the first
+attempt produced, not a second run of the same work. Completed responses are
+stored in SQLite (WAL mode) under an idempotency key together with a
+fingerprint of the request payload. A request whose key is already stored is
+answered from the store. A request whose key is still being computed joins
+that computation: callers in the same process share it through a
+``SingleFlight``, and callers in other worker processes poll the store until
+the owner finishes (``execute_async`` polls from the event loop, holding no
+thread or scheduler slot). The owner holds a pending claim, and a claim older
+than ``IDEMPOTENCY_PENDING_TIMEOUT_S`` is treated as abandoned (the owner
+crashed) and taken over. Only successful responses are stored, so failures
+are retried normally. Expired rows are purged when the store opens and then
+at most every ``PURGE_INTERVAL_S`` as new claims are written.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils import metrics
+from app.utils.hashing import sha256_hex
+from app.utils.singleflight import SingleFlight
+
+
+__all__ = [
+    "IdempotencyConflict",
+    "IdempotencyStore",
+    "StoredResponse",
+    "execute",
+    "execute_async",
+    "fingerprint",
+    "get_store",
+    "reset_store",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+DB_PATH_ENV_VARIABLE = "IDEMPOTENCY_DB"
+DEFAULT_DB_PATH = "var/idempotency.sqlite3"
+TTL_ENV_VARIABLE = "IDEMPOTENCY_TTL_S"
+DEFAULT_TTL_S = 24 * 60 * 60
+PENDING_TIMEOUT_ENV_VARIABLE = "IDEMPOTENCY_PENDING_TIMEOUT_S"
+DEFAULT_PENDING_TIMEOUT_S = 120.0
+POLL_INTERVAL_S = 0.05
+PURGE_INTERVAL_S = 60.0
+MAX_KEY_LENGTH = 255
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    media_type TEXT,
+    headers TEXT,
+    body BLOB,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class IdempotencyConflict(ValueError):
+    """An explicit idempotency key was reused with a different request payload."""
+
+
+class _Pending(Exception):
+    """Another worker process holds a fresh claim on the key; raised instead of polling in a thread."""
+
+
+@dataclass(slots=True)
+class StoredResponse:
+    body: bytes
+    media_type: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    fingerprint: str = ""
+
+
+def fingerprint(payload: Mapping[str, Any]) -> str:
+    """Stable hash of a request payload (key order and value types do not matter)."""
+
+    return sha256_hex(json.dumps(payload, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8"))
+
+
+class IdempotencyStore:
+    """SQLite table of pending claims and completed responses, keyed by idempotency key."""
+
+    def __init__(self, path: str, ttl_s: float = DEFAULT_TTL_S) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_s = ttl_s
+        self._owner = f"{os.getpid()}:{id(self)}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._purge(time.time())
+
+    def _purge(self, now: float) -> None:
+        # Callers hold ``_lock``. Rows keep whole response bodies, so long-lived workers must drop them as they expire.
+        self._conn.execute("DELETE FROM responses WHERE updated_at < ?", (now - self.ttl_s,))
+        self._purged_at = now
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _row(self, key: str) -> Optional[Tuple]:
+        return self._conn.execute(
+            "SELECT fingerprint, state, media_type, headers, body, updated_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+    @staticmethod
+    def _response(row: Tuple) -> StoredResponse:
+        fingerprint_, _state, media_type, headers, body, _updated = row
+        return StoredResponse(body=bytes(body), media_type=media_type, headers=json.loads(headers), fingerprint=fingerprint_)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        """The completed, unexpired response stored under ``key``."""
+
+        with self._lock:
+            row = self._row(key)
+        if row is None or row[1] != "done" or row[5] < time.time() - self.ttl_s:
+            return None
+        return self._response(row)
+
+    def pending(self, key: str, pending_timeout_s: float) -> bool:
+        """Whether a fresh pending claim is held on ``key``."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT state, updated_at FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] == "pending" and row[1] >= time.time() - pending_timeout_s
+
+    def claim(
+        self, key: str, fingerprint_: str, pending_timeout_s: float, replace_done: bool = False
+    ) -> Tuple[str, Optional[StoredResponse]]:
+        """Try to become the owner of ``key``.
+
+        Returns ``("claimed", None)`` when the caller must compute the response,
+        ``("done", response)`` when a completed response is stored (unless
+        ``replace_done``), and ``("pending", None)`` while another owner's
+        fresh claim is running.
+        """
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._row(key)
+                if row is not None:
+                    state, updated_at = row[1], row[5]
+                    if state == "done" and updated_at >= now - self.ttl_s and not replace_done:
+                        self._conn.execute("COMMIT")
+                        return "done", self._response(row)
+                    if state == "pending" and updated_at >= now - pending_timeout_s:
+                        self._conn.execute("COMMIT")
+                        return "pending", None
+                if now - self._purged_at >= PURGE_INTERVAL_S:
+                    self._purge(now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, fingerprint, state, owner, created_at, updated_at)"
+                    " VALUES (?, ?, 'pending', ?, ?, ?)",
+                    (key, fingerprint_, self._owner, now, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return "claimed", None
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET state = 'done', fingerprint = ?, media_type = ?, headers = ?, body = ?, updated_at = ?"
+                " WHERE key = ? AND owner = ?",
+                (
+                    response.fingerprint,
+                    response.media_type,
+                    json.dumps(response.headers),
+                    response.body,
+                    time.time(),
+                    key,
+                    self._owner,
+                ),
+            )
+
+    def release(self, key: str) -> None:
+        """Drop this process's pending claim so the next request recomputes."""
+
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ? AND owner = ? AND state = 'pending'", (key, self._owner))
+
+
+_STORE: Optional[IdempotencyStore] = None
+_STORE_LOCK = threading.Lock()
+_FLIGHTS: SingleFlight = SingleFlight()
+
+
+def get_store() -> IdempotencyStore:
+    global _STORE
+    with _STORE_LOCK:
+        path = os.getenv(DB_PATH_ENV_VARIABLE, DEFAULT_DB_PATH)
+        if _STORE is None or _STORE.path != path:
+            _STORE = IdempotencyStore(path, ttl_s=float(os.getenv(TTL_ENV_VARIABLE, DEFAULT_TTL_S)))
+        return _STORE
+
+
+def reset_store() -> None:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is not None:
+            _STORE.close()
+        _STORE = None
+
+
+def _check(stored: StoredResponse, fingerprint_: str, strict: bool) -> bool:
+    """Whether ``stored`` answers a request with ``fingerprint_``.
+
+    A mismatch on a client-supplied key (``strict``) is a client error; on a
+    derived key it just means the request changed and must be recomputed.
+    """
+
+    if stored.fingerprint == fingerprint_:
+        return True
+    if strict:
+        raise IdempotencyConflict("Idempotency-Key was already used with a different request payload.")
+    return False
+
+
+def _pending_timeout_s() -> float:
+    return float(os.getenv(PENDING_TIMEOUT_ENV_VARIABLE, DEFAULT_PENDING_TIMEOUT_S))
+
+
+def _run(
+    key: str,
+    fingerprint_: str,
+    strict: bool,
+    compute: Callable[[], StoredResponse],
+    deadline: Optional[float] = None,
+    wait: bool = True,
+) -> Tuple[StoredResponse, bool]:
+    """Claim ``key`` and compute, or replay its response once stored.
+
+    While another process owns a fresh claim this polls until ``deadline``
+    (default: the pending timeout from now), or raises ``_Pending`` at once
+    without ``wait``.
+    """
+
+    store = get_store()
+    timeout = _pending_timeout_s()
+    if deadline is None:
+        deadline = time.monotonic() + timeout
+    replace_done = False
+    while True:
+        state, stored = store.claim(key, fingerprint_, timeout, replace_done=replace_done)
+        if state == "done" and stored is not None:
+            if _check(stored, fingerprint_, strict):
+                return stored, True
+            # A derived key whose payload changed: take the key over and recompute.
+            replace_done = True
+            continue
+        if state == "claimed":
+            break
+        if time.monotonic() > deadline:
+            # The other worker may still be running; compute rather than fail the request.
+            LOGGER.warning("Idempotency key %s still pending after %.0fs; recomputing", key, timeout)
+            break
+        if not wait:
+            raise _Pending(key)
+        time.sleep(POLL_INTERVAL_S)
+
+    try:
+        response = compute()
+    except BaseException:
+        store.release(key)
+        raise
+    response.fingerprint = fingerprint_
+    store.complete(key, response)
+    return response, False
+
+
+def execute(
+    key: str, fingerprint_: str, compute: Callable[[], StoredResponse], strict: bool = True
+) -> Tuple[StoredResponse, bool]:
+    """Return the stored response for ``key`` or compute, store and return it.
+
+    The second element is true when the response was replayed from the store
+    or shared with a concurrent identical request rather than computed by this
+    call. ``strict`` marks a client-supplied key, whose reuse with a different
+    payload raises ``IdempotencyConflict``.
+    """
+
+    (response, replayed), shared = _FLIGHTS.do((key, fingerprint_), lambda: _lookup_or_run(key, fingerprint_, strict, compute))
+    metrics.cache_result("idempotency", replayed or shared)
+    return response, replayed or shared
+
+
+async def execute_async(
+    key: str,
+    fingerprint_: str,
+    compute: Callable[[], StoredResponse],
+    strict: bool = True,
+    runner: Optional[Callable[[Callable[[], Any]], Awaitable[Any]]] = None,
+) -> Tuple[StoredResponse, bool]:
+    """``execute`` for request handlers: waiters do not hold a thread.
+
+    The work runs in the threadpool, or through ``runner`` (such as the
+    cost-aware scheduler) when given. When another worker process is
+    computing the same key, the slot is given back and the store is polled
+    from the event loop until that worker finishes.
+    """
+
+    deadline = time.monotonic() + _pending_timeout_s()
+    while True:
+        try:
+            (response, replayed), shared = await _FLIGHTS.do_async(
+                (key, fingerprint_),
+                lambda: _lookup_or_run(key, fingerprint_, strict, compute, deadline, wait=False),
+                runner=runner,
+            )
+            break
+        except _Pending:
+            store, timeout = get_store(), _pending_timeout_s()
+            await asyncio.sleep(POLL_INTERVAL_S)
+            while time.monotonic() <= deadline and await run_in_threadpool(store.pending, key, timeout):
+                await asyncio.sleep(POLL_INTERVAL_S)
+    metrics.cache_result("idempotency", replayed or shared)
+    return response, replayed or shared
+
+
+def _lookup_or_run(
+    key: str,
+    fingerprint_: str,
+    strict: bool,
+    compute: Callable[[], StoredResponse],
+    deadline: Optional[float] = None,
+    wait: bool = True,
+) -> Tuple[StoredResponse, bool]:
+    stored = get_store().get(key)
+    if stored is not None and _check(stored, fingerprint_, strict):
+        return stored, True
+    return _run(key, fingerprint_, strict, compute, deadline, wait)
@@ -0,0 +1,145 @@
+"""Text-line extraction backends for heuristic PDF ingest.
+
+Each backend turns PDF pages into ``TextLine`` objects (top-left page space,
+one entry per visual line or table cell) and trades speed for layout
+fidelity differently:
+
+* ``pymupdf-words`` groups PyMuPDF words into lines; fastest, and the default.
+* ``pymupdf-tables`` reads PyMuPDF's ``dict`` lines and replaces ruled tables
+  found by ``page.find_tables()`` with one line per cell, so instrument tables
+  keep their columns; slower.
+* ``pdfminer`` uses pdfminer.six's layout analysis; pure Python and slowest,
+  but reads some legacy encodings PyMuPDF garbles.
+
+Backends built on PyMuPDF expose ``page_lines(page, page_index)`` so pages
+can be read lazily and fanned out across processes; the others yield one
+page of lines at a time from ``iter_pages(source)``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import io
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .line_store import LineStore, TextLine
+
+
+__all__ = ["BACKENDS", "DEFAULT_BACKEND", "ExtractionBackend", "get_backend", "group_words", "reading_order"]
+
+
+PdfSource = Union[bytes, str, os.PathLike]
+
+DEFAULT_BACKEND = "pymupdf-words"
+
+
+@dataclass(frozen=True)
+class ExtractionBackend:
+    name: str
+    description: str
+    page_lines: Optional[Callable[[Any, int], List[TextLine]]] = None
+    iter_pages: Optional[Callable[[PdfSource], Iterator[List[TextLine]]]] = None
+
+
+def group_words(words: Sequence[Tuple], page_index: int) -> List[TextLine]:
+    """Join PyMuPDF ``(x0, y0, x1, y1, word, block, line, word_no)`` tuples into lines."""
+
+    return LineStore.from_words(words, page_index).text_lines()
+
+
+def reading_order(lines: Sequence[TextLine]) -> List[TextLine]:
+    """Order one page's lines row by row, left to right within each row.
+
+    Section detection walks lines in order, so backends whose native order is
+    column-major (pdfminer text boxes, table cells) are normalised with this.
+    """
+
+    if not lines:
+        return []
+    store = LineStore.from_lines(lines)
+    return [lines[idx] for row in store.cluster_rows() for idx in row.tolist()]
+
+
+def _pymupdf_words(page, page_index: int) -> List[TextLine]:
+    return group_words(page.get_text("words"), page_index)
+
+
+def _centre_inside(bbox: Sequence[float], rects: Sequence[Sequence[float]]) -> bool:
+    x = (bbox[0] + bbox[2]) / 2
+    y = (bbox[1] + bbox[3]) / 2
+    return any(rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3] for rect in rects)
+
+
+def _pymupdf_tables(page, page_index: int) -> List[TextLine]:
+    lines: List[TextLine] = []
+    table_rects: List[Tuple[float, float, float, float]] = []
+    for table in page.find_tables().tables:
+        table_rects.append(tuple(table.bbox))  # type: ignore[arg-type]
+        for row, texts in zip(table.rows, table.extract()):
+            for cell, text in zip(row.cells, texts):
+                text = " ".join((text or "").split())
+                if cell is None or not text:
+                    continue
+                lines.append(TextLine(text=text, upper=text.upper(), page=page_index, bbox=tuple(cell)))  # type: ignore[arg-type]
+
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if not text or _centre_inside(line["bbox"], table_rects):
+                continue
+            lines.append(TextLine(text=text, upper=text.upper(), page=page_index, bbox=tuple(line["bbox"])))
+    return reading_order(lines) if table_rects else lines
+
+
+def _import_pdfminer():
+    try:
+        from pdfminer.high_level import extract_pages  # type: ignore
+        from pdfminer.layout import LTTextContainer, LTTextLine  # type: ignore
+    except ImportError as exc:  # pragma: no cover - dependency guard
+        raise RuntimeError("pdfminer.six is required for the pdfminer ingest backend.") from exc
+    return extract_pages, LTTextContainer, LTTextLine
+
+
+def _pdfminer_pages(source: PdfSource) -> Iterator[List[TextLine]]:
+    extract_pages, LTTextContainer, LTTextLine = _import_pdfminer()
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else os.fspath(source)
+    for page_index, layout in enumerate(extract_pages(stream)):
+        lines: List[TextLine] = []
+        for element in layout:
+            if not isinstance(element, LTTextContainer):
+                continue
+            for line in element:
+                if not isinstance(line, LTTextLine):
+                    continue
+                text = line.get_text().strip()
+                if not text:
+                    continue
+                # pdfminer measures from the bottom of the page.
+                x0, y0, x1, y1 = line.bbox
+                bbox = (float(x0), float(layout.height - y1), float(x1), float(layout.height - y0))
+                lines.append(TextLine(text=text, upper=text.upper(), page=page_index, bbox=bbox))
+        yield reading_order(lines)
+
+
+BACKENDS: Dict[str, ExtractionBackend] = {
+    backend.name: backend
+    for backend in (
+        ExtractionBackend("pymupdf-words", "PyMuPDF words grouped into lines (fastest).", page_lines=_pymupdf_words),
+        ExtractionBackend(
+            "pymupdf-tables",
+            "PyMuPDF dict lines with ruled tables split into cells via find_tables.",
+            page_lines=_pymupdf_tables,
+        ),
+        ExtractionBackend("pdfminer", "pdfminer.six layout analysis (pure Python, slowest).", iter_pages=_pdfminer_pages),
+    )
+}
+
+
+def get_backend(name: str) -> ExtractionBackend:
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown ingest backend {name!r}; expected one of {sorted(BACKENDS)}.")
+    return backend
@@ -0,0 +1,130 @@
+"""Cache of PDF ingest results keyed by the SHA-256 of the uploaded bytes.
+
+The same legacy PDFs are ingested again and again; an entry maps
+``sha256(pdf) + INGEST_ENGINE_VERSION + mode + template + backend`` to the candidates
+and confidence produced the first time. Entries live in an in-process LRU
+and, when ``PDF_INGEST_CACHE_DIR`` is set, on disk under that directory, so
+they survive restarts and are shared by pool workers. The disk tier is opt-in
+because it is never pruned; give it a volume sized for the archive.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import os
+from typing import Dict, List, Optional
+
+from app.utils import metrics
+from app.utils.cache import JsonDiskCache, LRUCache
+from app.utils.hashing import sha256_file, sha256_hex
+
+from . import pdf_ingest
+
+
+__all__ = ["IngestOutcome", "cache_key", "ingest", "lookup", "reset_cache"]
+
+
+CACHE_DIR_ENV_VARIABLE = "PDF_INGEST_CACHE_DIR"
+CACHE_SIZE_ENV_VARIABLE = "PDF_INGEST_CACHE_SIZE"
+
+_MEMORY_CACHE: LRUCache[str, Dict[str, object]] = LRUCache(maxsize=int(os.getenv(CACHE_SIZE_ENV_VARIABLE, "1024")))
+
+
+@dataclass(slots=True)
+class IngestOutcome:
+    xml_candidates: List[str]
+    confidence: float
+    sha256: str
+    cached: bool = False
+
+    def asdict(self) -> Dict[str, object]:
+        return {
+            "xml_candidates": self.xml_candidates,
+            "confidence": self.confidence,
+            "sha256": self.sha256,
+            "cached": self.cached,
+        }
+
+
+def reset_cache() -> None:
+    _MEMORY_CACHE.clear()
+
+
+def _disk_cache() -> Optional[JsonDiskCache]:
+    directory = os.getenv(CACHE_DIR_ENV_VARIABLE)
+    return JsonDiskCache(directory) if directory else None
+
+
+def cache_key(
+    pdf_sha256: str,
+    mode: str = "auto",
+    template_id: str = pdf_ingest.DEFAULT_TEMPLATE_ID,
+    backend: str = pdf_ingest.DEFAULT_BACKEND,
+) -> str:
+    material = f"{pdf_sha256}:{pdf_ingest.INGEST_ENGINE_VERSION}:{mode}:{template_id}:{backend}"
+    return sha256_hex(material.encode("utf-8"))
+
+
+def lookup(
+    pdf_sha256: str,
+    mode: str = "auto",
+    template_id: str = pdf_ingest.DEFAULT_TEMPLATE_ID,
+    backend: str = pdf_ingest.DEFAULT_BACKEND,
+) -> Optional[IngestOutcome]:
+    """Return the cached outcome for a PDF hash, or ``None``."""
+
+    key = cache_key(pdf_sha256, mode, template_id, backend)
+    entry = _MEMORY_CACHE.get(key)
+    if entry is None:
+        disk = _disk_cache()
+        entry = disk.get(key) if disk is not None else None
+        if entry is None:
+            return None
+        _MEMORY_CACHE.put(key, entry)
+    metrics.cache_result("ingest", True)
+    return IngestOutcome(
+        xml_candidates=list(entry["xml_candidates"]),  # type: ignore[arg-type]
+        confidence=float(entry["confidence"]),  # type: ignore[arg-type]
+        sha256=pdf_sha256,
+        cached=True,
+    )
+
+
+def ingest(
+    source: pdf_ingest.PdfSource,
+    pdf_sha256: Optional[str] = None,
+    mode: str = "auto",
+    template_id: str = pdf_ingest.DEFAULT_TEMPLATE_ID,
+    backend: str = pdf_ingest.DEFAULT_BACKEND,
+) -> IngestOutcome:
+    """Ingest a PDF (bytes or a file path) through the cache.
+
+    ``pdf_sha256`` lets callers that hashed the bytes while receiving them
+    skip a second pass. Only successful extractions are stored: an empty
+    result may come from a missing optional tool (e.g. tesseract) rather than
+    from the document itself.
+    """
+
+    if pdf_sha256:
+        digest = pdf_sha256
+    elif isinstance(source, (bytes, bytearray)):
+        digest = sha256_hex(bytes(source))
+    else:
+        digest = sha256_file(os.fspath(source))
+    cached = lookup(digest, mode, template_id, backend)
+    if cached is not None:
+        return cached
+
+    # Misses are counted here rather than in ``lookup``, which callers also use as a cheap pre-check.
+    metrics.cache_result("ingest", False)
+    candidates, confidence = pdf_ingest.pdf_to_xml_candidates(
+        source, mode=mode, template_id=template_id, backend=backend
+    )
+    if candidates:
+        entry: Dict[str, object] = {"xml_candidates": candidates, "confidence": confidence}
+        key = cache_key(digest, mode, template_id, backend)
+        _MEMORY_CACHE.put(key, entry)
+        disk = _disk_cache()
+        if disk is not None:
+            disk.put(key, entry)
+    return IngestOutcome(xml_candidates=candidates, confidence=confidence, sha256=digest)
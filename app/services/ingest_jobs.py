@@ -0,0 +1,621 @@
+"""Asynchronous batch ingest jobs backed by a local SQLite job store.
+
+A job ingests every PDF in an uploaded ZIP or in a server-side directory.
+Submitting only records the job; a single background runner works through
+queued jobs one at a time, fanning each one's files out to the batch ingest
+process pool (capped at the scheduler's bulk slots), and writes per-file results back to
+SQLite in small batches. Because every file's status is persisted, a job
+interrupted by a restart resumes with the files still ``pending`` (and, with
+the ingest cache's disk tier enabled, byte-identical files already ingested
+are answered from it).
+
+Every uvicorn worker runs its own runner against the shared store, so a job
+is claimed with a single conditional UPDATE before it runs and carries its
+owner and a heartbeat while it does. A job whose heartbeat is older than
+``PDF_INGEST_JOB_STALE_S`` lost its owner and is picked up again by the next
+idle runner.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import uuid
+import zipfile
+
+from . import batch_ingest, scheduler
+
+
+__all__ = [
+    "IngestJob",
+    "JobStore",
+    "allowed_directory",
+    "enqueue",
+    "get_store",
+    "is_claimed",
+    "new_job_id",
+    "reset_store",
+    "resume_jobs",
+    "run_job",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+JOB_DIR_ENV_VARIABLE = "PDF_INGEST_JOB_DIR"
+DEFAULT_JOB_DIR = "var/ingest_jobs"
+JOB_DB_ENV_VARIABLE = "PDF_INGEST_JOB_DB"
+JOB_WORKERS_ENV_VARIABLE = "PDF_INGEST_JOB_WORKERS"
+# Server-side directories may only be submitted from under these roots (os.pathsep separated).
+JOB_SOURCE_ROOTS_ENV_VARIABLE = "PDF_INGEST_JOB_SOURCE_ROOTS"
+# A running job whose heartbeat is older than this is treated as orphaned and may be claimed again.
+JOB_STALE_ENV_VARIABLE = "PDF_INGEST_JOB_STALE_S"
+DEFAULT_JOB_STALE_S = 60.0
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+FINISHED_STATUSES = ("completed", "failed")
+FILE_STATUSES = ("pending", "extracted", "failed", "duplicate")
+SOURCE_KINDS = ("zip", "directory")
+ZIP_SOURCE_NAME = "source.zip"
+
+# Results are written in batches so 100k-file jobs do not commit once per file.
+RESULT_FLUSH_SIZE = 64
+RESULT_FLUSH_INTERVAL_S = 1.0
+ENUMERATE_CHUNK_SIZE = 1000
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source_kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    total INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT,
+    heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    sha256 TEXT,
+    confidence REAL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    duplicate_of TEXT,
+    error TEXT,
+    elapsed_ms REAL,
+    xml_candidates TEXT,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS job_files_by_status ON job_files (job_id, status);
+"""
+
+
+@dataclass(slots=True)
+class IngestJob:
+    id: str
+    status: str
+    source_kind: str
+    source: str
+    mode: str
+    backend: str
+    total: Optional[int]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+    counts: Dict[str, int] = field(default_factory=dict)
+    cached: int = 0
+    owner: Optional[str] = None
+    heartbeat: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def asdict(self) -> Dict[str, object]:
+        processed = sum(count for status, count in self.counts.items() if status != "pending")
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "source_kind": self.source_kind,
+            "mode": self.mode,
+            "backend": self.backend,
+            "total": self.total,
+            "processed": processed,
+            "pending": self.counts.get("pending", 0),
+            "extracted": self.counts.get("extracted", 0),
+            "failed": self.counts.get("failed", 0),
+            "duplicates": self.counts.get("duplicate", 0),
+            "cached": self.cached,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobStore:
+    """SQLite persistence for jobs and their per-file results.
+
+    One connection is shared by the request handlers and the runner thread,
+    serialised by a lock; WAL mode lets progress reads proceed while results
+    are being written.
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            # Stores created before jobs were claimed across workers lack the ownership columns.
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if "heartbeat" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def create_job(self, job_id: str, source_kind: str, source: str, mode: str, backend: str) -> IngestJob:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, source_kind, source, mode, backend, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, source_kind, source, mode, backend, now, now),
+            )
+        job = self.get_job(job_id)
+        assert job is not None
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            counts = {
+                status: count
+                for status, count in self._conn.execute(
+                    "SELECT status, COUNT(*) FROM job_files WHERE job_id = ? GROUP BY status", (job_id,)
+                )
+            }
+            cached = self._conn.execute(
+                "SELECT COALESCE(SUM(cached), 0) FROM job_files WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+        return IngestJob(
+            id=row["id"],
+            status=row["status"],
+            source_kind=row["source_kind"],
+            source=row["source"],
+            mode=row["mode"],
+            backend=row["backend"],
+            total=row["total"],
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            counts=counts,
+            cached=int(cached),
+            owner=row["owner"],
+            heartbeat=row["heartbeat"],
+        )
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def claim_job(self, job_id: str, owner: str, stale_s: float) -> bool:
+        """Mark the job ``running`` under ``owner`` unless a live owner holds it; ``True`` if claimed.
+
+        Queued and failed jobs can be claimed, and so can running jobs whose
+        heartbeat is older than ``stale_s``. The check and the update are one
+        statement, so concurrent workers cannot both claim a job.
+        """
+
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', error = NULL, owner = ?, heartbeat = ?, updated_at = ?"
+                " WHERE id = ? AND (status IN ('queued', 'failed')"
+                " OR (status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)))",
+                (owner, now, now, job_id, now - stale_s),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Refresh the heartbeat of a job ``owner`` runs; ``False`` if it no longer owns the job."""
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                (time.time(), job_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def finish_job(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> None:
+        """Record the outcome of a run and release the claim, unless another worker has taken the job over."""
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, owner = NULL, heartbeat = NULL, updated_at = ?"
+                " WHERE id = ? AND owner = ?",
+                (status, error, time.time(), job_id, owner),
+            )
+
+    def add_files(self, job_id: str, files: Iterable[Tuple[str, str]]) -> int:
+        """Record ``(name, path)`` pairs in order and set the job total.
+
+        Sequence numbers follow the iteration order, so enumerating the same
+        source again after a restart re-inserts nothing.
+        """
+
+        total = 0
+        chunk: List[Tuple[str, int, str, str]] = []
+        for seq, (name, path) in enumerate(files):
+            chunk.append((job_id, seq, name, path))
+            total = seq + 1
+            if len(chunk) >= ENUMERATE_CHUNK_SIZE:
+                self._insert_files(chunk)
+                chunk = []
+        self._insert_files(chunk)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET total = ?, updated_at = ? WHERE id = ?", (total, time.time(), job_id))
+        return total
+
+    def _insert_files(self, rows: Sequence[Tuple[str, int, str, str]]) -> None:
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO job_files (job_id, seq, name, path) VALUES (?, ?, ?, ?)", rows)
+
+    def pending_files(self, job_id: str) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            return [
+                (row["seq"], row["name"], row["path"])
+                for row in self._conn.execute(
+                    "SELECT seq, name, path FROM job_files WHERE job_id = ? AND status = 'pending' ORDER BY seq",
+                    (job_id,),
+                )
+            ]
+
+    def ingested_digests(self, job_id: str) -> Dict[str, str]:
+        """SHA-256 -> name of the first finished file with that content, so a resumed run keeps flagging copies."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sha256, name FROM job_files WHERE job_id = ? AND status IN ('extracted', 'failed')"
+                " AND sha256 IS NOT NULL ORDER BY seq",
+                (job_id,),
+            ).fetchall()
+        digests: Dict[str, str] = {}
+        for row in rows:
+            digests.setdefault(row["sha256"], row["name"])
+        return digests
+
+    def record_results(self, job_id: str, results: Sequence[Tuple[int, batch_ingest.IngestResult, Optional[str]]]) -> None:
+        """Store ``(seq, result, duplicate_of_name)`` rows and touch the job."""
+
+        rows = []
+        for seq, result, duplicate_of in results:
+            if result.duplicate_of is not None:
+                status = "duplicate"
+            else:
+                status = "extracted" if result.ok else "failed"
+            rows.append(
+                (
+                    status,
+                    result.sha256,
+                    result.confidence,
+                    int(result.cached),
+                    duplicate_of,
+                    result.error,
+                    result.elapsed_ms,
+                    json.dumps(result.xml_candidates) if result.xml_candidates else None,
+                    job_id,
+                    seq,
+                )
+            )
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE job_files SET status = ?, sha256 = ?, confidence = ?, cached = ?, duplicate_of = ?,"
+                " error = ?, elapsed_ms = ?, xml_candidates = ? WHERE job_id = ? AND seq = ?",
+                rows,
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def files(
+        self, job_id: str, status: Optional[str] = None, offset: int = 0, limit: int = 100
+    ) -> List[Dict[str, object]]:
+        query = "SELECT * FROM job_files WHERE job_id = ?"
+        params: List[object] = [job_id]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY seq LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "seq": row["seq"],
+                "name": row["name"],
+                "status": row["status"],
+                "sha256": row["sha256"],
+                "confidence": row["confidence"],
+                "cached": bool(row["cached"]),
+                "duplicate_of": row["duplicate_of"],
+                "error": row["error"],
+                "elapsed_ms": row["elapsed_ms"],
+                "xml_candidates": json.loads(row["xml_candidates"]) if row["xml_candidates"] else [],
+            }
+            for row in rows
+        ]
+
+    def claimable_jobs(self, stale_s: float) -> List[str]:
+        """Queued jobs and running jobs whose owner stopped sending heartbeats, oldest first."""
+
+        with self._lock:
+            return [
+                row["id"]
+                for row in self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued'"
+                    " OR (status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)) ORDER BY created_at",
+                    (time.time() - stale_s,),
+                )
+            ]
+
+    def unfinished_jobs(self) -> List[str]:
+        with self._lock:
+            return [
+                row["id"]
+                for row in self._conn.execute(
+                    "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+                )
+            ]
+
+
+def job_dir() -> Path:
+    return Path(os.getenv(JOB_DIR_ENV_VARIABLE, DEFAULT_JOB_DIR))
+
+
+_STORE: Optional[JobStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> JobStore:
+    global _STORE
+    with _STORE_LOCK:
+        path = os.getenv(JOB_DB_ENV_VARIABLE) or str(job_dir() / "jobs.sqlite3")
+        if _STORE is None or _STORE.path != path:
+            _STORE = JobStore(path)
+        return _STORE
+
+
+def reset_store() -> None:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is not None:
+            _STORE.close()
+        _STORE = None
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def allowed_directory(directory: str) -> bool:
+    """Whether ``directory`` lies under one of ``PDF_INGEST_JOB_SOURCE_ROOTS`` (none are allowed by default)."""
+
+    roots = [root for root in os.getenv(JOB_SOURCE_ROOTS_ENV_VARIABLE, "").split(os.pathsep) if root]
+    resolved = Path(directory).resolve()
+    return any(resolved == Path(root).resolve() or Path(root).resolve() in resolved.parents for root in roots)
+
+
+def _workers() -> int:
+    # Jobs are bulk work: their pool never outgrows the scheduler's bulk lane.
+    configured = os.getenv(JOB_WORKERS_ENV_VARIABLE)
+    return scheduler.bulk_workers(max(0, int(configured)) if configured else None)
+
+
+def _stale_s() -> float:
+    return float(os.getenv(JOB_STALE_ENV_VARIABLE, DEFAULT_JOB_STALE_S))
+
+
+def _owner_id() -> str:
+    # Evaluated per call: a forked worker must not inherit its parent's identity.
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_claimed(job: IngestJob) -> bool:
+    """Whether a live worker (in any process) is running the job right now."""
+
+    return job.status == "running" and job.heartbeat is not None and job.heartbeat >= time.time() - _stale_s()
+
+
+def _keep_alive(store: JobStore, job_id: str, owner: str, stop: threading.Event) -> None:
+    while not stop.wait(max(1.0, _stale_s() / 4)):
+        if not store.heartbeat(job_id, owner):
+            LOGGER.warning("Ingest job %s was taken over by another worker.", job_id)
+            return
+
+
+def _zip_members(archive_path: Path, target: Path) -> Iterator[Tuple[str, str]]:
+    """Extract the PDFs in an archive under sequence-numbered names, yielding ``(member, path)``.
+
+    Members are never written under their own names, so archive paths such
+    as ``../x.pdf`` cannot escape the job directory. Files already extracted
+    by an interrupted run are kept.
+    """
+
+    target.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(batch_ingest.PDF_SUFFIXES)
+        ]
+        for seq, info in enumerate(members):
+            path = target / f"{seq:06d}.pdf"
+            if not (path.exists() and path.stat().st_size == info.file_size):
+                with archive.open(info) as source, open(path, "wb") as sink:
+                    shutil.copyfileobj(source, sink, length=1 << 20)
+            yield info.filename, str(path)
+
+
+def _directory_files(directory: str) -> Iterator[Tuple[str, str]]:
+    root = Path(directory)
+    for path in batch_ingest.iter_pdf_paths(directory):
+        yield os.path.relpath(path, root), path
+
+
+def _enumerate_files(job: IngestJob) -> Iterator[Tuple[str, str]]:
+    if job.source_kind == "zip":
+        return _zip_members(Path(job.source), Path(job.source).parent / "files")
+    return _directory_files(job.source)
+
+
+def run_job(job_id: str, store: Optional[JobStore] = None, workers: Optional[int] = None) -> Optional[IngestJob]:
+    """Run (or resume) a job to completion in the calling thread.
+
+    Returns ``None`` for an unknown job. A job that a live worker already runs
+    is returned as it stands, without running it a second time.
+    """
+
+    store = store or get_store()
+    job = store.get_job(job_id)
+    if job is None:
+        return None
+    owner = _owner_id()
+    if not store.claim_job(job_id, owner, _stale_s()):
+        LOGGER.info("Ingest job %s is %s elsewhere; not running it here.", job_id, job.status)
+        return store.get_job(job_id)
+    stop = threading.Event()
+    threading.Thread(
+        target=_keep_alive, args=(store, job_id, owner, stop), name=f"ingest-job-{job_id[:8]}", daemon=True
+    ).start()
+    try:
+        if job.total is None:
+            store.add_files(job_id, _enumerate_files(job))
+        pending = {path: (seq, name) for seq, name, path in store.pending_files(job_id)}
+        results = batch_ingest.ingest_batch(
+            list(pending),
+            workers=_workers() if workers is None else workers,
+            mode=job.mode,
+            skip_duplicates=True,
+            backend=job.backend,
+            # Copies of files finished before a restart are duplicates too, as in an uninterrupted run.
+            known=store.ingested_digests(job_id),
+        )
+        buffered: List[Tuple[int, batch_ingest.IngestResult, Optional[str]]] = []
+        flushed_at = time.monotonic()
+        for result in results:
+            seq, _ = pending[result.source]
+            duplicate_of = pending[result.duplicate_of][1] if result.duplicate_of in pending else result.duplicate_of
+            buffered.append((seq, result, duplicate_of))
+            if len(buffered) >= RESULT_FLUSH_SIZE or time.monotonic() - flushed_at >= RESULT_FLUSH_INTERVAL_S:
+                store.record_results(job_id, buffered)
+                buffered, flushed_at = [], time.monotonic()
+        store.record_results(job_id, buffered)
+    except Exception as exc:
+        LOGGER.exception("Ingest job %s failed", job_id)
+        store.finish_job(job_id, owner, "failed", str(exc))
+    else:
+        store.finish_job(job_id, owner, "completed")
+    finally:
+        stop.set()
+    return store.get_job(job_id)
+
+
+class _JobRunner:
+    """Background thread that runs queued jobs one at a time, in submission order.
+
+    Each job already spreads its files over the bulk lane's share of the
+    cores, so running jobs side by side would only oversubscribe the machine. While idle it checks the
+    store for jobs left queued or orphaned by other workers.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._queued: set = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._queued:
+                return False
+            self._queued.add(job_id)
+            self._queue.put(job_id)
+            self._start()
+        return True
+
+    def start(self) -> None:
+        with self._lock:
+            self._start()
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="ingest-jobs", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                job_id = self._queue.get(timeout=_stale_s())
+            except queue.Empty:
+                for job_id in get_store().claimable_jobs(_stale_s()):
+                    self.submit(job_id)
+                continue
+            try:
+                run_job(job_id)
+            finally:
+                with self._lock:
+                    self._queued.discard(job_id)
+
+
+_RUNNER = _JobRunner()
+
+
+def enqueue(job_id: str) -> bool:
+    """Queue a job for the background runner; returns ``False`` if it is already queued or running."""
+
+    return _RUNNER.submit(job_id)
+
+
+def resume_jobs() -> List[str]:
+    """Re-queue jobs left ``queued`` or ``running`` by a previous process and start the runner.
+
+    Jobs a live worker is running are skipped when their turn comes (see ``run_job``).
+    """
+
+    _RUNNER.start()
+    resumed = [job_id for job_id in get_store().unfinished_jobs() if enqueue(job_id)]
+    if resumed:
+        LOGGER.info("Resuming %d interrupted ingest job(s).", len(resumed))
+    return resumed
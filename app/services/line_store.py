@@ -0,0 +1,188 @@
+"""Columnar store of extracted PDF text lines for geometric queries.
+
+Line boxes and page indices live in NumPy arrays next to a plain list of
+texts, so layout questions (which lines sit in this y-band, which fall in
+that column, how do table cells group into rows and columns) are answered
+with vectorised comparisons instead of per-line Python loops. Boxes use the
+top-left page space PyMuPDF reports.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+__all__ = ["LineStore", "TextLine"]
+
+
+Rect = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class TextLine:
+    text: str
+    upper: str
+    page: int
+    bbox: Rect
+
+
+@dataclass(eq=False)
+class LineStore:
+    texts: List[str]
+    uppers: List[str]
+    pages: np.ndarray
+    bboxes: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "LineStore":
+        return cls(texts=[], uppers=[], pages=np.empty(0, dtype=np.int64), bboxes=np.empty((0, 4), dtype=np.float64))
+
+    @classmethod
+    def from_lines(cls, lines: Sequence[TextLine]) -> "LineStore":
+        if not lines:
+            return cls.empty()
+        return cls(
+            texts=[line.text for line in lines],
+            uppers=[line.upper for line in lines],
+            pages=np.fromiter((line.page for line in lines), dtype=np.int64, count=len(lines)),
+            bboxes=np.array([line.bbox for line in lines], dtype=np.float64).reshape(-1, 4),
+        )
+
+    @classmethod
+    def from_words(cls, words: Sequence[Tuple], page_index: int) -> "LineStore":
+        """Group PyMuPDF ``(x0, y0, x1, y1, word, block, line, word_no)`` tuples into lines.
+
+        Lines come out in ``(block, line)`` order with their words in ``word_no``
+        order; each line box is the union of its word boxes.
+        """
+
+        if not words:
+            return cls.empty()
+        coords = np.array([word[:4] for word in words], dtype=np.float64)
+        keys = np.array([word[5:8] for word in words], dtype=np.int64)
+        order = np.lexsort((coords[:, 0], keys[:, 2], keys[:, 1], keys[:, 0]))
+        coords, keys = coords[order], keys[order]
+        changed = np.any(keys[1:, :2] != keys[:-1, :2], axis=1)
+        starts = np.flatnonzero(np.concatenate(([True], changed)))
+        ends = np.append(starts[1:], len(order))
+        bboxes = np.column_stack(
+            (
+                np.minimum.reduceat(coords[:, 0], starts),
+                np.minimum.reduceat(coords[:, 1], starts),
+                np.maximum.reduceat(coords[:, 2], starts),
+                np.maximum.reduceat(coords[:, 3], starts),
+            )
+        )
+        texts = [" ".join(words[i][4] for i in order[start:end]).strip() for start, end in zip(starts, ends)]
+        keep = np.fromiter((bool(text) for text in texts), dtype=bool, count=len(texts))
+        texts = [text for text in texts if text]
+        return cls(
+            texts=texts,
+            uppers=[text.upper() for text in texts],
+            pages=np.full(len(texts), page_index, dtype=np.int64),
+            bboxes=bboxes[keep],
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def text_lines(self, indices: Optional[np.ndarray] = None) -> List[TextLine]:
+        """Return the selected lines as ``TextLine`` objects holding plain Python numbers."""
+
+        selected = self._select(indices).tolist()
+        return [
+            TextLine(text=self.texts[idx], upper=self.uppers[idx], page=page, bbox=tuple(bbox))  # type: ignore[arg-type]
+            for idx, page, bbox in zip(selected, self.pages[selected].tolist(), self.bboxes[selected].tolist())
+        ]
+
+    def _select(self, indices: Optional[np.ndarray]) -> np.ndarray:
+        return np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+
+    @property
+    def x_mid(self) -> np.ndarray:
+        return (self.bboxes[:, 0] + self.bboxes[:, 2]) / 2
+
+    @property
+    def y_mid(self) -> np.ndarray:
+        return (self.bboxes[:, 1] + self.bboxes[:, 3]) / 2
+
+    @property
+    def heights(self) -> np.ndarray:
+        return self.bboxes[:, 3] - self.bboxes[:, 1]
+
+    def degenerate(self, indices: Optional[np.ndarray] = None) -> bool:
+        """Whether no selected line has a real box (e.g. lines built without geometry)."""
+
+        boxes = self.bboxes[self._select(indices)]
+        return not bool(np.any((boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])))
+
+    def line_height(self, indices: Optional[np.ndarray] = None) -> float:
+        heights = self.heights[self._select(indices)]
+        heights = heights[heights > 0]
+        return float(np.median(heights)) if heights.size else 0.0
+
+    def in_y_band(
+        self, top: float, bottom: float, page: Optional[int] = None, indices: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Indices of lines whose vertical centre lies in ``[top, bottom)``, optionally on one page."""
+
+        selected = self._select(indices)
+        mid = self.y_mid[selected]
+        mask = (mid >= top) & (mid < bottom)
+        if page is not None:
+            mask &= self.pages[selected] == page
+        return selected[mask]
+
+    def in_x_range(self, left: float, right: float, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """Indices of lines whose horizontal centre lies in ``[left, right)``."""
+
+        selected = self._select(indices)
+        mid = self.x_mid[selected]
+        return selected[(mid >= left) & (mid < right)]
+
+    def cluster_rows(self, indices: Optional[np.ndarray] = None, tolerance: Optional[float] = None) -> List[np.ndarray]:
+        """Group lines into visual rows, top to bottom and page by page.
+
+        Lines whose vertical centres are within ``tolerance`` (default half the
+        median line height) of the previous line join its row. Each row lists
+        its lines left to right.
+        """
+
+        selected = self._select(indices)
+        if selected.size == 0:
+            return []
+        if tolerance is None:
+            tolerance = max(self.line_height(selected) / 2, 1.0)
+        mid = self.y_mid[selected]
+        pages = self.pages[selected]
+        order = np.lexsort((mid, pages))
+        selected, mid, pages = selected[order], mid[order], pages[order]
+        breaks = np.flatnonzero((np.diff(mid) > tolerance) | (np.diff(pages) != 0)) + 1
+        rows = np.split(selected, breaks)
+        return [row[np.argsort(self.bboxes[row, 0], kind="stable")] for row in rows]
+
+    def cluster_columns(self, indices: Optional[np.ndarray] = None, gap: Optional[float] = None) -> np.ndarray:
+        """Return the sorted left edges of the columns the selected lines are aligned to.
+
+        Left edges closer than ``gap`` (default the median line height) belong to
+        the same column; each column starts at its leftmost line.
+        """
+
+        selected = self._select(indices)
+        if selected.size == 0:
+            return np.empty(0, dtype=np.float64)
+        if gap is None:
+            gap = max(self.line_height(selected), 1.0)
+        lefts = np.sort(self.bboxes[selected, 0])
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(lefts) > gap) + 1))
+        return lefts[starts]
+
+    def column_of(self, indices: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """Column number of each selected line, given left edges from ``cluster_columns``."""
+
+        lefts = self.bboxes[np.asarray(indices, dtype=np.int64), 0]
+        # A little slack absorbs sub-point jitter in where a column's text starts.
+        return np.maximum(np.searchsorted(edges, lefts + 1.0, side="right") - 1, 0)
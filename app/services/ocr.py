@@ -0,0 +1,193 @@
+"""Tesseract OCR for PDF pages that have no text layer.
+
+Pages are rasterised with PyMuPDF in the calling thread (documents are not
+thread-safe), hashed, and looked up in the OCR cache. Only unseen page images
+are sent to the ``tesseract`` CLI, on a thread pool: the work happens in the
+child processes, so threads are enough to keep every core busy. Results are
+returned as ``(text, bbox)`` lines in PDF points, ready to become
+``pdf_ingest.TextLine`` objects.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import hashlib
+import io
+import logging
+import os
+import shutil
+import subprocess
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.utils import pool
+from app.utils.cache import JsonDiskCache, LRUCache
+
+
+__all__ = ["OcrLine", "available", "ocr_pages", "parse_tsv", "reset_cache"]
+
+LOGGER = logging.getLogger(__name__)
+
+OCR_ENABLED_ENV_VARIABLE = "PDF_INGEST_OCR"
+OCR_WORKERS_ENV_VARIABLE = "PDF_INGEST_OCR_WORKERS"
+OCR_DPI_ENV_VARIABLE = "PDF_INGEST_OCR_DPI"
+OCR_LANG_ENV_VARIABLE = "PDF_INGEST_OCR_LANG"
+OCR_CACHE_DIR_ENV_VARIABLE = "PDF_INGEST_OCR_CACHE_DIR"
+TESSERACT_CMD_ENV_VARIABLE = "TESSERACT_CMD"
+
+DEFAULT_DPI = 300
+DEFAULT_LANG = "eng"
+TESSERACT_TIMEOUT_S = 120
+# Bump when the TSV-to-line conversion changes so cached pages are re-read.
+OCR_ENGINE_VERSION = "1"
+
+OcrLine = Tuple[str, Tuple[float, float, float, float]]
+
+_MEMORY_CACHE: LRUCache[str, List[OcrLine]] = LRUCache(maxsize=1024)
+
+
+def reset_cache() -> None:
+    _MEMORY_CACHE.clear()
+
+
+def _tesseract_cmd() -> Optional[str]:
+    return shutil.which(os.getenv(TESSERACT_CMD_ENV_VARIABLE, "tesseract"))
+
+
+def available() -> bool:
+    """Return whether OCR is enabled and the tesseract binary can be found."""
+
+    if os.getenv(OCR_ENABLED_ENV_VARIABLE, "1").strip().lower() in ("0", "false", "no", "off"):
+        return False
+    return _tesseract_cmd() is not None
+
+
+def _dpi() -> int:
+    return int(os.getenv(OCR_DPI_ENV_VARIABLE, DEFAULT_DPI))
+
+
+def _lang() -> str:
+    return os.getenv(OCR_LANG_ENV_VARIABLE, DEFAULT_LANG)
+
+
+def _workers() -> int:
+    configured = os.getenv(OCR_WORKERS_ENV_VARIABLE)
+    if configured:
+        return max(1, int(configured))
+    # Batch pool workers already fill every core; one tesseract each keeps the process count at the pool size.
+    if pool.in_worker():
+        return 1
+    return max(1, os.cpu_count() or 1)
+
+
+def _disk_cache() -> Optional[JsonDiskCache]:
+    directory = os.getenv(OCR_CACHE_DIR_ENV_VARIABLE)
+    return JsonDiskCache(directory) if directory else None
+
+
+def parse_tsv(tsv: str, scale: float) -> List[OcrLine]:
+    """Group tesseract TSV word rows into lines, scaling pixel boxes by ``scale``."""
+
+    grouped: Dict[Tuple[str, str, str], Dict[str, object]] = {}
+    for row in csv.DictReader(io.StringIO(tsv), delimiter="\t", quoting=csv.QUOTE_NONE):
+        text = (row.get("text") or "").strip()
+        if row.get("level") != "5" or not text:
+            continue
+        try:
+            if float(row.get("conf") or -1) < 0:
+                continue
+            left, top = float(row["left"]), float(row["top"])
+            right, bottom = left + float(row["width"]), top + float(row["height"])
+        except (KeyError, ValueError):
+            continue
+        entry = grouped.setdefault(
+            (row["block_num"], row["par_num"], row["line_num"]),
+            {"words": [], "bbox": [left, top, right, bottom]},
+        )
+        entry["words"].append(text)  # type: ignore[union-attr]
+        bbox = entry["bbox"]
+        bbox[0], bbox[1] = min(bbox[0], left), min(bbox[1], top)  # type: ignore[index]
+        bbox[2], bbox[3] = max(bbox[2], right), max(bbox[3], bottom)  # type: ignore[index]
+
+    lines: List[OcrLine] = []
+    for entry in sorted(grouped.values(), key=lambda item: (item["bbox"][1], item["bbox"][0])):  # type: ignore[index]
+        x0, y0, x1, y1 = entry["bbox"]  # type: ignore[misc]
+        lines.append((" ".join(entry["words"]), (x0 * scale, y0 * scale, x1 * scale, y1 * scale)))  # type: ignore[arg-type]
+    return lines
+
+
+def _run_tesseract(png_bytes: bytes, lang: str) -> str:
+    cmd = _tesseract_cmd()
+    if cmd is None:
+        raise RuntimeError("tesseract is required for OCR of scanned PDF pages.")
+    # Tesseract's own OpenMP threads would oversubscribe the cores the pool already fills.
+    env = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+    completed = subprocess.run(
+        [cmd, "stdin", "stdout", "-l", lang, "tsv"],
+        input=png_bytes,
+        capture_output=True,
+        timeout=TESSERACT_TIMEOUT_S,
+        env=env,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"tesseract failed: {completed.stderr.decode('utf-8', 'replace').strip()}")
+    return completed.stdout.decode("utf-8", "replace")
+
+
+def _ocr_image(png_bytes: bytes, lang: str, scale: float) -> List[OcrLine]:
+    return parse_tsv(_run_tesseract(png_bytes, lang), scale)
+
+
+def ocr_pages(doc, page_indices: Sequence[int], workers: Optional[int] = None) -> Dict[int, List[OcrLine]]:
+    """OCR the given pages of an open PyMuPDF document.
+
+    Each page image is keyed by the SHA-256 of its pixels plus the DPI,
+    language and ``OCR_ENGINE_VERSION``; cached pages skip tesseract entirely.
+    Pages that fail to OCR are logged and left out of the result.
+    """
+
+    dpi, lang = _dpi(), _lang()
+    scale = 72.0 / dpi
+    disk = _disk_cache()
+    results: Dict[int, List[OcrLine]] = {}
+    pending: Dict[str, Tuple[List[int], bytes]] = {}
+
+    for page_index in page_indices:
+        pixmap = doc[page_index].get_pixmap(dpi=dpi, colorspace="gray", alpha=False)
+        digest = hashlib.sha256(pixmap.samples)
+        digest.update(f"{pixmap.width}x{pixmap.height}:{dpi}:{lang}:{OCR_ENGINE_VERSION}".encode("utf-8"))
+        key = digest.hexdigest()
+        cached = _MEMORY_CACHE.get(key)
+        if cached is None and disk is not None:
+            stored = disk.get(key)
+            if stored is not None:
+                cached = [(text, tuple(bbox)) for text, bbox in stored]  # type: ignore[misc]
+                _MEMORY_CACHE.put(key, cached)
+        if cached is not None:
+            results[page_index] = cached
+        elif key in pending:
+            # Identical scans within one document (blank pages, repeated forms) are OCR'd once.
+            pending[key][0].append(page_index)
+        else:
+            pending[key] = ([page_index], pixmap.tobytes("png"))
+
+    if not pending:
+        return results
+
+    worker_count = min(_workers() if workers is None else workers, len(pending))
+    with ThreadPoolExecutor(max_workers=max(1, worker_count)) as pool:
+        futures = {key: pool.submit(_ocr_image, png, lang, scale) for key, (_, png) in pending.items()}
+        for key, future in futures.items():
+            indices = pending[key][0]
+            try:
+                lines = future.result()
+            except (RuntimeError, OSError, subprocess.TimeoutExpired) as exc:
+                LOGGER.warning("OCR failed for page(s) %s: %s", indices, exc)
+                continue
+            _MEMORY_CACHE.put(key, lines)
+            if disk is not None:
+                disk.put(key, [[text, list(bbox)] for text, bbox in lines])
+            for page_index in indices:
+                results[page_index] = lines
+    return results
@@ -2,26 +2,43 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
+import bisect
+from contextlib import closing
 from dataclasses import dataclass
 from datetime import datetime
 import logging
+import os
 import re
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from lxml import etree
+import numpy as np
 
+from . import ingest_backends, ocr, template_regions
 from .ascii_parser import build_document_tree
+from .ingest_backends import DEFAULT_BACKEND, PdfSource
+from .line_store import LineStore, TextLine
+from app.utils import metrics, pool
+from app.utils.hashing import sha256_hex
 
 LOGGER = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
-class TextLine:
-    text: str
-    upper: str
-    page: int
-    bbox: Tuple[float, float, float, float]
+# Bump whenever extraction output can change so cached ingest results are recomputed.
+INGEST_ENGINE_VERSION = "5"
+INGEST_MODES = ("auto", "template", "heuristic")
+DEFAULT_TEMPLATE_ID = "alberta_title_v1"
+# Creator string stamped by renderer.DEFAULT_METADATA; marks PDFs laid out from our templates.
+GENERATED_PDF_CREATOR = "Title Document Creator Pro"
+# Associated file written by renderer.render(..., options={"embed_xml": True}).
+EMBEDDED_XML_NAME = "title.xml"
 
+PAGE_WORKERS_ENV_VARIABLE = "PDF_INGEST_PAGE_WORKERS"
+# Below this page count the pool start-up costs more than it saves.
+PARALLEL_PAGE_THRESHOLD = 12
+# Pages read one at a time, hoping to stop early, before handing over to the full page-parallel scan.
+EARLY_STOP_PAGE_LIMIT = PARALLEL_PAGE_THRESHOLD
 
 DATE_PATTERNS: Sequence[str] = ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y")
 COMPANY_HINTS = (" INC", " LTD", " CORPORATION", " CORP", " COMPANY", " LIMITED", " LLP")
@@ -37,43 +54,146 @@ SECTION_HEADERS = (
 )
 
 
-def _extract_text_lines(pdf_bytes: bytes) -> List[TextLine]:
+def _import_fitz():
     try:
         import fitz  # type: ignore
     except ImportError as exc:  # pragma: no cover - dependency guard
         raise RuntimeError("PyMuPDF (fitz) is required for PDF ingest operations.") from exc
+    return fitz
 
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+
+def _open_document(source: PdfSource):
+    """Open a PDF from bytes or from a path; paths let MuPDF read pages from disk on demand."""
+
+    fitz = _import_fitz()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(os.fspath(source), filetype="pdf")
+
+
+def _page_text_lines(page, page_index: int, backend: str = DEFAULT_BACKEND) -> List[TextLine]:
+    page_lines = ingest_backends.get_backend(backend).page_lines
+    if page_lines is None:
+        raise ValueError(f"Ingest backend {backend!r} does not read PyMuPDF pages.")
+    return page_lines(page, page_index)
+
+
+def _iter_page_lines(doc, source: PdfSource, backend: str, start_page: int = 0) -> Iterator[List[TextLine]]:
+    """Yield the lines of each page from ``start_page`` on, from ``doc`` or from the backend's own parser."""
+
+    extractor = ingest_backends.get_backend(backend)
+    if extractor.page_lines is None:
+        # Parsers that only stream whole documents still have to read (and drop) the earlier pages.
+        with closing(extractor.iter_pages(source)) as pages:  # type: ignore[misc]
+            for page_index, page_lines in enumerate(pages):
+                if page_index >= start_page:
+                    yield page_lines
+        return
+    for page_index in range(start_page, doc.page_count):
+        yield _page_text_lines(doc[page_index], page_index, backend)
+
+
+# Page-parallel extraction state: each pool worker opens the document once in
+# its initializer and then serves page ranges from it.
+_WORKER_DOCUMENT = None
+_WORKER_BACKEND = DEFAULT_BACKEND
+
+
+def _init_page_worker(source: PdfSource, backend: str = DEFAULT_BACKEND) -> None:
+    global _WORKER_DOCUMENT, _WORKER_BACKEND
+    _WORKER_DOCUMENT = _open_document(source)
+    _WORKER_BACKEND = backend
+
+
+def _extract_page_range(page_range: Tuple[int, int]) -> List[TextLine]:
+    start, stop = page_range
     lines: List[TextLine] = []
+    for page_index in range(start, stop):
+        lines.extend(_page_text_lines(_WORKER_DOCUMENT[page_index], page_index, _WORKER_BACKEND))
+    return lines
 
-    for page_index, page in enumerate(doc):
-        words = page.get_text("words")  # (x0, y0, x1, y1, word, block, line, word_no)
-        if not words:
-            continue
-        grouped: Dict[Tuple[int, int], Dict[str, Any]] = {}
-        for x0, y0, x1, y1, word, block, line_no, word_no in words:
-            key = (block, line_no)
-            entry = grouped.setdefault(
-                key,
-                {
-                    "words": [],
-                    "bbox": [x0, y0, x1, y1],
-                },
-            )
-            entry["words"].append((word_no, word, x0))
-            entry["bbox"][0] = min(entry["bbox"][0], x0)
-            entry["bbox"][1] = min(entry["bbox"][1], y0)
-            entry["bbox"][2] = max(entry["bbox"][2], x1)
-            entry["bbox"][3] = max(entry["bbox"][3], y1)
-
-        for (block, line_no), entry in sorted(grouped.items(), key=lambda item: (item[0][0], item[0][1])):
-            sorted_words = sorted(entry["words"], key=lambda w: (w[0], w[2]))
-            text = " ".join(word for _, word, _ in sorted_words).strip()
-            if not text:
-                continue
-            bbox = tuple(entry["bbox"])  # type: ignore[arg-type]
-            lines.append(TextLine(text=text, upper=text.upper(), page=page_index, bbox=bbox))
 
+def _page_workers() -> int:
+    configured = os.getenv(PAGE_WORKERS_ENV_VARIABLE)
+    if configured:
+        return max(1, int(configured))
+    return max(1, os.cpu_count() or 1)
+
+
+def _page_ranges(page_count: int, chunks: int, start_page: int = 0) -> List[Tuple[int, int]]:
+    size = max(1, -(-(page_count - start_page) // chunks))
+    return [(start, min(start + size, page_count)) for start in range(start_page, page_count, size)]
+
+
+def _extract_text_lines(
+    source: PdfSource,
+    workers: Optional[int] = None,
+    backend: str = DEFAULT_BACKEND,
+    start_page: int = 0,
+    lines_read: Sequence[TextLine] = (),
+) -> List[TextLine]:
+    """Extract grouped text lines from every page, in page order, with ``backend``.
+
+    Documents with at least ``PARALLEL_PAGE_THRESHOLD`` pages are split into
+    contiguous page ranges and fanned out to a process pool (``workers``,
+    defaulting to ``PDF_INGEST_PAGE_WORKERS`` or the CPU count). Extraction
+    stays serial inside ``app.utils.pool`` workers such as the file-level batch
+    ingest, so the two kinds of pool never nest.
+    Pages without a text layer are then OCR'd when tesseract is available.
+    When ``source`` is a path, pool workers open the file themselves instead
+    of receiving a pickled copy of the document bytes. Backends with their own
+    parser (no ``page_lines``) always run serially.
+
+    ``start_page`` and ``lines_read`` continue a scan that has already read
+    the pages before ``start_page`` (see ``_scan_pages_lazily``): only the
+    remaining pages are extracted, and textless pages from both are OCR'd
+    together.
+    """
+
+    doc = _open_document(source)
+    try:
+        page_count = doc.page_count
+        remaining = page_count - start_page
+        worker_count = _page_workers() if workers is None else workers
+        worker_count = min(worker_count, remaining)
+        lines: List[TextLine] = list(lines_read)
+        if (
+            worker_count <= 1
+            or remaining < PARALLEL_PAGE_THRESHOLD
+            or pool.in_worker()
+            or ingest_backends.get_backend(backend).page_lines is None
+        ):
+            with closing(_iter_page_lines(doc, source, backend, start_page)) as pages:
+                for page_lines in pages:
+                    lines.extend(page_lines)
+        else:
+            # Two ranges per worker smooths out pages of uneven complexity.
+            ranges = _page_ranges(page_count, worker_count * 2, start_page)
+            with ProcessPoolExecutor(
+                max_workers=worker_count, initializer=_init_page_worker, initargs=(source, backend)
+            ) as page_pool:
+                lines.extend(line for chunk in page_pool.map(_extract_page_range, ranges) for line in chunk)
+
+        textless = sorted(set(range(page_count)) - {line.page for line in lines})
+        if textless:
+            lines = _add_ocr_lines(doc, lines, textless)
+        return lines
+    finally:
+        doc.close()
+
+
+def _add_ocr_lines(doc, lines: List[TextLine], textless: Sequence[int]) -> List[TextLine]:
+    if not ocr.available():
+        LOGGER.info("Skipping OCR for %d page(s) without text; tesseract is unavailable.", len(textless))
+        return lines
+    with metrics.stage("ocr"):
+        recognised = ocr.ocr_pages(doc, textless)
+    for page_index, page_lines in recognised.items():
+        lines.extend(
+            TextLine(text=text, upper=text.upper(), page=page_index, bbox=bbox) for text, bbox in page_lines
+        )
+    # Stable sort keeps each page's own line order.
+    lines.sort(key=lambda line: line.page)
     return lines
 
 
@@ -99,82 +219,145 @@ def _format_title_number(value: Optional[str]) -> Optional[str]:
     return " ".join(groups)
 
 
-def _detect_section(lines: Sequence[TextLine], header: str) -> Optional[int]:
-    header_upper = header.upper()
-    for idx, line in enumerate(lines):
-        if header_upper in line.upper:
-            return idx
-    return None
+@dataclass
+class SectionIndex:
+    """Positions of section headers and field anchors, built in one pass.
+
+    ``positions`` maps each header or anchor keyword to the sorted indices of the lines that
+    contain it, so extractors can jump straight to their own slice of the document.
+    """
+
+    positions: Dict[str, List[int]]
+    line_count: int
+
+    def first(self, key: str) -> Optional[int]:
+        found = self.positions.get(key)
+        return found[0] if found else None
+
+    def anchors(self, key: str) -> List[int]:
+        return self.positions.get(key, [])
+
+    def section_range(self, header: str, stop_keys: Iterable[str]) -> Optional[Tuple[int, int]]:
+        """Return ``(start, stop)`` for the lines after ``header`` up to the next stop key."""
+
+        header_idx = self.first(header)
+        if header_idx is None:
+            return None
+        start = header_idx + 1
+        stop = self.line_count
+        for key in stop_keys:
+            found = self.positions.get(key, [])
+            nxt = bisect.bisect_left(found, start)
+            if nxt < len(found):
+                stop = min(stop, found[nxt])
+        return start, stop
+
+
+# Field anchors share the index pass with the section headers. Keys are the upper-case
+# keywords each extractor previously searched for line by line.
+FIELD_ANCHORS = ("TITLE NUMBER", "ORDER NUMBER", "LINC", "MUNICIPALITY")
+# "REGISTERED OWNER(S)" is covered by its "REGISTERED OWNER" prefix.
+_INDEX_KEYS = tuple(dict.fromkeys(header for header in SECTION_HEADERS if header != "REGISTERED OWNER(S)")) + FIELD_ANCHORS
+_INDEX_PATTERN = re.compile("|".join(re.escape(key) for key in sorted(_INDEX_KEYS, key=len, reverse=True)))
+
+_TITLE_NUMBER_PATTERN = re.compile(r"TITLE\s+NUMBER\s*[:#-]?\s*([A-Z0-9-]+)", re.IGNORECASE)
+_TITLE_NUMBER_NEXT_LINE_PATTERN = re.compile(r"([A-Z0-9-]{6,})")
+_ORDER_NUMBER_PATTERN = re.compile(r"ORDER\s+NUMBER\s*[:#-]?\s*(\d+)", re.IGNORECASE)
+_LINC_PATTERN = re.compile(r"(\d{10})")
+_MUNICIPALITY_PATTERN = re.compile(r"MUNICIPALITY\s*[:#-]?\s*(.+)$", re.IGNORECASE)
+_OWNER_PREFIX_PATTERN = re.compile(r"^\d+\.?\s*")
+_OWNER_INTEREST_PATTERN = re.compile(r"(\d+/\d+)")
+_REGISTRATION_NUMBER_PATTERN = re.compile(r"\d{6,}")
+_NON_ALPHA_PATTERN = re.compile(r"[^A-Z]")
+_DOCUMENT_ID_PATTERN = re.compile(r"[0-9a-fA-F]{64}")
+# Extractors that tolerate irregular spacing ("TITLE  NUMBER") still need their anchor line
+# indexed, so the index also looks for the whitespace-insensitive forms.
+_LOOSE_ANCHORS = {
+    "TITLE NUMBER": re.compile(r"TITLE\s+NUMBER"),
+    "ORDER NUMBER": re.compile(r"ORDER\s+NUMBER"),
+}
+
+
+def _extend_section_index(index: SectionIndex, lines: Sequence[TextLine]) -> SectionIndex:
+    """Index ``lines[index.line_count:]``, so pages can be added to an index as they are read."""
 
+    positions = index.positions
+    for idx in range(index.line_count, len(lines)):
+        upper = lines[idx].upper
+        found = {match.group(0) for match in _INDEX_PATTERN.finditer(upper)}
+        for key, pattern in _LOOSE_ANCHORS.items():
+            if key not in found and pattern.search(upper):
+                found.add(key)
+        for key in found:
+            positions.setdefault(key, []).append(idx)
+    index.line_count = len(lines)
+    return index
 
-def _is_section_break(text: str) -> bool:
-    upper = text.upper()
-    return any(header in upper for header in SECTION_HEADERS)
 
+def _build_section_index(lines: Sequence[TextLine]) -> SectionIndex:
+    return _extend_section_index(SectionIndex(positions={}, line_count=0), lines)
 
-def _collect_until(lines: Sequence[TextLine], start_idx: int, stop_words: Iterable[str]) -> List[str]:
-    stop_upper = [word.upper() for word in stop_words]
+
+def _collect_section(lines: Sequence[TextLine], bounds: Optional[Tuple[int, int]]) -> List[str]:
+    if bounds is None:
+        return []
     collected: List[str] = []
-    for line in lines[start_idx:]:
+    for line in lines[bounds[0] : bounds[1]]:
         if not line.text.strip():
             if collected:
                 break
             continue
-        upper = line.upper
-        if any(stop in upper for stop in stop_upper):
-            break
         collected.append(line.text.strip())
     return collected
 
 
-def _extract_title_number(lines: Sequence[TextLine]) -> Optional[str]:
-    for idx, line in enumerate(lines):
-        match = re.search(r"TITLE\s+NUMBER\s*[:#-]?\s*([A-Z0-9-]+)", line.text, re.IGNORECASE)
+def _extract_title_number(lines: Sequence[TextLine], index: SectionIndex) -> Optional[str]:
+    for idx in index.anchors("TITLE NUMBER"):
+        line = lines[idx]
+        match = _TITLE_NUMBER_PATTERN.search(line.text)
         if match:
             return match.group(1)
         if "TITLE NUMBER" in line.upper and idx + 1 < len(lines):
             next_line = lines[idx + 1].text.strip()
-            match = re.search(r"([A-Z0-9-]{6,})", next_line)
+            match = _TITLE_NUMBER_NEXT_LINE_PATTERN.search(next_line)
             if match:
                 return match.group(1)
     return None
 
 
-def _extract_order_number(lines: Sequence[TextLine]) -> Optional[str]:
-    for line in lines[:10]:  # typically near the top of page 1
-        match = re.search(r"ORDER\s+NUMBER\s*[:#-]?\s*(\d+)", line.text, re.IGNORECASE)
+def _extract_order_number(lines: Sequence[TextLine], index: SectionIndex) -> Optional[str]:
+    for idx in index.anchors("ORDER NUMBER"):
+        if idx >= 10:  # typically near the top of page 1
+            break
+        match = _ORDER_NUMBER_PATTERN.search(lines[idx].text)
         if match:
             return match.group(1)
     return None
 
 
-def _extract_linc(lines: Sequence[TextLine]) -> Optional[str]:
-    for idx, line in enumerate(lines):
-        if "LINC" not in line.upper:
-            continue
-        match = re.search(r"(\d{10})", line.text)
+def _extract_linc(lines: Sequence[TextLine], index: SectionIndex) -> Optional[str]:
+    for idx in index.anchors("LINC"):
+        match = _LINC_PATTERN.search(lines[idx].text)
         if match:
             return match.group(1)
         if idx + 1 < len(lines):
-            match = re.search(r"(\d{10})", lines[idx + 1].text)
+            match = _LINC_PATTERN.search(lines[idx + 1].text)
             if match:
                 return match.group(1)
     return None
 
 
-def _extract_municipality(lines: Sequence[TextLine]) -> Optional[str]:
-    for line in lines:
-        match = re.search(r"MUNICIPALITY\s*[:#-]?\s*(.+)$", line.text, re.IGNORECASE)
+def _extract_municipality(lines: Sequence[TextLine], index: SectionIndex) -> Optional[str]:
+    for idx in index.anchors("MUNICIPALITY"):
+        match = _MUNICIPALITY_PATTERN.search(lines[idx].text)
         if match:
             return match.group(1).strip()
     return None
 
 
-def _extract_legal_description(lines: Sequence[TextLine]) -> List[str]:
-    idx = _detect_section(lines, "LEGAL DESCRIPTION")
-    if idx is None:
-        return []
-    return [line for line in _collect_until(lines, idx + 1, ("REGISTERED OWNER", "ENCUMBRANCES")) if line]
+def _extract_legal_description(lines: Sequence[TextLine], index: SectionIndex) -> List[str]:
+    bounds = index.section_range("LEGAL DESCRIPTION", ("REGISTERED OWNER", "ENCUMBRANCES"))
+    return [line for line in _collect_section(lines, bounds) if line]
 
 
 def _classify_owner_type(name: str) -> str:
@@ -182,19 +365,16 @@ def _classify_owner_type(name: str) -> str:
     return "Company" if any(hint in upper for hint in COMPANY_HINTS) else "Individual"
 
 
-def _extract_owners(lines: Sequence[TextLine]) -> List[Dict[str, Any]]:
-    idx = _detect_section(lines, "REGISTERED OWNER")
-    if idx is None:
-        return []
-    collected = _collect_until(lines, idx + 1, ("ENCUMBRANCES", "INSTRUMENTS"))
+def _extract_owners(lines: Sequence[TextLine], index: SectionIndex) -> List[Dict[str, Any]]:
+    collected = _collect_section(lines, index.section_range("REGISTERED OWNER", ("ENCUMBRANCES", "INSTRUMENTS")))
     owners: List[Dict[str, Any]] = []
     for line in collected:
         raw = line.strip()
         if not raw:
             continue
-        raw = re.sub(r"^\d+\.?\s*", "", raw)
+        raw = _OWNER_PREFIX_PATTERN.sub("", raw)
         interest = None
-        interest_match = re.search(r"(\d+/\d+)", raw)
+        interest_match = _OWNER_INTEREST_PATTERN.search(raw)
         if interest_match:
             interest = interest_match.group(1)
             raw = raw.replace(interest, "").strip()
@@ -211,12 +391,26 @@ def _extract_owners(lines: Sequence[TextLine]) -> List[Dict[str, Any]]:
     return owners
 
 
+def _instrument_record(
+    registration_number: str, registration_date: Optional[str], doc_type: str, remarks: str
+) -> Dict[str, Any]:
+    doc_type = doc_type.strip() or "Instrument"
+    doc_code = _NON_ALPHA_PATTERN.sub("", doc_type.upper())[:4] or doc_type[:4].upper()
+    return {
+        "registration_number": registration_number,
+        "registration_date": registration_date,
+        "document_type_name": doc_type.title(),
+        "document_type_code": doc_code,
+        "remarks": remarks.strip(),
+    }
+
+
 def _parse_instrument_line(text: str) -> Optional[Dict[str, Any]]:
     stripped = text.strip()
     if not stripped:
         return None
     parts = stripped.split()
-    if len(parts) < 2 or not re.fullmatch(r"\d{6,}", parts[0]):
+    if len(parts) < 2 or not _REGISTRATION_NUMBER_PATTERN.fullmatch(parts[0]):
         return None
     registration_number = parts[0]
     idx = 1
@@ -230,7 +424,7 @@ def _parse_instrument_line(text: str) -> Optional[Dict[str, Any]]:
     type_tokens: List[str] = []
     while idx < len(parts):
         token = parts[idx]
-        if re.fullmatch(r"\d{6,}", token):
+        if _REGISTRATION_NUMBER_PATTERN.fullmatch(token):
             break
         if len(token) == 1:
             break
@@ -239,25 +433,121 @@ def _parse_instrument_line(text: str) -> Optional[Dict[str, Any]]:
             break
         type_tokens.append(token)
         idx += 1
-    doc_type = " ".join(type_tokens).strip() or "Instrument"
-    remarks = " ".join(parts[idx:]).strip()
-    doc_code = re.sub(r"[^A-Z]", "", doc_type)[:4] or doc_type[:4].upper()
-    return {
-        "registration_number": registration_number,
-        "registration_date": registration_date,
-        "document_type_name": doc_type.title(),
-        "document_type_code": doc_code,
-        "remarks": remarks,
-    }
+    return _instrument_record(registration_number, registration_date, " ".join(type_tokens), " ".join(parts[idx:]))
 
 
-def _extract_instruments(lines: Sequence[TextLine]) -> List[Dict[str, Any]]:
-    idx = _detect_section(lines, "ENCUMBRANCES")
-    if idx is None:
-        idx = _detect_section(lines, "INSTRUMENTS")
-    if idx is None:
-        return []
-    collected = _collect_until(lines, idx + 1, ("TOTAL",))
+def _instrument_column_roles(
+    store: LineStore, rows: Sequence[np.ndarray], edges: np.ndarray
+) -> Optional[Tuple[int, Optional[int], int]]:
+    """Pick the registration, date and type columns from what their cells contain.
+
+    Registration and date columns are the ones whose cells most often parse as
+    such; the type column is the next one to their right, and every column
+    after it holds remarks.
+    """
+
+    registrations = np.zeros(len(edges), dtype=np.int64)
+    dates = np.zeros(len(edges), dtype=np.int64)
+    for row in rows:
+        for idx, column in zip(row.tolist(), store.column_of(row, edges).tolist()):
+            text = store.texts[idx].strip()
+            if _REGISTRATION_NUMBER_PATTERN.fullmatch(text):
+                registrations[column] += 1
+            elif _normalize_date(text):
+                dates[column] += 1
+    if not registrations.any():
+        return None
+    registration_column = int(np.argmax(registrations))
+    dates[registration_column] = 0
+    date_column = int(np.argmax(dates)) if dates.any() else None
+    type_column = max(registration_column, date_column or 0) + 1
+    if type_column >= len(edges):
+        return None
+    return registration_column, date_column, type_column
+
+
+def _instruments_from_columns(store: LineStore, indices: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+    """Rebuild the instrument table from line positions.
+
+    Returns ``None`` when the section has no usable geometry (no boxes, or
+    every row is a single line) so callers fall back to token parsing.
+    """
+
+    if indices.size == 0 or store.degenerate(indices):
+        return None
+    rows = store.cluster_rows(indices)
+    table_rows = [row for row in rows if len(row) > 1]
+    if not table_rows:
+        return None
+    edges = store.cluster_columns(np.concatenate(table_rows))
+    roles = _instrument_column_roles(store, table_rows, edges)
+    if roles is None:
+        return None
+    registration_column, date_column, type_column = roles
+    # Wrapped cells sit directly under their row; anything further down starts something new.
+    wrap_gap = store.line_height(indices) / 2
+
+    instruments: List[Dict[str, Any]] = []
+    # (registration number, date text, type cells, remark cells) of the instrument being read.
+    pending: Optional[Tuple[str, str, List[str], List[str]]] = None
+    previous: Optional[np.ndarray] = None
+    for row in rows:
+        cells: Dict[int, List[str]] = {}
+        for idx, column in zip(row.tolist(), store.column_of(row, edges).tolist()):
+            cells.setdefault(column, []).append(store.texts[idx].strip())
+        registration = " ".join(cells.get(registration_column, []))
+        continues = (
+            pending is not None
+            and previous is not None
+            and not registration
+            and store.pages[row[0]] == store.pages[previous[0]]
+            and store.bboxes[row, 1].min() - store.bboxes[previous, 3].max() <= wrap_gap
+        )
+        if pending is not None and not continues:
+            instruments.append(_instrument_from_cells(*pending))
+            pending = None
+        if _REGISTRATION_NUMBER_PATTERN.fullmatch(registration):
+            date_text = " ".join(cells.get(date_column, [])) if date_column is not None else ""
+            pending = (registration, date_text, [], [])
+        elif not continues:
+            previous = None
+            parsed = _parse_instrument_line(store.texts[row[0]]) if len(row) == 1 else None
+            if parsed:
+                instruments.append(parsed)
+            continue
+        for column, texts in sorted(cells.items()):
+            if column == type_column:
+                pending[2].extend(texts)  # type: ignore[index]
+            elif column > type_column:
+                pending[3].extend(texts)  # type: ignore[index]
+        previous = row
+    if pending is not None:
+        instruments.append(_instrument_from_cells(*pending))
+    return instruments
+
+
+def _instrument_from_cells(registration: str, date_text: str, type_cells: List[str], remark_cells: List[str]) -> Dict[str, Any]:
+    return _instrument_record(
+        registration,
+        _normalize_date(date_text) if date_text else None,
+        " ".join(type_cells),
+        " ".join(remark_cells),
+    )
+
+
+def _extract_instruments(
+    lines: Sequence[TextLine], index: SectionIndex, store: Optional[LineStore] = None
+) -> List[Dict[str, Any]]:
+    bounds = index.section_range("ENCUMBRANCES", ("TOTAL",))
+    if bounds is None:
+        bounds = index.section_range("INSTRUMENTS", ("TOTAL",))
+    if bounds is not None:
+        if store is None:
+            store = LineStore.from_lines(lines)
+        from_columns = _instruments_from_columns(store, np.arange(bounds[0], bounds[1]))
+        if from_columns is not None:
+            return from_columns
+    collected = _collect_section(lines, bounds)
     instruments: List[Dict[str, Any]] = []
     for line in collected:
         parsed = _parse_instrument_line(line)
@@ -368,37 +658,372 @@ def _build_document(extracted: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return document
 
 
+def _scan_complete(lines: Sequence[TextLine], index: SectionIndex) -> bool:
+    """Whether the lines read so far hold every field ``_build_document`` needs.
+
+    That is the title number, the LINC, and an instrument section already
+    closed by its ``TOTAL`` marker, so later pages cannot add instruments.
+    """
+
+    if _extract_title_number(lines, index) is None or _extract_linc(lines, index) is None:
+        return False
+    bounds = index.section_range("ENCUMBRANCES", ("TOTAL",)) or index.section_range("INSTRUMENTS", ("TOTAL",))
+    return bounds is not None and bounds[1] < index.line_count
+
+
+def _scan_pages_lazily(
+    source: PdfSource, backend: str = DEFAULT_BACKEND
+) -> Optional[Tuple[List[TextLine], bool, Optional[int]]]:
+    """Read pages in order until ``_scan_complete`` holds.
+
+    Returns ``(lines, stopped_early, resume_from)``: ``resume_from`` is
+    ``None`` once every page has been read, otherwise the first unread page,
+    from which ``_extract_text_lines`` continues (after an early stop that
+    builds no document, or past ``EARLY_STOP_PAGE_LIMIT`` pages). Returns
+    ``None`` when the document cannot be opened here.
+
+    Pages without a text layer end the early-stop checks, since their OCR'd
+    lines come before anything read after them. They are OCR'd in a single
+    ``ocr.ocr_pages`` call once the whole document has been read, here or by
+    ``_extract_text_lines``.
+    """
+
+    try:
+        doc = _open_document(source)
+    except Exception as exc:  # fitz raises its own error types for unreadable input
+        LOGGER.debug("Lazy page scan skipped, unable to open PDF: %s", exc)
+        return None
+    try:
+        page_count = doc.page_count
+        lines: List[TextLine] = []
+        textless: List[int] = []
+        pages_read = 0
+        index = SectionIndex(positions={}, line_count=0)
+        with closing(_iter_page_lines(doc, source, backend)) as pages:
+            for page_index, page_lines in zip(range(min(page_count, EARLY_STOP_PAGE_LIMIT)), pages):
+                pages_read = page_index + 1
+                if not page_lines:
+                    textless.append(page_index)
+                    continue
+                lines.extend(page_lines)
+                if textless:
+                    continue
+                _extend_section_index(index, lines)
+                if pages_read < page_count and _scan_complete(lines, index):
+                    LOGGER.debug("Stopped PDF scan after %d of %d pages.", pages_read, page_count)
+                    return lines, True, pages_read
+        if pages_read < page_count:
+            return lines, False, pages_read
+        if textless:
+            lines = _add_ocr_lines(doc, lines, textless)
+        return lines, False, None
+    finally:
+        doc.close()
+
+
+def _heuristic_extract(source: PdfSource, backend: str = DEFAULT_BACKEND) -> Optional[Dict[str, Any]]:
+    scanned = _scan_pages_lazily(source, backend)
+    lines: List[TextLine] = []
+    resume_from: Optional[int] = 0
+    if scanned is not None:
+        lines, stopped_early, resume_from = scanned
+        if resume_from is None:
+            return _extract_metadata(lines) if lines else None
+        if stopped_early:
+            extracted = _extract_metadata(lines)
+            if _build_document(extracted) is not None:
+                return extracted
+            LOGGER.info("Early-stopped PDF scan did not yield a title; reading the remaining pages.")
+
+    try:
+        lines = _extract_text_lines(source, backend=backend, start_page=resume_from or 0, lines_read=lines)
+    except RuntimeError as exc:  # pragma: no cover - dependency guard
+        LOGGER.error("PDF ingestion failed: %s", exc)
+        return None
+    if not lines:
+        return None
+    return _extract_metadata(lines)
+
+
 def _extract_metadata(lines: Sequence[TextLine]) -> Dict[str, Any]:
+    index = _build_section_index(lines)
     extracted: Dict[str, Any] = {}
-    extracted["order_number"] = _extract_order_number(lines)
-    extracted["title_number"] = _extract_title_number(lines)
-    extracted["linc_number"] = _extract_linc(lines)
-    extracted["municipality"] = _extract_municipality(lines)
-    legal_description = _extract_legal_description(lines)
+    extracted["order_number"] = _extract_order_number(lines, index)
+    extracted["title_number"] = _extract_title_number(lines, index)
+    extracted["linc_number"] = _extract_linc(lines, index)
+    extracted["municipality"] = _extract_municipality(lines, index)
+    legal_description = _extract_legal_description(lines, index)
     if legal_description:
         extracted["legal_description"] = legal_description
-    owners = _extract_owners(lines)
+    owners = _extract_owners(lines, index)
     if owners:
         extracted["owners"] = owners
-    instruments = _extract_instruments(lines)
+    instruments = _extract_instruments(lines, index, LineStore.from_lines(lines))
     if instruments:
         extracted["instruments"] = instruments
     return extracted
 
 
-def pdf_to_xml_candidates(pdf_bytes: bytes) -> Tuple[List[str], float]:
-    """Produce 1-3 canonical XML candidates from a prior title PDF."""
+# ---------------------------------------------------------------------------
+# Template-geometry extraction for PDFs rendered from our own templates
+
+# XPath suffix of a text box binding -> extracted field.
+_TEMPLATE_BOX_FIELDS = (
+    ("/TitleNumber", "title_number"),
+    ("/LINCNumber", "linc_number"),
+    ("/Municipality/Name", "municipality"),
+    ("/RightsType", "rights_type"),
+    ("/Estate", "estate"),
+)
+_TEMPLATE_LEGAL_MARKERS = ("/ShortLegal", "/LegalText/")
+
+# Table binding suffix -> (extracted list, {column binding suffix: field}).
+_TEMPLATE_TABLES = (
+    ("/Party", "owners", (("Name", "name"), ("TenancyType", "tenancy"), ("Interest", "interest"), ("Type", "type"))),
+    (
+        "/Instrument",
+        "instruments",
+        (
+            ("RegistrationNumber", "registration_number"),
+            ("RegistrationDate", "registration_date"),
+            ("DocumentType/Name", "document_type_name"),
+            ("DocumentType/PrintText", "remarks"),
+        ),
+    ),
+)
+
+# Words whose vertical midpoints are this close share a rendered line.
+_ROW_TOLERANCE = 2.0
+
+
+def _is_generated_pdf(doc) -> bool:
+    metadata = doc.metadata or {}
+    return (metadata.get("creator") or "").strip() == GENERATED_PDF_CREATOR
+
+
+def _words_in(words: Sequence[Tuple], rect: Tuple[float, float, float, float]) -> List[Tuple]:
+    """Select the words whose centre falls inside ``rect``."""
+
+    x0, y0, x1, y1 = rect
+    return [word for word in words if x0 <= (word[0] + word[2]) / 2 < x1 and y0 <= (word[1] + word[3]) / 2 < y1]
+
+
+def _extract_template_boxes(words: Sequence[Tuple], geometry: template_regions.TemplateGeometry) -> Dict[str, Any]:
+    extracted: Dict[str, Any] = {}
+    for box in geometry.boxes:
+        texts = [line.text for line in sorted(ingest_backends.group_words(_words_in(words, box.rect), 0), key=lambda line: line.bbox[1])]
+        labels = [segment.label for segment in box.lines if segment.label]
+        unlabelled = [text for text in texts if not any(text.startswith(label) for label in labels)]
+        for segment in box.lines:
+            field = next((name for suffix, name in _TEMPLATE_BOX_FIELDS for xpath in segment.xpaths if xpath.endswith(suffix)), None)
+            if segment.label:
+                value = next((text[len(segment.label) :].strip() for text in texts if text.startswith(segment.label)), "")
+                if field and value:
+                    extracted[field] = value
+            elif any(marker in xpath for xpath in segment.xpaths for marker in _TEMPLATE_LEGAL_MARKERS):
+                extracted["legal_description"] = unlabelled
+            elif field and unlabelled:
+                extracted[field] = " ".join(unlabelled)
+    return extracted
+
+
+def _table_header_line(words: Sequence[Tuple], table: template_regions.TableRegion) -> Optional[float]:
+    """Return the vertical midpoint of the table header among a page's words, if it is drawn there."""
+
+    words = _words_in(words, table.header_rect)
+    if not words or not table.columns or table.columns[0].header not in " ".join(word[4] for word in words):
+        return None
+    # The clip can catch the top of the first body row; the header is the topmost line.
+    return min((word[1] + word[3]) / 2 for word in words)
+
 
+def _table_rows(words: Sequence[Tuple], table: template_regions.TableRegion, header_line: float, bottom: float) -> List[List[str]]:
+    """Read table rows from the clipped body, one list of cell texts per row.
+
+    Cells are assigned to columns by the template's column x-ranges. Baseline
+    snapping makes vertical gaps unreliable, so a new row starts on any line
+    that fills the first column plus at least one other; lines that only
+    continue wrapped cells are appended to the previous row.
+    """
+
+    x0, _, x1, _ = table.header_rect
+    words = [
+        word
+        for word in _words_in(words, (x0, table.body_top, x1, bottom))
+        if (word[1] + word[3]) / 2 > header_line + _ROW_TOLERANCE
+    ]
+    words.sort(key=lambda word: ((word[1] + word[3]) / 2, word[0]))
+
+    visual_lines: List[List[Tuple]] = []
+    last_mid: Optional[float] = None
+    for word in words:
+        mid = (word[1] + word[3]) / 2
+        if last_mid is None or mid - last_mid > _ROW_TOLERANCE:
+            visual_lines.append([])
+        visual_lines[-1].append(word)
+        last_mid = mid
+
+    rows: List[List[str]] = []
+    for line_words in visual_lines:
+        cells: List[List[str]] = [[] for _ in table.columns]
+        for word in sorted(line_words, key=lambda word: word[0]):
+            centre = (word[0] + word[2]) / 2
+            for col_idx, column in enumerate(table.columns):
+                if column.x0 <= centre < column.x1:
+                    cells[col_idx].append(word[4])
+                    break
+        texts = [" ".join(cell) for cell in cells]
+        starts_row = bool(texts[0]) and any(texts[1:])
+        if starts_row or not rows:
+            rows.append(texts)
+        else:
+            rows[-1] = [" ".join(part for part in (prev, new) if part) for prev, new in zip(rows[-1], texts)]
+    return rows
+
+
+def _template_table_records(table: template_regions.TableRegion, rows: List[List[str]]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    for suffix, target, field_map in _TEMPLATE_TABLES:
+        if not table.binding.endswith(suffix):
+            continue
+        fields: List[Optional[str]] = []
+        for column in table.columns:
+            binding = column.binding.lstrip("./")
+            fields.append(next((name for column_suffix, name in field_map if binding.endswith(column_suffix)), None))
+        records = [{field: value for field, value in zip(fields, row) if field} for row in rows]
+        return target, records
+    return None, []
+
+
+def _normalize_template_records(extracted: Dict[str, Any]) -> None:
+    for owner in extracted.get("owners", []):
+        owner.setdefault("type", _classify_owner_type(owner.get("name", "")))
+        owner["interest"] = owner.get("interest") or None
+        owner["tenancy"] = owner.get("tenancy") or "Common"
+    for instrument in extracted.get("instruments", []):
+        instrument["registration_date"] = _normalize_date(instrument.get("registration_date") or "")
+        doc_type = instrument.get("document_type_name") or "Instrument"
+        instrument["document_type_name"] = doc_type
+        instrument["document_type_code"] = _NON_ALPHA_PATTERN.sub("", doc_type.upper())[:4] or doc_type[:4].upper()
+        instrument["remarks"] = instrument.get("remarks") or ""
+
+
+def _extract_template_fields(doc, geometry: template_regions.TemplateGeometry) -> Dict[str, Any]:
+    """Read fields from the regions a template places them in, page by page.
+
+    Text boxes are static elements drawn on the first page. Repeating tables
+    may continue onto later pages, where they reappear with their header at
+    the same position; a table's body runs down to the next template element
+    while that element shares the page, otherwise to the bottom margin.
+    """
+
+    if doc.page_count == 0:
+        return {}
+    extracted: Dict[str, Any] = {}
+    for page_index, page in enumerate(doc):
+        # One clipped text pass per page; regions then select their words by position.
+        words = page.get_text("words", clip=geometry.extent)
+        if page_index == 0:
+            extracted.update(_extract_template_boxes(words, geometry))
+        header_lines = [_table_header_line(words, table) for table in geometry.tables]
+        for table_idx, table in enumerate(geometry.tables):
+            header_line = header_lines[table_idx]
+            if header_line is None:
+                continue
+            followed = page_index == 0 or any(line is not None for line in header_lines[table_idx + 1 :])
+            bottom = table.first_page_bottom if followed else geometry.bottom_limit
+            target, records = _template_table_records(table, _table_rows(words, table, header_line, bottom))
+            if target and records:
+                extracted.setdefault(target, []).extend(records)
+    _normalize_template_records(extracted)
+    return extracted
+
+
+def _document_id(doc) -> Optional[str]:
     try:
-        lines = _extract_text_lines(pdf_bytes)
-    except RuntimeError as exc:  # pragma: no cover - dependency guard
-        LOGGER.error("PDF ingestion failed: %s", exc)
-        return [], 0.0
+        _, value = doc.xref_get_key(-1, "ID")
+    except Exception:  # pragma: no cover - malformed trailer
+        return None
+    match = _DOCUMENT_ID_PATTERN.search(value or "")
+    return match.group(0).lower() if match else None
 
-    if not lines:
-        return [], 0.0
 
-    extracted = _extract_metadata(lines)
+def _embedded_xml(doc) -> Optional[str]:
+    """Return the XML embedded by the renderer, provided it hashes to the document ``/ID``."""
+
+    if EMBEDDED_XML_NAME not in doc.embfile_names():
+        return None
+    data = doc.embfile_get(EMBEDDED_XML_NAME)
+    expected = _document_id(doc)
+    if expected is None or sha256_hex(data) != expected:
+        LOGGER.warning("Embedded %s does not match the document ID; ignoring it.", EMBEDDED_XML_NAME)
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        LOGGER.warning("Embedded %s is not UTF-8; ignoring it.", EMBEDDED_XML_NAME)
+        return None
+
+
+def _read_generated(source: PdfSource, mode: str, template_id: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Try the lossless paths for PDFs we rendered before any whole-page text extraction.
+
+    Returns ``(embedded_xml, None)`` when the PDF carries verified source XML,
+    ``(None, fields)`` when the template regions yielded a title, and
+    ``(None, None)`` to fall back to the heuristics.
+    """
+
+    if mode == "heuristic":
+        return None, None
+    try:
+        doc = _open_document(source)
+    except Exception as exc:  # fitz raises its own error types for unreadable input
+        LOGGER.debug("Template extraction skipped, unable to open PDF: %s", exc)
+        return None, None
+    try:
+        embedded = _embedded_xml(doc)
+        if embedded is not None:
+            return embedded, None
+        if mode == "auto" and not _is_generated_pdf(doc):
+            return None, None
+        extracted = _extract_template_fields(doc, template_regions.load_geometry(template_id))
+    finally:
+        doc.close()
+    if not (extracted.get("title_number") and extracted.get("linc_number")):
+        LOGGER.info("Template '%s' regions did not yield a title; using heuristic extraction.", template_id)
+        return None, None
+    return None, extracted
+
+
+@metrics.timed("ingest_extraction")
+def pdf_to_xml_candidates(
+    source: PdfSource,
+    mode: str = "auto",
+    template_id: str = DEFAULT_TEMPLATE_ID,
+    backend: str = DEFAULT_BACKEND,
+) -> Tuple[List[str], float]:
+    """Produce 1-3 canonical XML candidates from a prior title PDF (bytes or a file path).
+
+    ``mode`` selects the extraction strategy: ``"template"`` reads fields from
+    the regions laid out by ``template_id``, ``"heuristic"`` scans whole-page
+    text, and ``"auto"`` (default) uses the template for PDFs stamped by our
+    renderer, falling back to the heuristics when no title is recovered. Except
+    in heuristic mode, XML embedded by the renderer (``embed_xml``) is returned
+    as-is with confidence 1.0 once its hash matches the document ``/ID``.
+    ``backend`` names the ``ingest_backends`` text-line extractor used by the
+    heuristics; template regions are always read with PyMuPDF.
+    """
+
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode '{mode}'; expected one of {', '.join(INGEST_MODES)}.")
+    ingest_backends.get_backend(backend)
+
+    embedded, extracted = _read_generated(source, mode, template_id)
+    if embedded is not None:
+        return [embedded], 1.0
+    if extracted is None:
+        extracted = _heuristic_extract(source, backend)
+        if extracted is None:
+            return [], 0.0
     document = _build_document(extracted)
     if not document:
         return [], 0.0
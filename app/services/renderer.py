@@ -1,4 +1,9 @@
-"""PDF renderer implementing deterministic output and PDF/A support."""
+"""PDF renderer implementing deterministic output and PDF/A support.
+
+Output is a pure function of the XML, template and options, so concurrent
+identical ``render`` calls are coalesced: the first renders and the others
+wait for it and share its bytes.
+"""
 
 from __future__ import annotations
 
@@ -6,13 +11,16 @@ import io
 import json
 import os
 from pathlib import Path
-from typing import Dict, List
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
 
 from lxml import etree
+from starlette.concurrency import run_in_threadpool
 
 from .template_engine import compose
 from .font_registry import register_directory
-from app.utils import hashing, pdfa
+from app.utils import hashing, metrics, pdfa, profiling
+from app.utils.singleflight import SingleFlight
 
 
 DEFAULT_TEMPLATE_PATH = Path("app/data/templates")
@@ -21,6 +29,9 @@ DEFAULT_ICC_PATH = Path("app/assets/icc/sRGB.icc")
 
 INCH = 72.0
 
+# Name of the associated file carrying the source XML when ``options["embed_xml"]`` is set.
+EMBEDDED_XML_NAME = "title.xml"
+
 DEFAULT_METADATA = {
     "title": "Certificate of Title",
     "author": "Alberta Land Titles",
@@ -31,6 +42,13 @@ DEFAULT_METADATA = {
 }
 
 
+_RENDERS: SingleFlight[bytes] = SingleFlight()
+
+# Decoded template images (the crest) keyed by path, shared by every render in the process.
+_IMAGES: Dict[str, object] = {}
+_IMAGES_LOCK = threading.Lock()
+
+
 def _load_template(template_id: str) -> Dict[str, object]:
     template_path = DEFAULT_TEMPLATE_PATH / f"{template_id}.json"
     if not template_path.exists():
@@ -102,13 +120,29 @@ def _draw_line_op(canvas_obj, op: Dict[str, object]) -> None:
     canvas_obj.line(float(op.get("x1", 0.0)), float(op.get("y1", 0.0)), float(op.get("x2", 0.0)), float(op.get("y2", 0.0)))
 
 
+def _image_reader(path: str):
+    """A decoded ``ImageReader`` for ``path``, loaded once per process."""
+
+    with _IMAGES_LOCK:
+        reader = _IMAGES.get(path)
+        if reader is None:
+            from reportlab.lib.utils import ImageReader
+
+            reader = ImageReader(path)
+            # Decode the pixels (and any alpha channel) now; once cached, concurrent renders only read them.
+            reader.getRGBData()
+            if reader._dataA is not None:
+                reader._dataA.getRGBData()
+            _IMAGES[path] = reader
+        return reader
+
+
 def _draw_image_op(canvas_obj, op: Dict[str, object]) -> None:
-    from reportlab.lib.utils import ImageReader
     path = op.get("path")
     if not path:
         return
     try:
-        image_reader = ImageReader(path)
+        image_reader = _image_reader(str(path))
         canvas_obj.drawImage(
             image_reader,
             float(op.get("x", 0.0)),
@@ -167,18 +201,71 @@ def _generate_qr_image(data: str):
     return ImageReader(buffer)
 
 
+def render_key(xml_str: str, template_id: str, options: Dict[str, object] | None) -> str:
+    """Identity of a render: identical keys always produce byte-identical PDFs."""
+
+    material = json.dumps(
+        [hashing.sha256_hex(xml_str.encode("utf-8")), template_id, options or {}],
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashing.sha256_hex(material.encode("utf-8"))
+
+
 def render(xml_str: str, template_id: str = "alberta_title_v1", options: Dict[str, object] | None = None) -> bytes:
+    """Render ``xml_str`` to PDF, sharing the result with concurrent identical calls."""
+
+    pdf_bytes, shared = _RENDERS.do(
+        render_key(xml_str, template_id, options), lambda: _render(xml_str, template_id, options)
+    )
+    metrics.cache_result("render_coalescing", shared)
+    return pdf_bytes
+
+
+async def render_async(
+    xml_str: str,
+    template_id: str = "alberta_title_v1",
+    options: Dict[str, object] | None = None,
+    runner: Optional[Callable[[Callable[[], bytes]], Awaitable[bytes]]] = None,
+) -> bytes:
+    """``render`` for request handlers: duplicates wait without holding a thread.
+
+    The render itself runs in the threadpool, or through ``runner`` (such as
+    the cost-aware scheduler) when given. A request being profiled renders on
+    its own rather than joining another request's render, so its timings
+    describe real work.
+    """
+
+    if profiling.current() is not None:
+        return await (runner or run_in_threadpool)(lambda: _render(xml_str, template_id, options))
+    pdf_bytes, shared = await _RENDERS.do_async(
+        render_key(xml_str, template_id, options), lambda: _render(xml_str, template_id, options), runner=runner
+    )
+    metrics.cache_result("render_coalescing", shared)
+    return pdf_bytes
+
+
+def coalescing_stats() -> Dict[str, int]:
+    """Renders performed (``leaders``) and requests that shared one (``followers``) in this process."""
+
+    return {"leaders": _RENDERS.leaders, "followers": _RENDERS.followers, "in_flight": _RENDERS.in_flight()}
+
+
+def _render(xml_str: str, template_id: str, options: Dict[str, object] | None) -> bytes:
     try:
         from reportlab.pdfgen import canvas as rl_canvas
     except ImportError as exc:  # pragma: no cover - dependency guard
         raise RuntimeError("ReportLab is required to render PDFs") from exc
     options = options or {}
-    xml_root = etree.fromstring(xml_str.encode("utf-8"))
-    template = _load_template(template_id)
+    with profiling.span("parse"):
+        xml_root = etree.fromstring(xml_str.encode("utf-8"))
+        template = _load_template(template_id)
 
     alias_map = register_directory(str(ASSET_FONT_DIR))
 
-    pages = compose(template, xml_root)
+    with metrics.stage("compose"):
+        pages = compose(template, xml_root)
     page_conf = template.get("page", {})
     page_width = page_conf.get("width", 612)
     page_height = page_conf.get("height", 792)
@@ -199,29 +286,49 @@ def render(xml_str: str, template_id: str = "alberta_title_v1", options: Dict[st
             "margin_y": 0.6 * INCH,
         },
     )
-    qr_reader = None
-    if qr_conf.get("enabled", True):
-        qr_reader = _generate_qr_image(xml_hash)
-
-    for page_ops in pages:
-        _draw_operations(canvas_obj, page_ops, alias_map)
-        if qr_reader is not None:
-            size = float(qr_conf.get("size", 0.9 * INCH))
-            margin_x = float(qr_conf.get("margin_x", 1.4 * INCH))
-            margin_y = float(qr_conf.get("margin_y", 0.6 * INCH))
-            canvas_obj.drawImage(
-                qr_reader,
-                page_width - margin_x,
-                margin_y,
-                width=size,
-                height=size,
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-        canvas_obj.showPage()
+    with metrics.stage("draw"):
+        qr_reader = None
+        if qr_conf.get("enabled", True):
+            with profiling.span("qr"):
+                qr_reader = _generate_qr_image(xml_hash)
+
+        for page_ops in pages:
+            _draw_operations(canvas_obj, page_ops, alias_map)
+            if qr_reader is not None:
+                size = float(qr_conf.get("size", 0.9 * INCH))
+                margin_x = float(qr_conf.get("margin_x", 1.4 * INCH))
+                margin_y = float(qr_conf.get("margin_y", 0.6 * INCH))
+                canvas_obj.drawImage(
+                    qr_reader,
+                    page_width - margin_x,
+                    margin_y,
+                    width=size,
+                    height=size,
+                    preserveAspectRatio=True,
+                    mask="auto",
+                )
+            canvas_obj.showPage()
+
+    embed_xml = bool(options.get("embed_xml", False))
+    if embed_xml:
+        pdfa.embed_associated_file(
+            canvas_obj,
+            EMBEDDED_XML_NAME,
+            xml_str.encode("utf-8"),
+            "text/xml",
+            "SPIN 2 title XML this certificate was rendered from",
+        )
 
     if options.get("pdfa", True):
-        pdfa.apply_pdfa(canvas_obj, str(options.get("icc_path", DEFAULT_ICC_PATH)), metadata)
+        with metrics.stage("pdfa"):
+            pdfa.apply_pdfa(
+                canvas_obj,
+                str(options.get("icc_path", DEFAULT_ICC_PATH)),
+                metadata,
+                part=3 if embed_xml else 2,
+            )
 
-    canvas_obj.save()
+    with metrics.stage("save"):
+        canvas_obj.save()
+    metrics.pages_rendered(len(pages))
     return buffer.getvalue()
@@ -0,0 +1,229 @@
+"""Cost-aware scheduling of render and ingest work in two priority lanes.
+
+Work is submitted with an up-front cost estimate (milliseconds, from cheap
+signals: instrument and party counts in the XML, page count and file size
+for PDFs) and a lane. ``interactive`` work is always dispatched before
+``bulk`` work, and bulk work may hold at most ``SCHEDULER_BULK_SLOTS`` of the
+``SCHEDULER_WORKERS`` slots, so a backfill never occupies the capacity
+interactive requests need. Within a lane the cheapest job runs first, but a
+waiting job's effective cost drops by ``SCHEDULER_AGING_MS_PER_S`` for every
+second it waits, so expensive jobs still finish under a steady stream of
+cheap ones.
+
+Jobs run in the threadpool once dispatched. The scheduler is an asyncio
+object per worker process and orders the work admitted by the admission
+gates (``app/api/admission.py``); it does not reject anything itself.
+
+``/v1/render``, ``/v1/ingest-pdf`` and ``/v1/new-title-request`` are
+scheduled. Batch work that fans out over its own process pool
+(``/v1/validate/batch``, ``/v1/new-title-request/batch`` and ingest jobs)
+cannot wait for a threadpool slot, so ``bulk_workers`` caps those pools at
+the bulk lane's slots instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import itertools
+import math
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils import metrics, pool, profiling
+
+
+__all__ = [
+    "BULK",
+    "INTERACTIVE",
+    "LANES",
+    "CostScheduler",
+    "bulk_workers",
+    "estimate_ingest_cost",
+    "estimate_render_cost",
+    "estimate_title_request_cost",
+    "get_scheduler",
+    "reset_scheduler",
+]
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+WORKERS_ENV_VARIABLE = "SCHEDULER_WORKERS"
+BULK_SLOTS_ENV_VARIABLE = "SCHEDULER_BULK_SLOTS"
+AGING_ENV_VARIABLE = "SCHEDULER_AGING_MS_PER_S"
+DEFAULT_AGING_MS_PER_S = 1000.0
+
+# Cost model in milliseconds, fitted on the sample template (render time grows
+# with instrument rows; ingest with pages and bytes, far more so under OCR).
+RENDER_BASE_MS = 120.0
+RENDER_PER_INSTRUMENT_MS = 8.0
+RENDER_PER_PARTY_MS = 5.0
+INGEST_BASE_MS = 20.0
+INGEST_PER_PAGE_MS = 5.0
+INGEST_PER_MB_MS = 10.0
+OCR_PER_PAGE_MS = 1500.0
+
+_INSTRUMENT_TAG = re.compile(r"<Instrument[\s>]")
+_PARTY_TAG = re.compile(r"<Party[\s>]")
+
+T = TypeVar("T")
+
+
+def estimate_render_cost(xml: str) -> float:
+    """Estimated render time for a title document, from its instrument and party counts."""
+
+    instruments = len(_INSTRUMENT_TAG.findall(xml))
+    parties = len(_PARTY_TAG.findall(xml))
+    return RENDER_BASE_MS + RENDER_PER_INSTRUMENT_MS * instruments + RENDER_PER_PARTY_MS * parties
+
+
+def estimate_title_request_cost(request: Mapping[str, Any]) -> float:
+    """Estimated build-and-render time for a new title request (one instrument, its listed parties)."""
+
+    groups = request.get("owner_groups") or []
+    parties = sum(len(group.get("parties") or []) for group in groups) or 1
+    return RENDER_BASE_MS + RENDER_PER_INSTRUMENT_MS + RENDER_PER_PARTY_MS * parties
+
+
+def estimate_ingest_cost(pages: int, size_bytes: int, ocr_pages: int = 0) -> float:
+    """Estimated ingest time for a PDF; ``ocr_pages`` counts pages expected to need OCR."""
+
+    return (
+        INGEST_BASE_MS
+        + INGEST_PER_PAGE_MS * pages
+        + INGEST_PER_MB_MS * size_bytes / (1024 * 1024)
+        + OCR_PER_PAGE_MS * ocr_pages
+    )
+
+
+@dataclass(slots=True)
+class _Job:
+    lane: str
+    cost: float
+    seq: int
+    future: "asyncio.Future[None]"
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class CostScheduler:
+    def __init__(self, workers: int, bulk_slots: int, aging_ms_per_s: float = DEFAULT_AGING_MS_PER_S) -> None:
+        self.workers = max(1, workers)
+        self.bulk_slots = min(max(1, bulk_slots), self.workers)
+        self.aging_ms_per_s = aging_ms_per_s
+        self.running: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.completed: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.wait_s: Dict[str, float] = {lane: 0.0 for lane in LANES}
+        self._waiting: Dict[str, List[_Job]] = {lane: [] for lane in LANES}
+        self._seq = itertools.count()
+
+    def _can_start(self, lane: str) -> bool:
+        if sum(self.running.values()) >= self.workers:
+            return False
+        return lane == INTERACTIVE or self.running[BULK] < self.bulk_slots
+
+    def _publish(self, lane: str) -> None:
+        metrics.set_queue_depth(f"scheduler:{lane}", len(self._waiting[lane]), self.running[lane])
+
+    def _start(self, lane: str) -> None:
+        self.running[lane] += 1
+        self._publish(lane)
+
+    def _priority(self, job: _Job, now: float) -> float:
+        return job.cost - self.aging_ms_per_s * (now - job.enqueued_at)
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        for lane in LANES:
+            waiting = self._waiting[lane]
+            while waiting and self._can_start(lane):
+                job = min(waiting, key=lambda candidate: (self._priority(candidate, now), candidate.seq))
+                waiting.remove(job)
+                self._start(lane)
+                job.future.set_result(None)
+
+    async def _acquire(self, lane: str, cost: float) -> None:
+        if lane not in self.running:
+            raise ValueError(f"Unknown scheduler lane {lane!r}; expected one of {LANES}.")
+        # Interactive work always waits behind nothing; bulk also yields to queued interactive work.
+        idle_lane = not self._waiting[lane] and (lane == INTERACTIVE or not self._waiting[INTERACTIVE])
+        if idle_lane and self._can_start(lane):
+            self._start(lane)
+            return
+        job = _Job(lane=lane, cost=cost, seq=next(self._seq), future=asyncio.get_running_loop().create_future())
+        self._waiting[lane].append(job)
+        self._publish(lane)
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            if job.future.done() and not job.future.cancelled():
+                self._release(lane)
+            else:
+                self._waiting[lane].remove(job)
+                self._publish(lane)
+            raise
+        self.wait_s[lane] += time.monotonic() - job.enqueued_at
+
+    def _release(self, lane: str) -> None:
+        self.running[lane] -= 1
+        self._publish(lane)
+        self._dispatch()
+
+    async def run(self, fn: Callable[[], T], cost: float = RENDER_BASE_MS, lane: str = INTERACTIVE) -> T:
+        """Run ``fn`` in the threadpool once the scheduler gives it a slot."""
+
+        await self._acquire(lane, cost)
+        try:
+            return await run_in_threadpool(profiling.wrap(fn))
+        finally:
+            self.completed[lane] += 1
+            self._release(lane)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "workers": self.workers,
+            "bulk_slots": self.bulk_slots,
+            "lanes": {
+                lane: {
+                    "running": self.running[lane],
+                    "waiting": len(self._waiting[lane]),
+                    "completed": self.completed[lane],
+                    "wait_s": round(self.wait_s[lane], 3),
+                }
+                for lane in LANES
+            },
+        }
+
+
+_SCHEDULER: Optional[CostScheduler] = None
+
+
+def get_scheduler() -> CostScheduler:
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        workers = int(os.getenv(WORKERS_ENV_VARIABLE, pool.default_workers()))
+        # By default bulk work may use half the slots (at least one), leaving the rest for interactive requests.
+        bulk_slots = int(os.getenv(BULK_SLOTS_ENV_VARIABLE, max(1, math.ceil(workers / 2))))
+        _SCHEDULER = CostScheduler(workers, bulk_slots, float(os.getenv(AGING_ENV_VARIABLE, DEFAULT_AGING_MS_PER_S)))
+    return _SCHEDULER
+
+
+def bulk_workers(requested: Optional[int] = None) -> int:
+    """Process-pool size for bulk work that runs its own pool: ``requested`` (default: all), capped at the bulk slots.
+
+    ``0`` and ``1`` keep their inline meaning.
+    """
+
+    slots = get_scheduler().bulk_slots
+    return slots if requested is None else min(requested, slots)
+
+
+def reset_scheduler() -> None:
+    global _SCHEDULER
+    _SCHEDULER = None
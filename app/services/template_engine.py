@@ -7,6 +7,8 @@ from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from lxml import etree
+
+from app.utils import profiling
 class XPathBinder:
     def __init__(self, root: etree._Element):
         self.root = root
@@ -442,7 +444,12 @@ def compose(template: Dict[str, Any], xml_root: etree._Element) -> List[List[Dic
     binder = XPathBinder(xml_root)
     composer = ElementComposer(context, binder)
 
+    profile = profiling.current()
     for element in template.get("elements", []):
-        composer.compose(element)
+        if profile is None:
+            composer.compose(element)
+        else:
+            with profile.span(f"compose.{element.get('type', 'unknown')}"):
+                composer.compose(element)
 
     return context.pages
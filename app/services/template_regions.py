@@ -0,0 +1,224 @@
+"""Compile template JSON into page regions for geometry-driven PDF ingest.
+
+Certificates rendered from our own templates place every field at a known
+position. This module turns a template into rectangles (in the top-left page
+space shared by the template and PyMuPDF) for each bound text box and each
+repeating table, together with the XPath each piece of text came from, so the
+ingest path can clip extraction to those regions instead of parsing whole
+pages heuristically.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+__all__ = ["BoxLine", "BoxRegion", "TableColumn", "TableRegion", "TemplateGeometry", "compile_geometry", "load_geometry"]
+
+
+DEFAULT_TEMPLATE_PATH = Path("app/data/templates")
+
+Rect = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class BoxLine:
+    """One ``'\\n'``-separated segment of a text box binding."""
+
+    label: Optional[str]
+    xpaths: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class BoxRegion:
+    rect: Rect
+    lines: Tuple[BoxLine, ...]
+
+
+@dataclass(frozen=True)
+class TableColumn:
+    header: str
+    binding: str
+    x0: float
+    x1: float
+
+
+@dataclass(frozen=True)
+class TableRegion:
+    binding: str
+    header_rect: Rect
+    body_top: float
+    # Lower bound on the first page: the top of the next element laid out below the table.
+    first_page_bottom: float
+    columns: Tuple[TableColumn, ...]
+
+
+@dataclass(frozen=True)
+class TemplateGeometry:
+    template_id: str
+    page_width: float
+    page_height: float
+    bottom_limit: float
+    boxes: Tuple[BoxRegion, ...]
+    tables: Tuple[TableRegion, ...]
+
+    @property
+    def extent(self) -> Rect:
+        """Bounding rectangle of every region, used to clip page text extraction."""
+
+        rects = [box.rect for box in self.boxes]
+        rects += [(*table.header_rect[:3], self.bottom_limit) for table in self.tables]
+        if not rects:
+            return (0.0, 0.0, self.page_width, self.page_height)
+        return (
+            min(rect[0] for rect in rects),
+            min(rect[1] for rect in rects),
+            max(rect[2] for rect in rects),
+            max(rect[3] for rect in rects),
+        )
+
+
+def _split_args(expr: str) -> List[str]:
+    """Split the top-level comma-separated arguments of an XPath function call body."""
+
+    args: List[str] = []
+    depth = 0
+    quote: Optional[str] = None
+    current: List[str] = []
+    for char in expr:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+            continue
+        if char in ("'", '"'):
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            args.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if current:
+        args.append("".join(current).strip())
+    return args
+
+
+def _binding_lines(binding: str) -> Tuple[BoxLine, ...]:
+    """Describe each rendered line of a text box binding as (label, xpaths).
+
+    ``concat('Title Number: ', /X/TitleNumber, '\\n', 'LINC: ', /X/LINC)`` yields two lines
+    labelled ``'Title Number:'`` and ``'LINC:'``. Plain XPath bindings produce one line.
+    """
+
+    text = binding.strip()
+    if not (text.startswith("concat(") and text.endswith(")")):
+        return (BoxLine(label=None, xpaths=(text,)),)
+
+    lines: List[BoxLine] = []
+    label_parts: List[str] = []
+    xpaths: List[str] = []
+
+    def flush() -> None:
+        label = "".join(label_parts).strip() or None
+        if label or xpaths:
+            lines.append(BoxLine(label=label, xpaths=tuple(xpaths)))
+
+    for arg in _split_args(text[len("concat(") : -1]):
+        if arg[:1] in ("'", '"'):
+            literal = arg[1:-1]
+            segments = literal.split("\n")
+            for idx, segment in enumerate(segments):
+                if idx > 0:
+                    flush()
+                    label_parts, xpaths = [], []
+                if not xpaths:
+                    label_parts.append(segment)
+        else:
+            xpaths.append(arg)
+    flush()
+    return tuple(lines)
+
+
+def _element_top(element: Dict[str, Any]) -> Optional[float]:
+    if element.get("type") == "Rule":
+        return min(float(element.get("y1", 0)), float(element.get("y2", 0)))
+    if "y" not in element:
+        return None
+    y = float(element["y"])
+    # Text elements are positioned by baseline; their glyphs rise one font size above it.
+    if element.get("type") in ("StaticText", "DynamicText"):
+        return y - float(element.get("size", 10))
+    return y
+
+
+def compile_geometry(template: Dict[str, Any]) -> TemplateGeometry:
+    page = template.get("page", {})
+    page_width = float(page.get("width", 612))
+    page_height = float(page.get("height", 792))
+    margins = page.get("margins", {})
+    bottom_limit = page_height - float(margins.get("b", 36))
+    left = float(margins.get("l", 36))
+    top = float(margins.get("t", 36))
+    # Baseline-grid snapping can move a line by up to half a leading in either direction.
+    slack = float(page.get("baseline", {}).get("leading", 0)) / 2
+
+    elements: Sequence[Dict[str, Any]] = template.get("elements", [])
+    boxes: List[BoxRegion] = []
+    tables: List[TableRegion] = []
+    for position, element in enumerate(elements):
+        etype = element.get("type")
+        if etype == "TextBox" and element.get("binding") and element.get("width") and element.get("height"):
+            x = float(element.get("x", left))
+            y = float(element.get("y", top))
+            rect = (x, y - slack, x + float(element["width"]), y + float(element["height"]) + slack)
+            boxes.append(BoxRegion(rect=rect, lines=_binding_lines(element["binding"])))
+        elif etype == "RepeatingTable" and element.get("columns"):
+            x = float(element.get("x", left))
+            y = float(element.get("y", top))
+            row_size = float(element.get("row_size", 9))
+            row_leading = float(element.get("row_leading", row_size * 1.2))
+            header_size = float(element.get("header_size", 9))
+            header_leading = float(element.get("header_leading", header_size * 1.2))
+            header_gap = float(element.get("header_gap", row_leading))
+            columns: List[TableColumn] = []
+            cursor = x
+            for column in element["columns"]:
+                width = float(column.get("width", 60))
+                columns.append(TableColumn(column.get("header", ""), column.get("binding") or "", cursor, cursor + width))
+                cursor += width
+            following = [_element_top(other) for other in elements[position + 1 :]]
+            below = [value for value in following if value is not None and value > y]
+            tables.append(
+                TableRegion(
+                    binding=element.get("binding", ""),
+                    header_rect=(x, y - slack, cursor, y + header_leading + slack),
+                    body_top=y + header_leading,
+                    first_page_bottom=min(below) if below else bottom_limit,
+                    columns=tuple(columns),
+                )
+            )
+
+    return TemplateGeometry(
+        template_id=str(template.get("template_id", "")),
+        page_width=page_width,
+        page_height=page_height,
+        bottom_limit=bottom_limit,
+        boxes=tuple(boxes),
+        tables=tuple(tables),
+    )
+
+
+@lru_cache(maxsize=16)
+def load_geometry(template_id: str) -> TemplateGeometry:
+    template_path = DEFAULT_TEMPLATE_PATH / f"{template_id}.json"
+    if not template_path.exists():
+        raise FileNotFoundError(f"Template not found: {template_path}")
+    return compile_geometry(json.loads(template_path.read_text(encoding="utf-8")))
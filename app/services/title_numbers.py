@@ -1,12 +1,136 @@
+"""Title number reservation.
+
+Sequential numbers come from a counter persisted in SQLite (WAL mode) and
+shared by every worker process. Each process leases a block of numbers with
+one short write transaction and then hands them out from memory under a
+lock, so the hot path does no I/O. A block is consumed from the database
+before any of its numbers are issued: a crash can leave gaps, never
+duplicates.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
 import uuid
-_counter = 1000000
 
-def reserve(strategy: str = "sequential", seed: str | None = None) -> str:
-    global _counter
+from app.utils import metrics
+
+
+__all__ = ["TitleNumberAllocator", "reserve", "reserve_many", "reset_allocator"]
+
+
+DB_PATH_ENV_VARIABLE = "TITLE_NUMBER_DB"
+DEFAULT_DB_PATH = "var/title_numbers.sqlite3"
+BLOCK_SIZE_ENV_VARIABLE = "TITLE_NUMBER_BLOCK_SIZE"
+DEFAULT_BLOCK_SIZE = 100
+# The first sequential number issued; matches the counter the in-memory allocator started from.
+FIRST_NUMBER = 1000001
+SEQUENCE_NAME = "title_number"
+MAX_RESERVE_COUNT = 1000
+
+
+class TitleNumberAllocator:
+    """Hand out unique sequential numbers from blocks leased out of a SQLite counter."""
+
+    def __init__(self, path: str, block_size: int = DEFAULT_BLOCK_SIZE, first_number: int = FIRST_NUMBER) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = os.getpid()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sequences (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)")
+            conn.execute(
+                "INSERT OR IGNORE INTO sequences (name, next_value) VALUES (?, ?)", (SEQUENCE_NAME, first_number)
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Leases are rare, so a short-lived connection per lease keeps the allocator fork- and thread-safe.
+        return sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+
+    def _lease(self, size: int) -> Tuple[int, int]:
+        """Claim ``[start, start + size)`` from the shared counter."""
+
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front, so concurrent leases serialise instead of racing.
+            conn.execute("BEGIN IMMEDIATE")
+            (start,) = conn.execute("SELECT next_value FROM sequences WHERE name = ?", (SEQUENCE_NAME,)).fetchone()
+            conn.execute("UPDATE sequences SET next_value = ? WHERE name = ?", (start + size, SEQUENCE_NAME))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        metrics.title_number_lease()
+        return start, start + size
+
+    def reserve_many(self, count: int) -> List[int]:
+        if count < 1:
+            raise ValueError("count must be at least 1.")
+        numbers: List[int] = []
+        with self._lock:
+            if os.getpid() != self._pid:
+                # A forked child must not reuse the block its parent leased.
+                self._pid, self._next, self._end = os.getpid(), 0, 0
+            while len(numbers) < count:
+                if self._next >= self._end:
+                    self._next, self._end = self._lease(max(self.block_size, count - len(numbers)))
+                take = min(count - len(numbers), self._end - self._next)
+                numbers.extend(range(self._next, self._next + take))
+                self._next += take
+        return numbers
+
+    def reserve(self) -> int:
+        return self.reserve_many(1)[0]
+
+
+_ALLOCATOR: Optional[TitleNumberAllocator] = None
+_ALLOCATOR_LOCK = threading.Lock()
+
+
+def _allocator() -> TitleNumberAllocator:
+    global _ALLOCATOR
+    with _ALLOCATOR_LOCK:
+        path = os.getenv(DB_PATH_ENV_VARIABLE, DEFAULT_DB_PATH)
+        if _ALLOCATOR is None or _ALLOCATOR.path != path:
+            block_size = int(os.getenv(BLOCK_SIZE_ENV_VARIABLE, DEFAULT_BLOCK_SIZE))
+            _ALLOCATOR = TitleNumberAllocator(path, block_size=block_size)
+        return _ALLOCATOR
+
+
+def reset_allocator() -> None:
+    """Drop the process allocator; its unused leased numbers are skipped, not reissued."""
+
+    global _ALLOCATOR
+    with _ALLOCATOR_LOCK:
+        _ALLOCATOR = None
+
+
+def reserve_many(count: int, strategy: str = "sequential", seed: str | None = None) -> List[str]:
+    if count < 1 or count > MAX_RESERVE_COUNT:
+        raise ValueError(f"count must be between 1 and {MAX_RESERVE_COUNT}.")
     if strategy == "uuid":
-        return str(uuid.uuid4()).upper()
+        numbers = [str(uuid.uuid4()).upper() for _ in range(count)]
     elif strategy == "external":
-        return seed or "PENDING-EXT"
+        if count != 1:
+            raise ValueError("The external strategy reserves a single caller-supplied number.")
+        numbers = [seed or "PENDING-EXT"]
     else:
-        _counter += 1
-        return f"{_counter}"
+        strategy = "sequential"
+        numbers = [str(number) for number in _allocator().reserve_many(count)]
+    metrics.title_numbers_allocated(strategy, len(numbers))
+    return numbers
+
+
+def reserve(strategy: str = "sequential", seed: str | None = None) -> str:
+    return reserve_many(1, strategy=strategy, seed=seed)[0]
@@ -11,7 +11,7 @@ from typing import Dict, Iterable, List, Optional, Sequence
 from lxml import etree
 
 from app.services.ascii_parser import build_document_tree
-from app.utils import hashing
+from app.utils import hashing, metrics
 
 
 DEFAULT_TEMPLATE_ID = "alberta_title_v1"
@@ -142,6 +142,13 @@ def _collect_party_names(groups: Iterable[Dict[str, object]]) -> List[str]:
     return names
 
 
+def request_seed(reference_number: str, buyer_name: str, purchase_date: date) -> str:
+    """The seed the derived title, registration and LINC numbers are hashed from."""
+
+    return f"{reference_number}|{buyer_name}|{purchase_date.isoformat()}"
+
+
+@metrics.timed("xml_build")
 def build_new_title_xml(
     *,
     reference_number: str,
@@ -170,7 +177,7 @@ def build_new_title_xml(
     if not municipality_name.strip():
         raise ValueError("municipality is required")
 
-    title_seed = f"{reference_number}|{buyer_name}|{purchase_date.isoformat()}"
+    title_seed = request_seed(reference_number, buyer_name, purchase_date)
     resolved_title_number = _resolve_numeric(title_number, seed=title_seed, length=12)
     resolved_registration = _resolve_numeric(registration_number, seed=f"{title_seed}|REG", length=12)
     resolved_linc = _resolve_numeric(linc_number, seed=f"{title_seed}|LINC", length=10)
@@ -0,0 +1,342 @@
+"""New title request pipeline: build canonical XML, validate it, render the PDF.
+
+``produce_title`` runs the pipeline for one request; ``produce_batch`` fans
+many requests out over a process pool and ``stream_zip`` packs the results
+into a ZIP (PDFs plus a ``manifest.json``) written chunk by chunk, so a
+month-end batch streams back without holding every PDF in memory. Requests
+are plain mappings (``NewTitleRequest.model_dump()``) so they pickle cheaply
+into worker processes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+import zipfile
+
+from lxml import etree
+
+from app.services import renderer, title_request_builder, xml_validator
+from app.utils import pool
+
+
+__all__ = [
+    "TitleBatchItem",
+    "TitleBatchResult",
+    "TitleBatchSummary",
+    "TitleProduct",
+    "TitleRequestError",
+    "iter_json_array",
+    "iter_ndjson",
+    "produce_batch",
+    "produce_title",
+    "stream_zip",
+]
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+class TitleRequestError(RuntimeError):
+    """A pipeline stage failed; ``status_code`` and ``detail`` mirror the HTTP error to report."""
+
+    def __init__(self, status_code: int, detail: Any) -> None:
+        super().__init__(detail if isinstance(detail, str) else detail.get("message", str(detail)))
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass(slots=True)
+class TitleProduct:
+    build: title_request_builder.TitleBuildResult
+    pdf: bytes
+
+    @property
+    def filename(self) -> str:
+        return f"title_{self.build.title_number}.pdf"
+
+
+def _build(request: Mapping[str, Any]) -> title_request_builder.TitleBuildResult:
+    purchase_date = request["purchase_date"]
+    if isinstance(purchase_date, str):
+        purchase_date = date.fromisoformat(purchase_date)
+    try:
+        return title_request_builder.build_new_title_xml(
+            reference_number=request["reference_number"],
+            buyer_name=request["buyer_name"],
+            purchase_price=Decimal(str(request["purchase_price"])),
+            purchase_date=purchase_date,
+            legal_description=request["legal_description"],
+            municipality_name=request["municipality"],
+            municipality_code=request.get("municipality_code"),
+            title_number=request.get("title_number"),
+            registration_number=request.get("registration_number"),
+            linc_number=request.get("linc_number"),
+            rights_type=request.get("rights_type") or title_request_builder.DEFAULT_RIGHTS_TYPE,
+            estate=request.get("estate") or title_request_builder.DEFAULT_ESTATE,
+            tenancy_type=request.get("tenancy_type") or title_request_builder.DEFAULT_TENANCY_TYPE,
+            owner_groups=request.get("owner_groups") or None,
+        )
+    except ValueError as exc:
+        raise TitleRequestError(400, str(exc)) from exc
+
+
+def produce_title(request: Mapping[str, Any]) -> TitleProduct:
+    """Build, validate and render one new title request.
+
+    Raises ``TitleRequestError`` carrying the status the single-request
+    endpoint has always returned for each failure: 400 for bad input, 500 for
+    XML that fails SPIN2 validation, 404 for an unknown template, 503 when a
+    render dependency is missing and 422 for other render failures.
+    """
+
+    build = _build(request)
+
+    valid, validation_errors = xml_validator.validate(build.xml)
+    if not valid:
+        raise TitleRequestError(
+            500, {"message": "Generated XML failed SPIN2 validation.", "errors": validation_errors}
+        )
+
+    template_id = request.get("template_id") or title_request_builder.DEFAULT_TEMPLATE_ID
+    options = dict(request.get("render_options") or {})
+    options.setdefault("pdfa", True)
+
+    try:
+        pdf_bytes = renderer.render(build.xml, template_id=template_id, options=options)
+    except etree.XMLSyntaxError as exc:
+        raise TitleRequestError(500, f"Generated XML not well-formed: {exc}") from exc
+    except FileNotFoundError as exc:
+        raise TitleRequestError(404, str(exc)) from exc
+    except RuntimeError as exc:
+        raise TitleRequestError(503, str(exc)) from exc
+    except Exception as exc:
+        raise TitleRequestError(422, f"Failed to render generated PDF: {exc}") from exc
+    return TitleProduct(build=build, pdf=pdf_bytes)
+
+
+# ---------------------------------------------------------------------------
+# Batches
+
+
+@dataclass(slots=True)
+class TitleBatchItem:
+    """One request in a batch; items that failed to decode or validate carry ``error`` instead."""
+
+    index: int
+    source: str
+    request: Optional[Dict[str, Any]] = None
+    error: Optional[Any] = None
+    status_code: int = 422
+
+
+@dataclass(slots=True)
+class TitleBatchResult:
+    index: int
+    source: str
+    ok: bool
+    elapsed_ms: float
+    status_code: int = 200
+    reference_number: Optional[str] = None
+    title_number: Optional[str] = None
+    registration_number: Optional[str] = None
+    linc_number: Optional[str] = None
+    filename: Optional[str] = None
+    error: Optional[Any] = None
+    pdf: Optional[bytes] = None
+
+    def asdict(self) -> Dict[str, object]:
+        return {
+            "index": self.index,
+            "source": self.source,
+            "ok": self.ok,
+            "status_code": self.status_code,
+            "reference_number": self.reference_number,
+            "title_number": self.title_number,
+            "registration_number": self.registration_number,
+            "linc_number": self.linc_number,
+            "filename": self.filename,
+            "error": self.error,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+@dataclass
+class TitleBatchSummary:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    def record(self, result: TitleBatchResult) -> None:
+        self.total += 1
+        if result.ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed_s(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return max(end - self.started_at, 0.0)
+
+    def asdict(self) -> Dict[str, object]:
+        elapsed = self.elapsed_s
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "elapsed_s": round(elapsed, 3),
+            "titles_per_second": round(self.total / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+def _decode_record(index: int, label: str, record: Any) -> TitleBatchItem:
+    if isinstance(record, dict):
+        return TitleBatchItem(index=index, source=label, request=record)
+    return TitleBatchItem(index=index, source=label, error="Each batch entry must be a JSON object.")
+
+
+def iter_json_array(data: bytes) -> Iterator[TitleBatchItem]:
+    """Yield the entries of a JSON array body; a body that is not an array raises ``ValueError``."""
+
+    records = json.loads(data)
+    if not isinstance(records, list):
+        raise ValueError("Batch body must be a JSON array of new title requests.")
+    for index, record in enumerate(records):
+        yield _decode_record(index, f"item:{index}", record)
+
+
+def iter_ndjson(stream: Iterable[bytes | str]) -> Iterator[TitleBatchItem]:
+    index = 0
+    for line_no, raw in enumerate(stream, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        raw = raw.strip()
+        if not raw:
+            continue
+        label = f"line:{line_no}"
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as exc:
+            yield TitleBatchItem(index=index, source=label, error=f"Invalid NDJSON line: {exc.msg}")
+        else:
+            yield _decode_record(index, label, record)
+        index += 1
+
+
+def _init_worker() -> None:
+    # Compile the schema once per worker; a missing XSD is reported per item.
+    try:
+        xml_validator._load_schema()
+    except Exception:  # pragma: no cover - surfaced per item
+        pass
+
+
+def _produce_item(item: TitleBatchItem) -> TitleBatchResult:
+    started = time.perf_counter()
+    reference = (item.request or {}).get("reference_number")
+    if item.error is not None or item.request is None:
+        return TitleBatchResult(
+            item.index, item.source, False, 0.0, status_code=item.status_code, reference_number=reference, error=item.error
+        )
+    try:
+        product = produce_title(item.request)
+    except TitleRequestError as exc:
+        return TitleBatchResult(
+            item.index,
+            item.source,
+            False,
+            (time.perf_counter() - started) * 1000,
+            status_code=exc.status_code,
+            reference_number=reference,
+            error=exc.detail,
+        )
+    return TitleBatchResult(
+        item.index,
+        item.source,
+        True,
+        (time.perf_counter() - started) * 1000,
+        reference_number=reference,
+        title_number=product.build.title_number,
+        registration_number=product.build.registration_number,
+        linc_number=product.build.linc_number,
+        filename=product.filename,
+        pdf=product.pdf,
+    )
+
+
+def produce_batch(items: Iterable[TitleBatchItem], workers: Optional[int] = None) -> Iterator[TitleBatchResult]:
+    """Run ``produce_title`` over many requests, yielding results as they finish.
+
+    ``workers`` defaults to the CPU count; ``0`` or ``1`` runs inline. A
+    failing item yields a result with ``ok=False`` and never stops the batch.
+    Results arrive in completion order; ``index`` gives the input position.
+    """
+
+    return pool.imap_unordered(_produce_item, items, workers=workers, initializer=_init_worker)
+
+
+class _ZipSink:
+    """Write-only file object that lets ``zipfile`` emit an archive in pieces."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, index: int, used: set) -> str:
+    name = f"pdfs/{filename}"
+    if name in used:
+        stem = filename[:-4] if filename.endswith(".pdf") else filename
+        name = f"pdfs/{stem}-{index}.pdf"
+    used.add(name)
+    return name
+
+
+def stream_zip(results: Iterable[TitleBatchResult], summary: Optional[TitleBatchSummary] = None) -> Iterator[bytes]:
+    """Yield a ZIP archive of the rendered PDFs followed by ``manifest.json``.
+
+    Each PDF is written (stored; PDFs are already compressed) as soon as its
+    result arrives. The manifest lists every item in input order with its
+    title, registration and LINC numbers or its error, plus the batch summary.
+    """
+
+    summary = summary or TitleBatchSummary()
+    sink = _ZipSink()
+    entries: List[Dict[str, object]] = []
+    used: set = set()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:  # type: ignore[arg-type]
+        for result in results:
+            summary.record(result)
+            if result.ok and result.pdf is not None and result.filename:
+                result.filename = _unique_name(result.filename, result.index, used)
+                archive.writestr(result.filename, result.pdf)
+            entries.append(result.asdict())
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        summary.finish()
+        manifest = {"summary": summary.asdict(), "items": sorted(entries, key=lambda entry: entry["index"])}
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
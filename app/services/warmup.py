@@ -0,0 +1,151 @@
+"""Eager start-up work, so no request lands on a cold worker.
+
+The first render or ingest in a fresh process otherwise pays for importing
+ReportLab and PyMuPDF, compiling the SPIN 2 schema, registering fonts,
+loading and composing templates, decoding the crest and the first QR encode.
+``start`` runs those steps in a background thread when the app starts;
+``is_ready`` (served by ``/readyz``) stays false until every step has
+succeeded. A failed step is logged and reported by ``status`` and keeps the
+worker out of rotation, since the requests it warms would fail the same way.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lxml import etree
+
+from . import font_registry, pdf_ingest, renderer, xml_validator
+from .template_engine import compose
+
+
+__all__ = ["WarmupStep", "is_ready", "reset", "run", "start", "status"]
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Smallest document every template can bind against.
+WARMUP_XML = "<Title><TitleNumber>WARMUP</TitleNumber><Owners/><Instruments/></Title>"
+
+
+@dataclass(slots=True)
+class WarmupStep:
+    name: str
+    seconds: float
+    error: Optional[str] = None
+
+    def asdict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def _import_reportlab() -> None:
+    from reportlab.lib.utils import ImageReader  # noqa: F401
+    from reportlab.pdfbase import pdfmetrics  # noqa: F401
+    from reportlab.pdfgen import canvas  # noqa: F401
+
+
+def _import_pymupdf() -> None:
+    pdf_ingest._import_fitz()
+
+
+def _compile_schema() -> None:
+    xml_validator._load_schema()
+
+
+def _register_fonts() -> None:
+    font_registry.register_directory(str(renderer.ASSET_FONT_DIR))
+
+
+def _template_ids() -> List[str]:
+    return sorted(path.stem for path in renderer.DEFAULT_TEMPLATE_PATH.glob("*.json"))
+
+
+def _load_templates() -> None:
+    xml_root = etree.fromstring(WARMUP_XML.encode("utf-8"))
+    for template_id in _template_ids():
+        compose(renderer._load_template(template_id), xml_root)
+
+
+def _load_images() -> None:
+    for template_id in _template_ids():
+        for element in renderer._load_template(template_id).get("elements", []):
+            if element.get("type") == "Image" and element.get("path"):
+                renderer._image_reader(str(element["path"]))
+
+
+def _encode_qr() -> None:
+    renderer._generate_qr_image("warm-up")
+
+
+STEPS: Tuple[Tuple[str, Callable[[], None]], ...] = (
+    ("reportlab", _import_reportlab),
+    ("pymupdf", _import_pymupdf),
+    ("schema", _compile_schema),
+    ("fonts", _register_fonts),
+    ("templates", _load_templates),
+    ("images", _load_images),
+    ("qr", _encode_qr),
+)
+
+
+_LOCK = threading.Lock()
+_READY = threading.Event()
+_STEPS: List[WarmupStep] = []
+_THREAD: Optional[threading.Thread] = None
+
+
+def run() -> List[WarmupStep]:
+    """Run every warm-up step in order; the worker is ready once all of them succeed."""
+
+    steps: List[WarmupStep] = []
+    for name, step in STEPS:
+        started = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            LOGGER.warning("Warm-up step %s failed: %s", name, error)
+        steps.append(WarmupStep(name=name, seconds=round(time.perf_counter() - started, 4), error=error))
+        with _LOCK:
+            _STEPS[:] = steps
+    if all(step.error is None for step in steps):
+        _READY.set()
+        LOGGER.info("Warm-up finished in %.2fs.", sum(step.seconds for step in steps))
+    return steps
+
+
+def start() -> threading.Thread:
+    """Start the warm-up in a background thread, once per process."""
+
+    global _THREAD
+    with _LOCK:
+        if _THREAD is None:
+            _THREAD = threading.Thread(target=run, name="warmup", daemon=True)
+            _THREAD.start()
+        return _THREAD
+
+
+def is_ready() -> bool:
+    return _READY.is_set()
+
+
+def status() -> Dict[str, object]:
+    with _LOCK:
+        steps = [step.asdict() for step in _STEPS]
+        running = _THREAD is not None and _THREAD.is_alive()
+    return {"ready": is_ready(), "warming_up": running, "steps": steps}
+
+
+def reset() -> None:
+    """Forget the warm-up state (tests)."""
+
+    global _THREAD
+    with _LOCK:
+        _READY.clear()
+        _STEPS.clear()
+        _THREAD = None
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
 
 from lxml import etree
 import os
@@ -12,16 +12,39 @@ import threading
 from io import BytesIO
 from xmlschema import XMLSchema, XMLSchemaException
 
+from app.utils import hashing, metrics
+from app.utils.cache import JsonDiskCache, LRUCache
 
-__all__ = ["validate", "reset_schema_cache"]
+
+__all__ = [
+    "validate",
+    "validate_stream",
+    "validate_subtree",
+    "reset_schema_cache",
+    "reset_validation_cache",
+    "schema_hash",
+    "canonical_hash",
+]
 
 
 DEFAULT_XSD_PATH = Path("app/data/xsd/spin2_title_result.xsd")
 XSD_ENV_VARIABLE = "SPIN2_XSD_PATH"
+CACHE_SIZE_ENV_VARIABLE = "SPIN2_VALIDATION_CACHE_SIZE"
+CACHE_DIR_ENV_VARIABLE = "SPIN2_VALIDATION_CACHE_DIR"
+DEFAULT_CACHE_SIZE = 4096
+
+ROOT_TAG = "ProductTitleResult"
+TITLE_SCHEMA_PATH = "ProductTitleResult/TitleData/Title"
 
 _SCHEMA_LOCK = threading.Lock()
 _SCHEMA_CACHE: Optional[XMLSchema] = None
 _SCHEMA_PATH_CACHE: Optional[Path] = None
+_SCHEMA_HASH_CACHE: Optional[str] = None
+_DECLARATION_CACHE: Dict[str, object] = {}
+
+_RESULT_CACHE: LRUCache[str, Dict[str, object]] = LRUCache(
+    int(os.getenv(CACHE_SIZE_ENV_VARIABLE, str(DEFAULT_CACHE_SIZE)))
+)
 
 
 @dataclass(slots=True)
@@ -52,7 +75,7 @@ def _resolve_schema_path() -> Path:
 
 
 def _load_schema() -> XMLSchema:
-    global _SCHEMA_CACHE, _SCHEMA_PATH_CACHE
+    global _SCHEMA_CACHE, _SCHEMA_PATH_CACHE, _SCHEMA_HASH_CACHE
     schema_path = _resolve_schema_path().resolve()
     with _SCHEMA_LOCK:
         if _SCHEMA_CACHE is not None and _SCHEMA_PATH_CACHE == schema_path:
@@ -74,19 +97,88 @@ def _load_schema() -> XMLSchema:
 
         _SCHEMA_CACHE = schema
         _SCHEMA_PATH_CACHE = schema_path
+        _SCHEMA_HASH_CACHE = hashing.sha256_hex(data)
+        _DECLARATION_CACHE.clear()
         return schema
 
 
 def reset_schema_cache() -> None:
     """Clear the in-memory schema cache (primarily for tests)."""
 
-    global _SCHEMA_CACHE, _SCHEMA_PATH_CACHE
+    global _SCHEMA_CACHE, _SCHEMA_PATH_CACHE, _SCHEMA_HASH_CACHE
     with _SCHEMA_LOCK:
         _SCHEMA_CACHE = None
         _SCHEMA_PATH_CACHE = None
+        _SCHEMA_HASH_CACHE = None
+        _DECLARATION_CACHE.clear()
+
+
+def reset_validation_cache() -> None:
+    """Drop all in-memory validation results (the disk tier is left untouched)."""
+
+    _RESULT_CACHE.clear()
+
+
+def schema_hash() -> str:
+    """SHA-256 of the XSD bytes backing the cached schema."""
+
+    _load_schema()
+    assert _SCHEMA_HASH_CACHE is not None
+    return _SCHEMA_HASH_CACHE
+
+
+def canonical_hash(xml_bytes: bytes) -> str:
+    """SHA-256 of the exclusive C14N form of a document.
+
+    Ignorable whitespace and comments are dropped before canonicalisation so
+    pretty-printed and compact serialisations of the same content collide.
+    """
+
+    parser = etree.XMLParser(remove_blank_text=True, remove_comments=True)
+    document = etree.fromstring(xml_bytes, parser)
+    return hashing.sha256_hex(etree.tostring(document, method="c14n", exclusive=True, with_comments=False))
+
+
+def _find_declaration(schema: XMLSchema, schema_path: str):
+    """Return the element declaration at a tag path such as ``ProductTitleResult/TitleData/Title``."""
 
+    key = schema_path.strip("/")
+    declaration = _DECLARATION_CACHE.get(key)
+    if declaration is None:
+        declaration = schema.find(key)
+        if declaration is not None:
+            _DECLARATION_CACHE[key] = declaration
+    return declaration
+
+
+def _disk_cache() -> Optional[JsonDiskCache]:
+    directory = os.getenv(CACHE_DIR_ENV_VARIABLE)
+    return JsonDiskCache(directory) if directory else None
+
+
+def _cached_result(key: str) -> Optional[Dict[str, object]]:
+    entry = _RESULT_CACHE.get(key)
+    if entry is not None:
+        return entry
+    disk = _disk_cache()
+    if disk is None:
+        return None
+    entry = disk.get(key)
+    if entry is not None:
+        _RESULT_CACHE.put(key, entry)
+    return entry
+
+
+def _store_result(key: str, entry: Dict[str, object]) -> None:
+    _RESULT_CACHE.put(key, entry)
+    disk = _disk_cache()
+    if disk is not None:
+        disk.put(key, entry)
+
+
+def _iter_issues(schema, document: etree._Element) -> Iterable[ValidationIssue]:
+    """Yield issues for ``document`` against a schema or a single element declaration."""
 
-def _iter_issues(schema: XMLSchema, document: etree._Element) -> Iterable[ValidationIssue]:
     for error in schema.iter_errors(document):
         position = getattr(error, "position", None)
         line: Optional[int] = None
@@ -96,17 +188,93 @@ def _iter_issues(schema: XMLSchema, document: etree._Element) -> Iterable[Valida
                 line = position[0]
             if len(position) >= 2:
                 column = position[1]
+        if line is None:
+            line = getattr(error, "sourceline", None)
 
         message = (error.reason or error.message or str(error)).strip()
         xpath = getattr(error, "path", None)
         yield ValidationIssue(message=message, line=line, column=column, xpath=xpath)
 
 
+def _reroot_issue(issue: ValidationIssue, local_root: str, absolute_path: str) -> ValidationIssue:
+    # Element-declaration validation reports paths starting at "/<tag>"; rewrite them onto the
+    # subtree's absolute location in the full document.
+    if issue.xpath and issue.xpath.startswith(local_root):
+        issue.xpath = absolute_path + issue.xpath[len(local_root) :]
+    return issue
+
+
+def _schema_failure(exc: Exception) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
+    issue = ValidationIssue(message=str(exc), line=None, column=None, xpath=None)
+    return False, [issue.asdict()]
+
+
+def validate_stream(
+    source: Union[str, os.PathLike[str], IO[bytes]],
+) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
+    """Validate a (possibly multi-title) document without building the whole tree.
+
+    The document is read with ``iterparse``; each ``TitleData/Title`` subtree is validated
+    against its schema declaration as soon as it closes and is then removed from the tree,
+    so peak memory is bounded by the largest single title rather than the file size. The
+    remaining skeleton (order and title-data wrappers) is validated once the stream ends.
+    Line numbers refer to the source document; xpaths index titles by their position.
+    """
+
+    try:
+        schema = _load_schema()
+    except (FileNotFoundError, XMLSchemaException) as exc:
+        return _schema_failure(exc)
+    title_declaration = _find_declaration(schema, TITLE_SCHEMA_PATH)
+
+    issues: List[Dict[str, Optional[int | str]]] = []
+    context = etree.iterparse(source, events=("start", "end"), remove_blank_text=False)
+    title_data_index = 0
+    title_index = 0
+    root: Optional[etree._Element] = None
+    try:
+        for event, element in context:
+            if root is None:
+                root = element
+            parent = element.getparent()
+            if event == "start":
+                if element.tag == "TitleData" and parent is root:
+                    title_data_index += 1
+                    title_index = 0
+                continue
+            if element.tag != "Title" or parent is None or parent.tag != "TitleData" or parent.getparent() is not root:
+                continue
+            title_index += 1
+            prefix = f"/{root.tag}/TitleData[{title_data_index}]/Title[{title_index}]"
+            for issue in _iter_issues(title_declaration, element):
+                issues.append(_reroot_issue(issue, "/Title", prefix).asdict())
+            parent.remove(element)
+    except etree.XMLSyntaxError as exc:
+        line, column = (exc.position if exc.position else (None, None))
+        issues.append(
+            ValidationIssue(message=f"XML not well-formed: {exc.msg}", line=line, column=column, xpath=None).asdict()
+        )
+        return False, issues
+
+    if root is None:
+        return False, [ValidationIssue(message="XML payload is empty.", line=None, column=None, xpath=None).asdict()]
+
+    # Titles are optional in the schema, so the stripped skeleton validates on its own.
+    issues.extend(issue.asdict() for issue in _iter_issues(schema, root))
+    return not issues, issues
+
+
+@metrics.timed("validation")
 def validate(xml_str: str) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
     """Validate an XML string against the SPIN 2 schema.
 
     Returns a tuple of (ok, issues[]) where each issue exposes message, line, column, and xpath
     when available. The schema is cached after the first successful load for efficiency.
+
+    Results are cached by the canonical (exclusive C14N) document hash plus the schema hash, in
+    memory and optionally on disk via ``SPIN2_VALIDATION_CACHE_DIR``. A valid verdict is reused for
+    any serialisation of the same content; failures are only reused for byte-identical input so
+    reported line numbers always match the document that was submitted.
     """
 
     if xml_str is None or not xml_str.strip():
@@ -118,9 +286,10 @@ def validate(xml_str: str) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
         )
         return False, [issue.asdict()]
 
+    xml_bytes = xml_str.encode("utf-8")
     try:
         parser = etree.XMLParser(remove_blank_text=False)
-        document = etree.fromstring(xml_str.encode("utf-8"), parser)
+        document = etree.fromstring(xml_bytes, parser)
     except etree.XMLSyntaxError as exc:
         line, column = (exc.position if exc.position else (None, None))
         issue = ValidationIssue(
@@ -140,8 +309,91 @@ def validate(xml_str: str) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
         issue = ValidationIssue(message=str(exc), line=None, column=None, xpath=None)
         return False, [issue.asdict()]
 
+    cache_key = hashing.sha256_hex(f"{canonical_hash(xml_bytes)}:{schema_hash()}".encode("ascii"))
+    source_hash = hashing.sha256_hex(xml_bytes)
+    cached = _cached_result(cache_key)
+    hit = cached is not None and (cached["ok"] or cached["source"] == source_hash)
+    metrics.cache_result("validation", hit)
+    if hit:
+        return bool(cached["ok"]), [dict(issue) for issue in cached["issues"]]  # type: ignore[union-attr]
+
     issues = [issue.asdict() for issue in _iter_issues(schema, document)]
+    _store_result(cache_key, {"ok": not issues, "source": source_hash, "issues": issues})
     if issues:
         return False, issues
 
     return True, []
+
+
+def validate_subtree(
+    subtree: Union[str, etree._Element],
+    schema_path: Optional[str] = None,
+) -> Tuple[bool, List[Dict[str, Optional[int | str]]]]:
+    """Revalidate a single changed subtree of an already-validated document.
+
+    ``subtree`` is usually an element still attached to its parsed document (for example an
+    ``Instrument`` that was just appended or amended); its schema path and absolute xpath are
+    derived from its ancestors. A detached element or an XML fragment string can be checked by
+    passing ``schema_path``, the tag path of its declaration (e.g.
+    ``ProductTitleResult/TitleData/Title/Instruments/Instrument``).
+
+    Only the subtree's content and its occurrence count within the parent are checked, so the
+    cost is proportional to the change rather than to the whole title. The rest of the document
+    is assumed to have passed ``validate`` already.
+    """
+
+    if isinstance(subtree, str):
+        if not subtree.strip():
+            return False, [ValidationIssue(message="XML payload is empty.", line=None, column=None, xpath=None).asdict()]
+        try:
+            element = etree.fromstring(subtree.encode("utf-8"), etree.XMLParser(remove_blank_text=False))
+        except etree.XMLSyntaxError as exc:
+            line, column = (exc.position if exc.position else (None, None))
+            issue = ValidationIssue(message=f"XML not well-formed: {exc.msg}", line=line, column=column, xpath=None)
+            return False, [issue.asdict()]
+    else:
+        element = subtree
+
+    parent = element.getparent()
+    if schema_path is None:
+        if parent is None:
+            raise ValueError("schema_path is required for a detached subtree or XML fragment.")
+        schema_path = "/".join(ancestor.tag for ancestor in reversed([element, *element.iterancestors()]))
+        absolute_path = element.getroottree().getpath(element)
+    else:
+        schema_path = schema_path.strip("/")
+        absolute_path = "/" + schema_path
+
+    try:
+        schema = _load_schema()
+    except (FileNotFoundError, XMLSchemaException) as exc:
+        return _schema_failure(exc)
+
+    declaration = _find_declaration(schema, schema_path)
+    if declaration is None or schema_path.rsplit("/", 1)[-1] != element.tag:
+        issue = ValidationIssue(
+            message=f"Element '{element.tag}' is not allowed at '/{schema_path}'.",
+            line=element.sourceline,
+            column=None,
+            xpath=absolute_path,
+        )
+        return False, [issue.asdict()]
+
+    issues: List[Dict[str, Optional[int | str]]] = []
+    if parent is not None and declaration.max_occurs is not None:
+        occurrences = sum(1 for sibling in parent.iterchildren(element.tag))
+        if occurrences > declaration.max_occurs:
+            issue = ValidationIssue(
+                message=(
+                    f"Element '{element.tag}' occurs {occurrences} times; "
+                    f"at most {declaration.max_occurs} allowed."
+                ),
+                line=element.sourceline,
+                column=None,
+                xpath=absolute_path,
+            )
+            issues.append(issue.asdict())
+
+    for issue in _iter_issues(declaration, element):
+        issues.append(_reroot_issue(issue, f"/{element.tag}", absolute_path).asdict())
+    return not issues, issues
@@ -0,0 +1,214 @@
+"""Compare PDF ingest extraction backends on throughput and field accuracy.
+
+The corpus is a directory of PDFs, each with a sibling ``.xml`` file (same
+stem) holding the canonical XML it should ingest to. Every backend runs the
+heuristic path (template regions and embedded XML are skipped, so the text
+extractor is what gets measured) over every PDF, and the recovered fields are
+compared with the expected XML.
+
+    python -m app.tools.benchmark_ingest var/ingest-corpus
+    python -m app.tools.benchmark_ingest var/ingest-corpus --synthetic 20 --backend pdfminer --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lxml import etree
+
+from app.services import ingest_backends, pdf_ingest
+
+
+LOGGER = logging.getLogger(__name__)
+
+SAMPLE_XML_PATH = Path("app/data/samples/sample.xml")
+
+# Field name -> XPath of the values compared, in document order.
+FIELD_XPATHS: Dict[str, str] = {
+    "title_number": ".//Title/TitleNumber",
+    "linc_number": ".//Parcel/LINCNumber",
+    "municipality": ".//Municipality/Name",
+    "owner_names": ".//Owners//Party/Name",
+    "registration_numbers": ".//Instrument/RegistrationNumber",
+    "registration_dates": ".//Instrument/RegistrationDate",
+    "document_types": ".//Instrument/DocumentType/Name",
+}
+
+
+@dataclass
+class BackendReport:
+    backend: str
+    documents: int = 0
+    pages: int = 0
+    failures: int = 0
+    elapsed_s: float = 0.0
+    field_hits: Dict[str, int] = field(default_factory=dict)
+    field_totals: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def accuracy(self) -> float:
+        total = sum(self.field_totals.values())
+        return sum(self.field_hits.values()) / total if total else 0.0
+
+    def asdict(self) -> Dict[str, object]:
+        elapsed = self.elapsed_s
+        return {
+            "backend": self.backend,
+            "documents": self.documents,
+            "failures": self.failures,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_second": round(self.documents / elapsed, 2) if elapsed > 0 else 0.0,
+            "pages_per_second": round(self.pages / elapsed, 2) if elapsed > 0 else 0.0,
+            "accuracy": round(self.accuracy, 4),
+            "fields": {
+                name: round(self.field_hits.get(name, 0) / total, 4) if total else None
+                for name, total in self.field_totals.items()
+            },
+        }
+
+
+def field_values(root: etree._Element) -> Dict[str, List[str]]:
+    return {
+        name: [(node.text or "").strip() for node in root.findall(xpath)] for name, xpath in FIELD_XPATHS.items()
+    }
+
+
+def score_fields(expected: Dict[str, List[str]], actual: Dict[str, List[str]]) -> Dict[str, Tuple[int, int]]:
+    """Return ``(hits, total)`` per field; list values are compared position by position."""
+
+    scores: Dict[str, Tuple[int, int]] = {}
+    for name, values in expected.items():
+        found = actual.get(name, [])
+        hits = sum(1 for position, value in enumerate(values) if position < len(found) and found[position] == value)
+        scores[name] = (hits, len(values))
+    return scores
+
+
+def load_corpus(directory: Path) -> List[Tuple[Path, Path]]:
+    """Pair each PDF under ``directory`` with its expected XML, skipping PDFs without one."""
+
+    pairs: List[Tuple[Path, Path]] = []
+    for pdf_path in sorted(directory.rglob("*.pdf")):
+        xml_path = pdf_path.with_suffix(".xml")
+        if xml_path.exists():
+            pairs.append((pdf_path, xml_path))
+        else:
+            LOGGER.warning("Skipping %s: no expected XML at %s", pdf_path, xml_path)
+    return pairs
+
+
+def write_synthetic_corpus(directory: Path, count: int) -> List[Tuple[Path, Path]]:
+    """Render ``count`` variants of the sample title, with growing instrument tables, into ``directory``."""
+
+    from app.services import renderer
+
+    directory.mkdir(parents=True, exist_ok=True)
+    base = etree.parse(str(SAMPLE_XML_PATH)).getroot()
+    pairs: List[Tuple[Path, Path]] = []
+    for index in range(count):
+        root = copy.deepcopy(base)
+        instruments = root.find(".//Instruments")
+        for extra in range(index * 3):
+            instrument = copy.deepcopy(instruments[0])
+            instrument.find("RegistrationNumber").text = f"30{index:04d}{extra:06d}"
+            instrument.find("DocumentType/Name").text = "Caveat"
+            instrument.find("DocumentType/PrintText").text = f"Caveat {extra} re utility right of way"
+            instruments.append(instrument)
+        xml = etree.tostring(root, encoding="unicode")
+        stem = directory / f"synthetic_{index:04d}"
+        stem.with_suffix(".pdf").write_bytes(renderer.render(xml, options={"pdfa": False}))
+        stem.with_suffix(".xml").write_text(xml, encoding="utf-8")
+        pairs.append((stem.with_suffix(".pdf"), stem.with_suffix(".xml")))
+    return pairs
+
+
+def _page_count(pdf_path: Path) -> int:
+    with pdf_ingest._open_document(pdf_path) as doc:
+        return doc.page_count
+
+
+def benchmark(pairs: Sequence[Tuple[Path, Path]], backends: Sequence[str], workers: Optional[int] = 1) -> List[BackendReport]:
+    """Ingest every pair with every backend and collect timings and field scores.
+
+    ``workers`` caps page-parallel extraction (default 1, so backends are
+    compared on equal single-core terms).
+    """
+
+    expected = {pdf_path: field_values(etree.parse(str(xml_path)).getroot()) for pdf_path, xml_path in pairs}
+    pages = {pdf_path: _page_count(pdf_path) for pdf_path, _ in pairs}
+    reports: List[BackendReport] = []
+    for backend in backends:
+        ingest_backends.get_backend(backend)
+        report = BackendReport(backend=backend)
+        for pdf_path, _ in pairs:
+            started = time.perf_counter()
+            try:
+                extracted = _extract(pdf_path, backend, workers)
+            except Exception as exc:  # a backend failing on one file should not end the run
+                LOGGER.warning("%s failed on %s: %s", backend, pdf_path, exc)
+                extracted = None
+            report.elapsed_s += time.perf_counter() - started
+            report.documents += 1
+            report.pages += pages[pdf_path]
+            actual: Dict[str, List[str]] = {}
+            if extracted is None:
+                report.failures += 1
+            else:
+                actual = extracted
+            for name, (hits, total) in score_fields(expected[pdf_path], actual).items():
+                report.field_hits[name] = report.field_hits.get(name, 0) + hits
+                report.field_totals[name] = report.field_totals.get(name, 0) + total
+        reports.append(report)
+    return reports
+
+
+def _extract(pdf_path: Path, backend: str, workers: Optional[int]) -> Optional[Dict[str, List[str]]]:
+    lines = pdf_ingest._extract_text_lines(pdf_path, workers=workers, backend=backend)
+    document = pdf_ingest._build_document(pdf_ingest._extract_metadata(lines)) if lines else None
+    if document is None:
+        return None
+    return field_values(pdf_ingest.build_document_tree(document))
+
+
+def main() -> None:  # pragma: no cover - CLI entry
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Benchmark PDF ingest extraction backends")
+    parser.add_argument("corpus", type=Path, help="Directory of PDFs with sibling expected .xml files")
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=sorted(ingest_backends.BACKENDS),
+        help="Backend to run (repeatable; defaults to all)",
+    )
+    parser.add_argument("--synthetic", type=int, default=0, help="First render N sample variants into the corpus")
+    parser.add_argument("--workers", type=int, default=1, help="Page-parallel workers per document")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        write_synthetic_corpus(args.corpus, args.synthetic)
+    pairs = load_corpus(args.corpus)
+    if not pairs:
+        parser.error(f"No PDF/XML pairs found under {args.corpus}")
+
+    reports = [report.asdict() for report in benchmark(pairs, args.backend or list(ingest_backends.BACKENDS), args.workers)]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'backend':<16} {'docs/s':>8} {'pages/s':>8} {'accuracy':>9} {'failures':>9}")
+    for report in reports:
+        print(
+            f"{report['backend']:<16} {report['docs_per_second']:>8} {report['pages_per_second']:>8} "
+            f"{report['accuracy']:>9.2%} {report['failures']:>9}"
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
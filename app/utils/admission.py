@@ -0,0 +1,174 @@
+"""Admission control: a concurrency gate with a bounded, fair wait queue.
+
+An ``AdmissionController`` admits at most ``concurrency`` requests at once.
+Further requests wait in a queue of at most ``queue_size`` entries, each for
+at most ``timeout_s`` seconds; beyond that they are rejected straight away
+with a suggested ``Retry-After`` instead of piling up until the process runs
+out of memory. A client may hold at most ``per_client`` running-or-queued
+requests, and a freed slot goes to the queued client with the fewest running
+requests, so a bulk caller cannot starve interactive callers.
+
+Controllers are asyncio objects and must be used from one event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import itertools
+import math
+import time
+from typing import Dict, List
+
+from app.utils import metrics
+
+
+__all__ = ["AdmissionController", "Rejected", "Ticket"]
+
+
+# Weight of the newest sample in the moving average of time spent holding a slot.
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    """The request was not admitted; ``status_code`` is 429 for a client over quota, 503 for overload."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class Ticket:
+    client: str
+    admitted_at: float
+
+
+@dataclass(slots=True)
+class _Waiter:
+    client: str
+    seq: int
+    future: "asyncio.Future[Ticket]"
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_size: int,
+        timeout_s: float,
+        per_client: int,
+        initial_service_s: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.timeout_s = timeout_s
+        self.per_client = max(1, per_client)
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._service_s = initial_service_s
+        self._active_by_client: Counter = Counter()
+        self._queued_by_client: Counter = Counter()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the queue length and the average hold time."""
+
+        return max(1, math.ceil(self._service_s * (len(self._waiters) + 1) / self.concurrency))
+
+    def _reject(self, status_code: int, detail: str) -> Rejected:
+        self.rejected += 1
+        return Rejected(status_code, detail, self.retry_after())
+
+    def _publish(self) -> None:
+        metrics.set_queue_depth(f"admission:{self.name}", len(self._waiters), self.active)
+
+    def _admit(self, client: str) -> Ticket:
+        self.active += 1
+        self.admitted += 1
+        self._active_by_client[client] += 1
+        self._publish()
+        return Ticket(client=client, admitted_at=time.monotonic())
+
+    async def acquire(self, client: str) -> Ticket:
+        """Wait for a slot; raises ``Rejected`` when over quota, the queue is full or the wait times out."""
+
+        if self._active_by_client[client] + self._queued_by_client[client] >= self.per_client:
+            raise self._reject(429, f"Too many concurrent {self.name} requests from this client.")
+        if self.active < self.concurrency and not self._waiters:
+            return self._admit(client)
+        if len(self._waiters) >= self.queue_size:
+            raise self._reject(503, f"The {self.name} queue is full.")
+
+        waiter = _Waiter(client=client, seq=next(self._seq), future=asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._queued_by_client[client] += 1
+        self._publish()
+        try:
+            done, _ = await asyncio.wait({waiter.future}, timeout=self.timeout_s)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not done:
+            self._abandon(waiter)
+            self.timed_out += 1
+            raise self._reject(503, f"Timed out waiting for a {self.name} slot.")
+        return waiter.future.result()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter.future.done() and not waiter.future.cancelled():
+            # The slot was granted just as the wait ended; hand it back.
+            self.release(waiter.future.result())
+            return
+        waiter.future.cancel()
+        self._waiters.remove(waiter)
+        self._forget_queued(waiter.client)
+        self._publish()
+
+    def _forget_queued(self, client: str) -> None:
+        self._queued_by_client[client] -= 1
+        if self._queued_by_client[client] <= 0:
+            del self._queued_by_client[client]
+
+    def _next_waiter(self) -> _Waiter:
+        # The client with the fewest running requests goes first; arrival order breaks ties.
+        return min(self._waiters, key=lambda waiter: (self._active_by_client[waiter.client], waiter.seq))
+
+    def release(self, ticket: Ticket) -> None:
+        held = time.monotonic() - ticket.admitted_at
+        self._service_s += SERVICE_TIME_ALPHA * (held - self._service_s)
+        self.active -= 1
+        self._active_by_client[ticket.client] -= 1
+        if self._active_by_client[ticket.client] <= 0:
+            del self._active_by_client[ticket.client]
+        while self.active < self.concurrency and self._waiters:
+            waiter = self._next_waiter()
+            self._waiters.remove(waiter)
+            self._forget_queued(waiter.client)
+            waiter.future.set_result(self._admit(waiter.client))
+        self._publish()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_service_s": round(self._service_s, 4),
+        }
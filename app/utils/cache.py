@@ -0,0 +1,98 @@
+"""Small in-memory and on-disk caches shared by the services."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+
+LOGGER = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe least-recently-used mapping with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[K, V]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value  # type: ignore[return-value]
+
+    def put(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class JsonDiskCache:
+    """JSON documents stored one file per key under a sharded directory.
+
+    Keys are expected to be hex digests. Writes go through a temporary file
+    and ``os.replace`` so concurrent readers never observe partial entries,
+    which also makes the cache safe to share between worker processes.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable cache entry %s: %s", path, exc)
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(value, fh, separators=(",", ":"))
+            os.replace(tmp_name, path)
+        except OSError as exc:  # pragma: no cover - disk tier is best effort
+            LOGGER.warning("Unable to write cache entry %s: %s", path, exc)
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
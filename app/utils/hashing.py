@@ -10,3 +10,12 @@ def sha256_hex(data: bytes) -> str:
 
     return hashlib.sha256(data).hexdigest()
 
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
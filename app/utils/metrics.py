@@ -0,0 +1,190 @@
+"""Prometheus metrics for the pipeline, safe across uvicorn worker processes.
+
+``prometheus_client`` is optional: without it every helper here is a no-op
+and ``/metrics`` answers 503. When ``PROMETHEUS_MULTIPROC_DIR`` is set (it
+must exist and be emptied before the server starts), every worker process,
+including batch pool workers, writes its samples there and ``render_latest``
+aggregates all of them, so a scrape sees the whole server rather than
+whichever worker answered it.
+
+Exported series (all prefixed ``titan_``):
+
+* ``stage_seconds{stage}``: histogram per pipeline stage (``ascii_parse``,
+  ``xml_build``, ``validation``, ``compose``, ``draw``, ``pdfa``, ``save``,
+  ``ingest_extraction``, ``ocr``).
+* ``http_requests_total{endpoint,method,status}`` and
+  ``http_request_seconds{endpoint}``, labelled by route template.
+* ``queue_depth{queue,state}``: waiting and running requests per admission
+  gate and scheduler lane.
+* ``cache_requests_total{cache,result}``: hits and misses, for hit ratios.
+* ``title_numbers_allocated_total{strategy}`` and ``title_number_leases_total``.
+* ``pages_rendered_total``.
+
+Stages double as ``Server-Timing`` spans for requests being profiled (see
+``app/utils/profiling.py``).
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import os
+from typing import Callable, ContextManager, Iterator, Tuple, TypeVar
+
+try:  # pragma: no cover - optional dependency
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+    from prometheus_client import multiprocess as prometheus_multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None  # type: ignore[assignment]
+
+from app.utils import profiling
+
+
+__all__ = [
+    "available",
+    "cache_result",
+    "observe_request",
+    "pages_rendered",
+    "render_latest",
+    "set_queue_depth",
+    "stage",
+    "title_number_lease",
+    "timed",
+    "title_numbers_allocated",
+]
+
+
+MULTIPROC_DIR_ENV_VARIABLE = "PROMETHEUS_MULTIPROC_DIR"
+STAGES = (
+    "ascii_parse",
+    "xml_build",
+    "validation",
+    "compose",
+    "draw",
+    "pdfa",
+    "save",
+    "ingest_extraction",
+    "ocr",
+)
+# Pipeline stages run from a few milliseconds (validation cache hits) to minutes (OCR of long scans).
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+F = TypeVar("F", bound=Callable[..., object])
+
+
+def available() -> bool:
+    return prometheus_client is not None
+
+
+if prometheus_client is not None:
+    _STAGE_SECONDS = Histogram(
+        "titan_stage_seconds", "Time spent in each pipeline stage.", ["stage"], buckets=STAGE_BUCKETS
+    )
+    _HTTP_REQUESTS = Counter(
+        "titan_http_requests_total", "HTTP requests by route, method and status.", ["endpoint", "method", "status"]
+    )
+    _HTTP_SECONDS = Histogram(
+        "titan_http_request_seconds", "HTTP request latency by route.", ["endpoint"], buckets=STAGE_BUCKETS
+    )
+    _QUEUE_DEPTH = Gauge(
+        "titan_queue_depth",
+        "Requests waiting or running per admission gate and scheduler lane.",
+        ["queue", "state"],
+        multiprocess_mode="livesum",
+    )
+    _CACHE_REQUESTS = Counter("titan_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+    _TITLE_NUMBERS = Counter("titan_title_numbers_allocated_total", "Title numbers handed out.", ["strategy"])
+    _TITLE_NUMBER_LEASES = Counter("titan_title_number_leases_total", "Blocks of sequential title numbers leased.")
+    _PAGES_RENDERED = Counter("titan_pages_rendered_total", "PDF pages rendered.")
+
+
+@contextmanager
+def _profiled_stage(profile: profiling.Profile, name: str) -> Iterator[None]:
+    with profile.span(name):
+        if prometheus_client is None:
+            yield
+        else:
+            with _STAGE_SECONDS.labels(name).time():
+                yield
+
+
+def stage(name: str) -> ContextManager[object]:
+    """Time the enclosed block as pipeline stage ``name``, and as a span of the request profile if one is active."""
+
+    profile = profiling.current()
+    if profile is not None:
+        return _profiled_stage(profile, name)
+    if prometheus_client is None:
+        return nullcontext()
+    return _STAGE_SECONDS.labels(name).time()
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator timing every call of the function as pipeline stage ``name`` (see ``stage``)."""
+
+    def decorate(fn: F) -> F:
+        @wraps(fn)
+        def timed_call(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return timed_call  # type: ignore[return-value]
+
+    return decorate
+
+
+def observe_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    if prometheus_client is None:
+        return
+    _HTTP_REQUESTS.labels(endpoint, method, str(status)).inc()
+    _HTTP_SECONDS.labels(endpoint).observe(seconds)
+
+
+def set_queue_depth(queue: str, waiting: int, running: int) -> None:
+    if prometheus_client is None:
+        return
+    _QUEUE_DEPTH.labels(queue, "waiting").set(waiting)
+    _QUEUE_DEPTH.labels(queue, "running").set(running)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    if prometheus_client is None:
+        return
+    _CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def title_numbers_allocated(strategy: str, count: int) -> None:
+    if prometheus_client is None:
+        return
+    _TITLE_NUMBERS.labels(strategy).inc(count)
+
+
+def title_number_lease() -> None:
+    if prometheus_client is None:
+        return
+    _TITLE_NUMBER_LEASES.inc()
+
+
+def pages_rendered(count: int) -> None:
+    if prometheus_client is None:
+        return
+    _PAGES_RENDERED.inc(count)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Serialise the current metrics as ``(body, content_type)`` in the Prometheus text format.
+
+    Raises ``RuntimeError`` when ``prometheus_client`` is not installed.
+    """
+
+    if prometheus_client is None:
+        raise RuntimeError("prometheus_client is required for /metrics; install prometheus-client.")
+    if os.getenv(MULTIPROC_DIR_ENV_VARIABLE):
+        registry = CollectorRegistry()
+        prometheus_multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
@@ -12,7 +12,7 @@ from reportlab.pdfbase import pdfdoc
 LOGGER = logging.getLogger(__name__)
 
 
-def _build_xmp(metadata: Dict[str, str]) -> str:
+def _build_xmp(metadata: Dict[str, str], part: int = 2) -> str:
     template = f"""<?xpacket begin='﻿' id='W5M0MpCehiHzreSzNTczkc9d'?>
 <x:xmpmeta xmlns:x='adobe:ns:meta/' xmlns:pdfaid='http://www.aiim.org/pdfa/ns/id/'>
   <rdf:RDF xmlns:rdf='http://www.w3.org/1999/02/22-rdf-syntax-ns#'>
@@ -29,7 +29,7 @@ def _build_xmp(metadata: Dict[str, str]) -> str:
       </dc:creator>
     </rdf:Description>
     <rdf:Description rdf:about='' xmlns:pdfaid='http://www.aiim.org/pdfa/ns/id/'>
-      <pdfaid:part>2</pdfaid:part>
+      <pdfaid:part>{part}</pdfaid:part>
       <pdfaid:conformance>B</pdfaid:conformance>
     </rdf:Description>
   </rdf:RDF>
@@ -38,8 +38,12 @@ def _build_xmp(metadata: Dict[str, str]) -> str:
     return template
 
 
-def apply_pdfa(canvas_obj, icc_path: str, metadata: Dict[str, str]) -> None:
-    """Mutate the ReportLab canvas to comply with PDF/A-2b when an ICC profile is available."""
+def apply_pdfa(canvas_obj, icc_path: str, metadata: Dict[str, str], part: int = 2) -> None:
+    """Mutate the ReportLab canvas to comply with PDF/A-2b when an ICC profile is available.
+
+    Pass ``part=3`` when the document carries associated files (see ``embed_associated_file``);
+    PDF/A-2 only permits embedding other PDF/A documents.
+    """
 
     profile_path = Path(icc_path)
     if not profile_path.exists():
@@ -70,5 +74,65 @@ def apply_pdfa(canvas_obj, icc_path: str, metadata: Dict[str, str]) -> None:
     catalog = canvas_obj._doc.Catalog
     catalog[pdfdoc.PDFName("OutputIntents")] = pdfdoc.PDFArray([output_intent])
 
-    canvas_obj._doc.xmpMetadata = _build_xmp(metadata)
+    canvas_obj._doc.xmpMetadata = _build_xmp(metadata, part=part)
+
+
+def embed_associated_file(
+    canvas_obj,
+    name: str,
+    data: bytes,
+    mime_type: str,
+    description: str,
+    relationship: str = "Source",
+) -> None:
+    """Attach ``data`` as a document-level associated file.
+
+    The file spec is listed both in the catalog's ``EmbeddedFiles`` name tree,
+    where readers and PyMuPDF's ``embfile_*`` API find it, and in the catalog
+    ``AF`` array with an ``AFRelationship``, as PDF/A-3 requires. Name trees
+    and associated files already in the catalog are kept.
+    """
+
+    doc = canvas_obj._doc
+    file_stream = pdfdoc.PDFStream(
+        pdfdoc.PDFDictionary(
+            {
+                "Type": pdfdoc.PDFName("EmbeddedFile"),
+                # PDFName leaves "/" unescaped, which would split the MIME type into two names.
+                "Subtype": "/" + mime_type.replace("/", "#2F"),
+                "Params": pdfdoc.PDFDictionary({"Size": len(data)}),
+            }
+        ),
+        content=data,
+    )
+    file_ref = doc.Reference(file_stream)
+    filespec_ref = doc.Reference(
+        pdfdoc.PDFDictionary(
+            {
+                "Type": pdfdoc.PDFName("Filespec"),
+                "F": pdfdoc.PDFString(name),
+                "UF": pdfdoc.PDFString(name),
+                "Desc": pdfdoc.PDFString(description),
+                "AFRelationship": pdfdoc.PDFName(relationship),
+                "EF": pdfdoc.PDFDictionary({"F": file_ref, "UF": file_ref}),
+            }
+        )
+    )
+
+    catalog = doc.Catalog
+    names = getattr(catalog, "Names", None)
+    if names is None:
+        names = catalog.Names = pdfdoc.PDFDictionary()
+    if "EmbeddedFiles" not in names:
+        names["EmbeddedFiles"] = pdfdoc.PDFDictionary({"Names": pdfdoc.PDFArray([])})
+    tree = names["EmbeddedFiles"]["Names"]
+    # A name tree's keys must stay sorted.
+    pairs = [*zip(tree.sequence[::2], tree.sequence[1::2]), (pdfdoc.PDFString(name), filespec_ref)]
+    pairs.sort(key=lambda pair: pair[0].s)
+    tree.sequence = [item for pair in pairs for item in pair]
+    # PDFCatalog only serialises the keys it knows about; AF arrived with PDF 2.0 / PDF/A-3.
+    existing = getattr(catalog, "AF", None)
+    catalog.AF = pdfdoc.PDFArray([*(existing.sequence if existing is not None else []), filespec_ref])
+    if "AF" not in catalog.__NoDefault__:
+        catalog.__NoDefault__ = [*catalog.__NoDefault__, "AF"]
 
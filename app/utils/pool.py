@@ -0,0 +1,81 @@
+"""Process-pool helpers for batch workloads."""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import os
+from typing import Callable, Iterable, Iterator, Optional, Set, Tuple, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Keep a few submissions queued per worker so the pool never idles while the
+# parent produces the next inputs, without materialising the whole source.
+IN_FLIGHT_PER_WORKER = 4
+
+# Set in processes started by ``imap_unordered``; ProcessPoolExecutor workers are not daemonic, so
+# ``multiprocessing.current_process().daemon`` cannot tell them apart from the parent.
+_IN_WORKER = False
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def in_worker() -> bool:
+    """True inside a process started by ``imap_unordered``, where work must not start a nested pool."""
+
+    return _IN_WORKER
+
+
+def _init_worker(initializer: Optional[Callable[..., None]], initargs: Tuple) -> None:
+    global _IN_WORKER
+    _IN_WORKER = True
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def imap_unordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple = (),
+) -> Iterator[R]:
+    """Apply ``fn`` to ``items`` on a process pool, yielding results as they finish.
+
+    Inputs are pulled lazily with a bounded number in flight. ``workers`` of
+    ``0`` or ``1`` runs inline in the calling process (after calling
+    ``initializer`` once), which keeps small batches and tests cheap. Pool
+    workers report ``in_worker()`` so per-item code can stay serial.
+    """
+
+    worker_count = default_workers() if workers is None else workers
+    if worker_count <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield fn(item)
+        return
+
+    max_in_flight = worker_count * IN_FLIGHT_PER_WORKER
+    iterator = iter(items)
+    with ProcessPoolExecutor(
+        max_workers=worker_count, initializer=_init_worker, initargs=(initializer, initargs)
+    ) as pool:
+        pending: Set[Future] = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(fn, item))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -0,0 +1,146 @@
+"""Opt-in per-request profiling: ``Server-Timing`` spans and cProfile captures.
+
+A ``Profile`` is bound to the current request through a context variable, so
+it follows the request into the threadpool. Instrumented code asks for the
+active profile and does nothing else when there is none, which keeps the cost
+of an unprofiled request to one context variable lookup per span. Spans with
+the same name are summed; ``wrap`` additionally runs a unit of work under
+cProfile, and ``Profile.dump`` writes every capture of the request to one
+``.prof`` file (readable with ``pstats`` or snakeviz).
+"""
+
+from __future__ import annotations
+
+import cProfile
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, Token
+from functools import wraps
+import os
+from pathlib import Path
+import pstats
+import re
+import threading
+import time
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, TypeVar
+import uuid
+
+
+__all__ = ["Profile", "activate", "current", "deactivate", "span", "wrap"]
+
+
+T = TypeVar("T")
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+_CURRENT: ContextVar[Optional["Profile"]] = ContextVar("titan_profile", default=None)
+
+
+class Profile:
+    def __init__(self, label: str) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        # name -> [total seconds, count], in first-seen order.
+        self._spans: Dict[str, List[float]] = {}
+        self._captures: List[cProfile.Profile] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def capture(self, fn: Callable[[], T]) -> Callable[[], T]:
+        """``fn`` wrapped to run under cProfile, its statistics kept for ``dump``."""
+
+        @wraps(fn)
+        def profiled() -> T:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active (Python 3.12+ allows one at a time); keep the spans only.
+                return fn()
+            try:
+                return fn()
+            finally:
+                profiler.disable()
+                with self._lock:
+                    self._captures.append(profiler)
+
+        return profiled
+
+    def spans(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: {"seconds": total, "count": count} for name, (total, count) in self._spans.items()}
+
+    def server_timing(self) -> str:
+        """The spans as a ``Server-Timing`` header value, ending with the request ``total``."""
+
+        parts = []
+        for name, span in self.spans().items():
+            part = f"{name};dur={span['seconds'] * 1000:.2f}"
+            if span["count"] > 1:
+                part += f';desc="x{int(span["count"])}"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+    def dump(self, directory: os.PathLike[str] | str) -> Optional[Path]:
+        """Write the request's cProfile captures to ``directory``; ``None`` when nothing was captured."""
+
+        with self._lock:
+            captures = list(self._captures)
+        if not captures:
+            return None
+        stats = pstats.Stats(captures[0])
+        for profiler in captures[1:]:
+            stats.add(profiler)
+        target = Path(directory)
+        target.mkdir(parents=True, exist_ok=True)
+        label = _UNSAFE_FILENAME_CHARS.sub("_", self.label).strip("_")
+        path = target / f"{time.strftime('%Y%m%dT%H%M%S')}-{label}-{self.id}.prof"
+        stats.dump_stats(str(path))
+        return path
+
+
+def current() -> Optional[Profile]:
+    return _CURRENT.get()
+
+
+def activate(profile: Profile) -> Token:
+    return _CURRENT.set(profile)
+
+
+def deactivate(token: Token) -> None:
+    _CURRENT.reset(token)
+
+
+def span(name: str) -> ContextManager[None]:
+    """Time the enclosed block into the active profile, if any."""
+
+    profile = _CURRENT.get()
+    if profile is None:
+        return nullcontext()
+    return profile.span(name)
+
+
+def wrap(fn: Callable[[], T]) -> Callable[[], T]:
+    """``fn`` itself, or ``fn`` captured by cProfile when the current request is being profiled.
+
+    Call it where the work is handed to a thread, so the capture is taken in the thread that runs it.
+    """
+
+    profile = _CURRENT.get()
+    if profile is None:
+        return fn
+    return profile.capture(fn)
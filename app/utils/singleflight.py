@@ -0,0 +1,111 @@
+"""Coalesce concurrent calls that compute the same thing.
+
+The first caller for a key runs the function; callers arriving while it is
+still running wait for that run and share its result (or its exception)
+instead of repeating the work. Nothing is cached once the call finishes.
+Synchronous and asyncio callers share one table of in-flight calls, so a
+request handler awaiting ``do_async`` joins a computation started by a
+worker thread calling ``do`` and vice versa.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import CancelledError, Future
+from functools import partial
+import threading
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+
+__all__ = ["SingleFlight"]
+
+
+R = TypeVar("R")
+
+
+class SingleFlight(Generic[R]):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "Future[R]"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key: Hashable) -> Tuple["Future[R]", bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _settle(self, key: Hashable, future: "Future[R]", fn: Callable[[], R]) -> R:
+        # Marking the future running is what stops ``do_async`` from cancelling it from here on.
+        if not future.set_running_or_notify_cancel():
+            # The leader gave up before its turn came (see ``do_async``); followers were already told.
+            raise RuntimeError("The shared computation was cancelled before it ran.")
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], R]) -> Tuple[R, bool]:
+        """Run ``fn`` once for concurrent callers of ``key``; returns ``(result, shared)``.
+
+        ``shared`` is true for callers that joined another caller's run.
+        """
+
+        future, leader = self._join(key)
+        if leader:
+            return self._settle(key, future, fn), False
+        try:
+            return future.result(), True
+        except CancelledError as exc:
+            raise RuntimeError("The shared computation was cancelled before it ran.") from exc
+
+    async def do_async(
+        self, key: Hashable, fn: Callable[[], R], runner: Optional[Callable[[Callable[[], R]], Awaitable[R]]] = None
+    ) -> Tuple[R, bool]:
+        """Like ``do`` for coroutines: the leader runs ``fn`` in the threadpool and followers await it.
+
+        ``runner`` replaces the threadpool for the leader, e.g. a scheduler that
+        queues the work before running it in a thread.
+        """
+
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                # Shielded so a follower that gives up (e.g. its client disconnected) leaves the shared
+                # future alone; only the leader may cancel it.
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except asyncio.CancelledError as exc:
+                if future.cancelled():
+                    raise RuntimeError("The shared computation was cancelled before it ran.") from exc
+                raise
+        run = runner or run_in_threadpool
+        try:
+            return await run(partial(self._settle, key, future, fn)), False
+        except BaseException:
+            # ``cancel`` only succeeds while ``_settle`` has not started: the leader gave up while queued,
+            # so followers are released and a late ``_settle`` returns at once. Once ``fn`` is running it
+            # settles the future itself and followers get its result even though the leader left.
+            if future.cancel():
+                with self._lock:
+                    if self._calls.get(key) is future:
+                        del self._calls[key]
+            raise
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
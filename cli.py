@@ -1,10 +1,11 @@
 import json
+import sys
 from pathlib import Path
 from typing import Optional
 
 import typer
 
-from app.services import ascii_parser, renderer, xml_validator
+from app.services import ascii_parser, batch_ingest, batch_validation, business_rules, renderer, xml_validator
 
 app = typer.Typer()
 
@@ -18,11 +19,70 @@ def parse_ascii(
     typer.echo(xml)
 
 @app.command()
-def validate(xmlfile: Path):
-    xml = xmlfile.read_text(encoding="utf-8")
-    ok, errors = xml_validator.validate(xml)
+def validate(
+    xmlfile: Path,
+    stream: bool = typer.Option(False, "--stream", help="Validate title by title with bounded memory (bulk files)"),
+    rules: bool = typer.Option(False, "--rules", help="Also apply business rules (not available with --stream)"),
+):
+    if stream:
+        ok, errors = xml_validator.validate_stream(str(xmlfile))
+    else:
+        xml = xmlfile.read_text(encoding="utf-8")
+        ok, errors = xml_validator.validate(xml)
+        if rules:
+            rules_ok, rule_errors = business_rules.evaluate(xml)
+            ok = ok and rules_ok
+            errors = errors + rule_errors
     typer.echo(json.dumps({"ok": ok, "errors": errors}, indent=2))
 
+@app.command()
+def validate_batch(
+    source: str = typer.Argument(..., help="Directory, glob, .zip archive, .ndjson file, or '-' for NDJSON on stdin"),
+    workers: Optional[int] = typer.Option(None, help="Worker processes (defaults to CPU count; 0 runs inline)"),
+    failures_only: bool = typer.Option(False, "--failures-only", help="Only print documents that failed validation"),
+    rules: bool = typer.Option(False, "--rules", help="Also apply business rules to every document"),
+):
+    if source == "-":
+        items = batch_validation.iter_ndjson(sys.stdin, source_name="stdin")
+    else:
+        items = batch_validation.iter_source(source)
+    summary = batch_validation.BatchSummary()
+    for result in batch_validation.validate_batch(items, workers=workers, rules=rules):
+        summary.record(result)
+        if failures_only and result.ok:
+            continue
+        typer.echo(json.dumps(result.asdict()))
+    summary.finish()
+    typer.echo(json.dumps({"summary": summary.asdict()}))
+    if summary.invalid:
+        raise typer.Exit(code=1)
+
+@app.command()
+def ingest_batch(
+    source: str = typer.Argument(..., help="Directory of PDFs (searched recursively), a single PDF, or a glob"),
+    workers: Optional[int] = typer.Option(None, help="Worker processes (defaults to CPU count; 0 runs inline)"),
+    mode: str = typer.Option("auto", help="Extraction mode: auto, template, or heuristic"),
+    skip_duplicates: bool = typer.Option(
+        False, "--skip-duplicates", help="Hash files first; skip byte-identical copies and reuse cached results"
+    ),
+    backend: str = typer.Option(
+        "pymupdf-words", help="Text extraction backend: pymupdf-words, pymupdf-tables, or pdfminer"
+    ),
+):
+    summary = batch_ingest.IngestSummary()
+    results = batch_ingest.ingest_batch(
+        batch_ingest.iter_pdf_paths(source),
+        workers=workers,
+        mode=mode,
+        skip_duplicates=skip_duplicates,
+        backend=backend,
+    )
+    for result in results:
+        summary.record(result)
+        typer.echo(json.dumps(result.asdict()))
+    summary.finish()
+    typer.echo(json.dumps({"summary": summary.asdict()}))
+
 @app.command()
 def render(
     xmlfile: Path,
@@ -30,9 +90,10 @@ def render(
     out: Path = Path("out.pdf"),
     pdfa: bool = typer.Option(True, "--pdfa/--no-pdfa", help="Toggle PDF/A-2b compliance"),
     icc_path: Optional[Path] = typer.Option(None, help="Override ICC profile path"),
+    embed_xml: bool = typer.Option(False, "--embed-xml", help="Embed the source XML for lossless re-ingest"),
 ):
     xml = xmlfile.read_text(encoding="utf-8")
-    options: dict = {"pdfa": pdfa}
+    options: dict = {"pdfa": pdfa, "embed_xml": embed_xml}
     if icc_path:
         options["icc_path"] = str(icc_path)
     pdf_bytes = renderer.render(xml, template_id=template_id, options=options)
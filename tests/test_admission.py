@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import AdmissionController, Rejected
+
+
+def test_queue_bounds_and_timeouts():
+    async def scenario():
+        gate = AdmissionController("render", concurrency=1, queue_size=1, timeout_s=0.05, per_client=5)
+        first = await gate.acquire("a")
+        waiting = asyncio.create_task(gate.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await gate.acquire("c")
+        assert full.value.status_code == 503 and full.value.retry_after >= 1
+
+        with pytest.raises(Rejected) as timed_out:
+            await waiting
+        assert timed_out.value.status_code == 503
+        assert gate.queued == 0 and gate.timed_out == 1
+
+        queued = asyncio.create_task(gate.acquire("b"))
+        await asyncio.sleep(0)
+        gate.release(first)
+        second = await queued
+        assert second.client == "b" and gate.active == 1
+        gate.release(second)
+        assert gate.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_per_client_quota_and_fair_dispatch():
+    async def scenario():
+        gate = AdmissionController("ingest", concurrency=2, queue_size=10, timeout_s=5.0, per_client=4)
+        bulk = [await gate.acquire("bulk"), await gate.acquire("bulk")]
+        queued_bulk = [asyncio.create_task(gate.acquire("bulk")) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as over_quota:
+            await gate.acquire("bulk")
+        assert over_quota.value.status_code == 429
+
+        interactive = asyncio.create_task(gate.acquire("interactive"))
+        await asyncio.sleep(0)
+        # The interactive caller arrived last but holds no slot, so it is admitted first.
+        gate.release(bulk[0])
+        assert (await interactive).client == "interactive"
+        assert not any(task.done() for task in queued_bulk)
+
+        gate.release(bulk[1])
+        assert (await queued_bulk[0]).client == "bulk"
+        # A caller that disconnects while queued gives up its place.
+        queued_bulk[1].cancel()
+        await asyncio.gather(queued_bulk[1], return_exceptions=True)
+        assert (gate.active, gate.queued) == (2, 0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,146 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+pytest.importorskip("xmlschema")
+
+from app.services import batch_validation, xml_validator
+
+
+VALID_XML = """<ProductTitleResult>
+  <Order><OrderNumber>123456</OrderNumber></Order>
+  <TitleData>
+    <Title>
+      <TitleNumber>002345678901</TitleNumber>
+      <Type>Title</Type>
+      <RightsType>Surface</RightsType>
+      <Consolidated>false</Consolidated>
+      <CreateDate>2024-01-01</CreateDate>
+      <RegistrationDetails>
+        <DocumentNumber>0</DocumentNumber>
+        <Date>2024-01-01</Date>
+        <DocumentType><Code>TFR</Code><Name>TRANSFER</Name></DocumentType>
+      </RegistrationDetails>
+      <Parcels>
+        <Parcel>
+          <LINCNumber>1234567890</LINCNumber>
+          <ShortLegalType>ATS</ShortLegalType>
+          <ShortLegal>LOT 1 BLOCK 2 PLAN 1234</ShortLegal>
+        </Parcel>
+      </Parcels>
+    </Title>
+  </TitleData>
+</ProductTitleResult>"""
+
+INVALID_XML = VALID_XML.replace("002345678901", "1234567890123")
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    xml_validator.reset_schema_cache()
+    yield
+    xml_validator.reset_schema_cache()
+
+
+def test_iter_source_dispatches_directory_zip_and_ndjson(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.xml").write_text(VALID_XML, encoding="utf-8")
+    (docs / "b.xml").write_text(INVALID_XML, encoding="utf-8")
+    (docs / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    archive = tmp_path / "batch.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("one.xml", VALID_XML)
+        zf.writestr("readme.md", "ignored")
+
+    stream = tmp_path / "batch.ndjson"
+    stream.write_text(
+        "\n".join([json.dumps({"id": "doc-1", "xml": VALID_XML}), json.dumps(INVALID_XML), "{not json"]),
+        encoding="utf-8",
+    )
+
+    assert [item.source for item in batch_validation.iter_source(docs)] == [str(docs / "a.xml"), str(docs / "b.xml")]
+    assert [item.source for item in batch_validation.iter_source(archive)] == ["one.xml"]
+    ndjson_items = list(batch_validation.iter_source(stream))
+    assert [item.source for item in ndjson_items] == ["doc-1", f"{stream}:2", f"{stream}:3"]
+    assert ndjson_items[2].error
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_validate_batch_reports_every_document(workers):
+    items = [
+        batch_validation.BatchItem(source="good", xml=VALID_XML),
+        batch_validation.BatchItem(source="bad", xml=INVALID_XML),
+        *batch_validation.iter_ndjson(io.StringIO("{not json\n"), source_name="stdin"),
+    ]
+
+    summary = batch_validation.BatchSummary()
+    results = {}
+    for result in batch_validation.validate_batch(items, workers=workers):
+        summary.record(result)
+        results[result.source] = result
+    summary.finish()
+
+    assert results["good"].ok is True
+    assert results["bad"].ok is False
+    assert results["stdin:1"].ok is False
+    assert summary.asdict()["total"] == 3
+    assert summary.valid == 1 and summary.invalid == 2
+
+
+def test_batch_upload_is_spooled_with_a_size_limit(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    import asyncio
+
+    from app.api import routes
+    from app.main import app
+
+    body = "\n".join(json.dumps({"id": f"doc-{index}", "xml": VALID_XML}) for index in range(3)) + "\n"
+
+    async def upload():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(
+                "/v1/validate/batch",
+                files={"file": ("batch.ndjson", body.encode("utf-8"), "application/x-ndjson")},
+                data={"workers": "0"},
+            )
+
+    response = asyncio.run(upload())
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["summary"]["total"] == 3
+
+    monkeypatch.setenv(routes.MAX_VALIDATE_BATCH_ENV_VARIABLE, str(len(body) - 1))
+    assert asyncio.run(upload()).status_code == 413
+
+
+def test_batch_workers_are_clamped_and_the_endpoint_is_gated(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    import asyncio
+
+    from app.api import admission, routes
+    from app.main import app
+    from app.utils import pool
+
+    requested = []
+
+    def _recording(items, workers=None, rules=False):
+        requested.append(workers)
+        return iter(())
+
+    monkeypatch.setattr(routes.batch_validation, "validate_batch", _recording)
+
+    async def upload():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(
+                "/v1/validate/batch",
+                files={"file": ("batch.ndjson", b"", "application/x-ndjson")},
+                data={"workers": "10000"},
+            )
+
+    assert asyncio.run(upload()).status_code == 200
+    assert requested and 1 <= requested[0] <= pool.default_workers()
+    assert admission.GATED_ENDPOINTS["/v1/validate/batch"] == "validate_batch"
@@ -0,0 +1,55 @@
+from lxml import etree
+
+from app.services import business_rules
+
+
+def _document(interests, linc="0034567890", instrument_date="2024-01-01", create_date="2024-02-01"):
+    groups = "".join(
+        f"<TenancyGroup><Interest>{interest}</Interest><Parties><Party><Name>OWNER {idx}</Name></Party></Parties></TenancyGroup>"
+        for idx, interest in enumerate(interests)
+    )
+    return f"""<ProductTitleResult>
+<TitleData>
+<Title>
+<CreateDate>{create_date}</CreateDate>
+<Parcels><Parcel><LINCNumber>{linc}</LINCNumber></Parcel></Parcels>
+<Owners>{groups}</Owners>
+<Instruments><Instrument><RegistrationNumber>202312345678</RegistrationNumber><RegistrationDate>{instrument_date}</RegistrationDate></Instrument></Instruments>
+</Title>
+</TitleData>
+</ProductTitleResult>"""
+
+
+def test_default_rules_pass_for_consistent_title():
+    assert business_rules.evaluate(_document(["1/2", "50%"])) == (True, [])
+    assert business_rules.evaluate(_document(["100"])) == (True, [])
+
+
+def test_default_rules_report_each_violation_with_location():
+    ok, issues = business_rules.evaluate(
+        _document(["1/2", "1/3"], linc="12345", instrument_date="2024-03-01", create_date="2024-02-01")
+    )
+    assert ok is False
+    by_rule = {issue["message"].split("]")[0].lstrip("["): issue for issue in issues}
+    assert set(by_rule) == {"tenancy-interest-total", "linc-number-format", "instrument-date-not-after-title"}
+    assert by_rule["linc-number-format"]["xpath"] == "/ProductTitleResult/TitleData/Title/Parcels/Parcel/LINCNumber"
+    assert by_rule["linc-number-format"]["line"] == 5
+    assert by_rule["instrument-date-not-after-title"]["xpath"].endswith("/Instruments/Instrument")
+
+
+def test_custom_rules_compile_once_and_match_context_path():
+    rules = business_rules.compile_rules(
+        [
+            business_rules.RuleSpec(
+                rule_id="owner-name-upper",
+                description="Owner names are upper case.",
+                context="Parties/Party",
+                select={"name": "string(Name)"},
+                predicate=lambda values: None if values["name"].isupper() else "Name must be upper case.",
+            )
+        ]
+    )
+    root = etree.fromstring(_document(["100%"]).replace("OWNER 0", "Owner 0").encode("utf-8"))
+    ok, issues = business_rules.evaluate(root, rules)
+    assert ok is False
+    assert issues[0]["message"] == "[owner-name-upper] Name must be upper case."
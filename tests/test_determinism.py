@@ -1,4 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
+import threading
+import time
 
 import pytest
 
@@ -19,3 +22,26 @@ def test_renderer_sets_static_metadata():
     pdf_bytes = renderer.render(XML, options={"pdfa": False})
     assert b"D:20240101000000Z" in pdf_bytes
     assert b"Title Document Creator Pro" in pdf_bytes
+
+
+def test_concurrent_identical_renders_are_coalesced(monkeypatch):
+    calls = []
+    real_render = renderer._render
+
+    def slow_render(*args):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return real_render(*args)
+
+    monkeypatch.setattr(renderer, "_render", slow_render)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        outputs = list(pool.map(lambda _: renderer.render(XML, options={"pdfa": False}), range(6)))
+    assert len(calls) == 1
+    assert len(set(outputs)) == 1
+
+    # Different options are a different render.
+    renderer.render(XML, options={"pdfa": False, "embed_xml": True})
+    assert len(calls) == 2
+    assert renderer.render_key(XML, "alberta_title_v1", {"pdfa": False, "metadata": {"a": 1}}) == renderer.render_key(
+        XML, "alberta_title_v1", {"metadata": {"a": 1}, "pdfa": False}
+    )
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from app.services import idempotency
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setenv(idempotency.DB_PATH_ENV_VARIABLE, str(tmp_path / "idempotency.sqlite3"))
+    idempotency.reset_store()
+    yield idempotency.get_store()
+    idempotency.reset_store()
+
+
+def _computer(body: bytes, delay: float = 0.0):
+    calls = []
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        return idempotency.StoredResponse(body=body, media_type="application/pdf", headers={"X-Title-Number": "1"})
+
+    return compute, calls
+
+
+def test_retry_is_replayed_from_the_store(store):
+    compute, calls = _computer(b"%PDF-1")
+    first, replayed = idempotency.execute("k1", "fp", compute)
+    assert (first.body, replayed) == (b"%PDF-1", False)
+
+    # A fresh store on the same database stands in for a restart or another worker.
+    idempotency.reset_store()
+    again, replayed = idempotency.execute("k1", "fp", compute)
+    assert (again.body, again.headers, replayed) == (b"%PDF-1", {"X-Title-Number": "1"}, True)
+    assert len(calls) == 1
+
+
+def test_concurrent_duplicates_join_the_running_computation(store):
+    compute, calls = _computer(b"%PDF-2", delay=0.2)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: idempotency.execute("k2", "fp", compute), range(8)))
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False] + [True] * 7
+    assert {response.body for response, _ in results} == {b"%PDF-2"}
+
+
+def test_key_reuse_with_a_different_payload(store):
+    compute, calls = _computer(b"%PDF-3")
+    idempotency.execute("k3", "fp-a", compute)
+    with pytest.raises(idempotency.IdempotencyConflict):
+        idempotency.execute("k3", "fp-b", compute)
+
+    # Derived keys recompute instead when the payload changed.
+    response, replayed = idempotency.execute("k3", "fp-b", compute, strict=False)
+    assert not replayed and len(calls) == 2
+    assert idempotency.get_store().get("k3").fingerprint == "fp-b"
+
+
+def test_failures_are_not_stored_and_abandoned_claims_are_taken_over(store, monkeypatch):
+    def boom():
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        idempotency.execute("k4", "fp", boom)
+    assert store.claim("k4", "fp", 60.0) == ("claimed", None)
+
+    # That claim now looks like a crashed worker's; once it is stale the next request takes over.
+    other = idempotency.IdempotencyStore(store.path)
+    assert other.claim("k4", "fp", 60.0) == ("pending", None)
+    monkeypatch.setenv(idempotency.PENDING_TIMEOUT_ENV_VARIABLE, "0")
+    compute, calls = _computer(b"%PDF-4")
+    response, replayed = idempotency.execute("k4", "fp", compute)
+    assert (response.body, replayed, len(calls)) == (b"%PDF-4", False, 1)
+    other.close()
+
+
+def test_async_waiter_for_another_worker_gives_its_slot_back(store):
+    import asyncio
+
+    from app.services import scheduler
+
+    other = idempotency.IdempotencyStore(store.path)
+    assert other.claim("k5", "fp", 60.0) == ("claimed", None)
+    sched = scheduler.CostScheduler(workers=1, bulk_slots=1)
+    compute, calls = _computer(b"%PDF-5")
+
+    async def scenario():
+        waiter = asyncio.create_task(idempotency.execute_async("k5", "fp", compute, runner=sched.run))
+        await asyncio.sleep(0.2)
+        # The only scheduler slot is free while the waiter polls for the other worker's response.
+        assert await asyncio.wait_for(sched.run(lambda: "free"), 1) == "free"
+        other.complete("k5", idempotency.StoredResponse(body=b"%PDF-5", media_type="application/pdf", fingerprint="fp"))
+        return await asyncio.wait_for(waiter, 5)
+
+    response, replayed = asyncio.run(scenario())
+    assert (response.body, replayed, calls) == (b"%PDF-5", True, [])
+    other.close()
+
+
+def test_expired_rows_are_purged_as_new_claims_arrive(store, monkeypatch):
+    compute, _ = _computer(b"%PDF-6")
+    idempotency.execute("old", "fp", compute)
+    store._conn.execute("UPDATE responses SET updated_at = updated_at - ?", (store.ttl_s + 1,))
+    monkeypatch.setattr(idempotency, "PURGE_INTERVAL_S", 0.0)
+
+    idempotency.execute("new", "fp", compute)
+
+    keys = [row[0] for row in store._conn.execute("SELECT key FROM responses")]
+    assert keys == ["new"]
@@ -0,0 +1,76 @@
+import pytest
+
+from app.services import ingest_backends, pdf_ingest
+
+
+def _ruled_instrument_table() -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Title Number 002345678901")
+    page.insert_text((72, 90), "LINC Number 0034567890")
+    page.insert_text((72, 120), "Encumbrances, Liens & Interests")
+    columns = [60, 160, 250, 340, 550]
+    rows = [
+        ("Registration", "Date", "Type", "Remarks"),
+        ("202312345678", "2024/02/01", "MORTGAGE", "To Big Bank"),
+        ("202312345679", "2024/05/12", "CAVEAT", "Re easement"),
+    ]
+    top = 130
+    for row_index, row in enumerate(rows):
+        for column, text in zip(columns, row):
+            page.insert_text((column + 4, top + row_index * 20 + 14), text, fontsize=9)
+    bottom = top + len(rows) * 20
+    for y in range(top, bottom + 1, 20):
+        page.draw_line((columns[0], y), (columns[-1], y))
+    for x in columns:
+        page.draw_line((x, top), (x, bottom))
+    page.insert_text((72, bottom + 30), "TOTAL INSTRUMENTS: 002")
+    return doc.tobytes()
+
+
+def test_table_backend_emits_one_line_per_cell():
+    pdf_bytes = _ruled_instrument_table()
+
+    lines = pdf_ingest._extract_text_lines(pdf_bytes, workers=1, backend="pymupdf-tables")
+
+    texts = [line.text for line in lines]
+    assert texts[texts.index("202312345678") : texts.index("202312345678") + 4] == [
+        "202312345678",
+        "2024/02/01",
+        "MORTGAGE",
+        "To Big Bank",
+    ]
+    instruments = pdf_ingest._extract_metadata(lines)["instruments"]
+    assert [item["document_type_name"] for item in instruments] == ["Mortgage", "Caveat"]
+    assert instruments[1]["remarks"] == "Re easement"
+
+
+@pytest.mark.parametrize("backend", sorted(ingest_backends.BACKENDS))
+def test_backends_recover_the_same_title(backend):
+    if backend == "pdfminer":
+        pytest.importorskip("pdfminer")
+
+    candidates, _ = pdf_ingest.pdf_to_xml_candidates(_ruled_instrument_table(), mode="heuristic", backend=backend)
+
+    assert candidates
+    assert "<TitleNumber>002345678901</TitleNumber>" in candidates[0]
+    assert candidates[0].count("<Instrument>") == 2
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        pdf_ingest.pdf_to_xml_candidates(b"%PDF", backend="ocr-magic")
+
+
+def test_benchmark_scores_fields_against_expected_xml(tmp_path):
+    pytest.importorskip("reportlab")
+    from app.tools import benchmark_ingest
+
+    pairs = benchmark_ingest.write_synthetic_corpus(tmp_path, 2)
+    (report,) = benchmark_ingest.benchmark(pairs, ["pymupdf-words"])
+
+    assert report.documents == 2 and report.failures == 0
+    summary = report.asdict()
+    assert summary["fields"]["title_number"] == 1.0
+    assert summary["fields"]["registration_numbers"] == 1.0
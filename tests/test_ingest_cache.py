@@ -0,0 +1,88 @@
+import shutil
+
+import pytest
+
+from app.services import batch_ingest, ingest_cache, pdf_ingest
+
+
+@pytest.fixture
+def counted_ingest(monkeypatch, tmp_path):
+    calls = []
+
+    def _fake(pdf_bytes, mode="auto", template_id=pdf_ingest.DEFAULT_TEMPLATE_ID, backend=pdf_ingest.DEFAULT_BACKEND):
+        calls.append(pdf_bytes)
+        return [f"<xml>{len(pdf_bytes)}</xml>"], 0.9
+
+    monkeypatch.setattr(pdf_ingest, "pdf_to_xml_candidates", _fake)
+    monkeypatch.setenv(ingest_cache.CACHE_DIR_ENV_VARIABLE, str(tmp_path / "cache"))
+    ingest_cache.reset_cache()
+    yield calls
+    ingest_cache.reset_cache()
+
+
+def test_ingest_results_are_served_from_memory_and_disk(counted_ingest, monkeypatch):
+    first = ingest_cache.ingest(b"%PDF-1.7 one")
+    second = ingest_cache.ingest(b"%PDF-1.7 one")
+    ingest_cache.reset_cache()
+    third = ingest_cache.ingest(b"%PDF-1.7 one", pdf_sha256=first.sha256)
+
+    assert first.cached is False and second.cached is True and third.cached is True
+    assert third.xml_candidates == first.xml_candidates
+    assert len(counted_ingest) == 1
+
+    ingest_cache.ingest(b"%PDF-1.7 one", mode="heuristic")
+    ingest_cache.ingest(b"%PDF-1.7 one", backend="pdfminer")
+    monkeypatch.setattr(pdf_ingest, "INGEST_ENGINE_VERSION", "next")
+    ingest_cache.ingest(b"%PDF-1.7 one")
+    assert len(counted_ingest) == 4
+
+
+def test_empty_results_are_not_cached(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(pdf_ingest, "pdf_to_xml_candidates", lambda data, **_: calls.append(data) or ([], 0.0))
+    monkeypatch.setenv(ingest_cache.CACHE_DIR_ENV_VARIABLE, str(tmp_path))
+    ingest_cache.reset_cache()
+
+    ingest_cache.ingest(b"unreadable")
+    ingest_cache.ingest(b"unreadable")
+
+    assert len(calls) == 2
+
+
+def test_bulk_ingest_skips_byte_identical_files(counted_ingest, tmp_path):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    (archive / "a.pdf").write_bytes(b"%PDF-1.7 first")
+    shutil.copy(archive / "a.pdf", archive / "b.pdf")
+    (archive / "c.pdf").write_bytes(b"%PDF-1.7 second")
+
+    paths = list(batch_ingest.iter_pdf_paths(archive))
+    summary = batch_ingest.IngestSummary()
+    results = {}
+    for result in batch_ingest.ingest_batch(paths, workers=0, skip_duplicates=True):
+        summary.record(result)
+        results[result.source] = result
+
+    assert results[str(archive / "b.pdf")].duplicate_of == str(archive / "a.pdf")
+    assert results[str(archive / "a.pdf")].sha256 == results[str(archive / "b.pdf")].sha256
+    assert len(counted_ingest) == 2
+    assert summary.duplicates == 1 and summary.extracted == 2
+
+    rerun = list(batch_ingest.ingest_batch(paths, workers=0, skip_duplicates=True))
+    assert len(counted_ingest) == 2
+    assert sorted(result.cached for result in rerun) == [False, True, True]
+
+
+def test_disk_tier_is_opt_in(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(pdf_ingest, "pdf_to_xml_candidates", lambda data, **_: calls.append(data) or (["<xml/>"], 0.9))
+    monkeypatch.delenv(ingest_cache.CACHE_DIR_ENV_VARIABLE, raising=False)
+    monkeypatch.chdir(tmp_path)
+    ingest_cache.reset_cache()
+
+    ingest_cache.ingest(b"%PDF-1.7 one")
+    ingest_cache.reset_cache()
+    ingest_cache.ingest(b"%PDF-1.7 one")
+
+    assert len(calls) == 2
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,155 @@
+import zipfile
+
+import pytest
+
+from app.services import batch_ingest, ingest_cache, ingest_jobs, pdf_ingest
+
+
+@pytest.fixture
+def job_env(monkeypatch, tmp_path):
+    calls = []
+
+    def _fake(source, **_kwargs):
+        data = open(source, "rb").read()
+        calls.append(data)
+        return ([f"<xml>{len(data)}</xml>"], 0.9) if data.startswith(b"%PDF") else ([], 0.0)
+
+    monkeypatch.setattr(pdf_ingest, "pdf_to_xml_candidates", _fake)
+    monkeypatch.setenv(ingest_cache.CACHE_DIR_ENV_VARIABLE, str(tmp_path / "cache"))
+    monkeypatch.setenv(ingest_jobs.JOB_DIR_ENV_VARIABLE, str(tmp_path / "jobs"))
+    ingest_cache.reset_cache()
+    ingest_jobs.reset_store()
+    yield calls
+    ingest_jobs.reset_store()
+    ingest_cache.reset_cache()
+
+
+def test_zip_job_records_per_file_results(job_env, tmp_path):
+    job_id = ingest_jobs.new_job_id()
+    archive_path = tmp_path / "jobs" / job_id / ingest_jobs.ZIP_SOURCE_NAME
+    archive_path.parent.mkdir(parents=True)
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("batch/one.pdf", b"%PDF-1.7 one")
+        archive.writestr("batch/copy.pdf", b"%PDF-1.7 one")
+        archive.writestr("../escape.pdf", b"not a pdf")
+        archive.writestr("notes.txt", b"ignored")
+    store = ingest_jobs.get_store()
+    store.create_job(job_id, "zip", str(archive_path), "auto", pdf_ingest.DEFAULT_BACKEND)
+
+    job = ingest_jobs.run_job(job_id, workers=0)
+
+    assert job.status == "completed"
+    assert job.asdict()["total"] == 3 and job.asdict()["processed"] == 3
+    files = {item["name"]: item for item in store.files(job_id)}
+    assert files["batch/one.pdf"]["status"] == "extracted"
+    assert files["batch/one.pdf"]["xml_candidates"] == ["<xml>12</xml>"]
+    assert files["batch/copy.pdf"]["duplicate_of"] == "batch/one.pdf"
+    assert files["../escape.pdf"]["status"] == "failed"
+    assert not (tmp_path / "jobs" / "escape.pdf").exists()
+    assert len(job_env) == 2
+
+
+def test_interrupted_job_resumes_with_pending_files_only(job_env, tmp_path):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    for index in range(4):
+        (archive / f"{index}.pdf").write_bytes(f"%PDF-1.7 {index}".encode())
+    store = ingest_jobs.get_store()
+    job_id = ingest_jobs.new_job_id()
+    store.create_job(job_id, "directory", str(archive), "auto", pdf_ingest.DEFAULT_BACKEND)
+    store.add_files(job_id, ingest_jobs._directory_files(str(archive)))
+    # Simulate a crash after two files: their results are stored, the job is still "running".
+    done = [
+        (seq, batch_ingest.IngestResult(path, ["<xml/>"], 0.9, 1.0), None)
+        for seq, _, path in store.pending_files(job_id)[:2]
+    ]
+    store.record_results(job_id, done)
+    store.set_status(job_id, "running")
+    assert store.unfinished_jobs() == [job_id]
+
+    job = ingest_jobs.run_job(job_id, workers=0)
+
+    assert job.status == "completed" and job.counts == {"extracted": 4}
+    assert len(job_env) == 2
+    assert store.unfinished_jobs() == []
+
+
+def test_directory_submissions_are_limited_to_configured_roots(monkeypatch, tmp_path):
+    monkeypatch.setenv(ingest_jobs.JOB_SOURCE_ROOTS_ENV_VARIABLE, str(tmp_path / "archives"))
+
+    assert ingest_jobs.allowed_directory(str(tmp_path / "archives" / "2024"))
+    assert not ingest_jobs.allowed_directory(str(tmp_path / "archives" / ".." / "elsewhere"))
+    monkeypatch.delenv(ingest_jobs.JOB_SOURCE_ROOTS_ENV_VARIABLE)
+    assert not ingest_jobs.allowed_directory(str(tmp_path / "archives"))
+
+
+def test_a_job_is_claimed_by_one_worker_until_its_heartbeat_goes_stale(job_env, tmp_path, monkeypatch):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    (archive / "0.pdf").write_bytes(b"%PDF-1.7 0")
+    store = ingest_jobs.get_store()
+    job_id = ingest_jobs.new_job_id()
+    store.create_job(job_id, "directory", str(archive), "auto", pdf_ingest.DEFAULT_BACKEND)
+
+    assert store.claim_job(job_id, "host:1", stale_s=60)
+    assert not store.claim_job(job_id, "host:2", stale_s=60)
+    assert ingest_jobs.is_claimed(store.get_job(job_id))
+
+    # Another worker (this process) finds the job in the hands of a live owner and leaves it alone.
+    job = ingest_jobs.run_job(job_id, workers=0)
+    assert job.status == "running" and job.owner == "host:1"
+    assert job_env == []
+
+    # Once the owner's heartbeat is stale the job is claimable again and runs to completion.
+    monkeypatch.setenv(ingest_jobs.JOB_STALE_ENV_VARIABLE, "0")
+    assert store.claimable_jobs(0) == [job_id]
+    job = ingest_jobs.run_job(job_id, workers=0)
+    assert job.status == "completed" and job.owner is None
+    assert len(job_env) == 1
+    # The stale owner cannot overwrite the outcome or keep the job alive.
+    store.finish_job(job_id, "host:1", "failed", "late")
+    assert not store.heartbeat(job_id, "host:1")
+    assert store.get_job(job_id).status == "completed"
+
+
+def test_resume_rejects_a_job_running_on_a_live_worker(job_env, tmp_path):
+    httpx = pytest.importorskip("httpx")
+    import asyncio
+
+    from app.main import app
+
+    store = ingest_jobs.get_store()
+    job_id = ingest_jobs.new_job_id()
+    store.create_job(job_id, "directory", str(tmp_path), "auto", pdf_ingest.DEFAULT_BACKEND)
+    assert store.claim_job(job_id, "elsewhere:1", stale_s=60)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(f"/v1/ingest-jobs/{job_id}/resume")
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 409
+    assert "already running" in response.json()["detail"]
+
+
+def test_resumed_job_flags_copies_of_files_finished_before_the_restart(job_env, tmp_path):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    (archive / "a.pdf").write_bytes(b"%PDF-1.7 same")
+    (archive / "b.pdf").write_bytes(b"%PDF-1.7 other")
+    (archive / "c.pdf").write_bytes(b"%PDF-1.7 same")
+    store = ingest_jobs.get_store()
+    job_id = ingest_jobs.new_job_id()
+    store.create_job(job_id, "directory", str(archive), "auto", pdf_ingest.DEFAULT_BACKEND)
+    store.add_files(job_id, ingest_jobs._directory_files(str(archive)))
+    # The crash came after a.pdf; its copy c.pdf is still pending.
+    seq, _, path = store.pending_files(job_id)[0]
+    first = next(batch_ingest.ingest_batch([path], workers=0, skip_duplicates=True))
+    store.record_results(job_id, [(seq, first, None)])
+    store.set_status(job_id, "running")
+
+    job = ingest_jobs.run_job(job_id, workers=0)
+
+    assert job.counts == {"extracted": 2, "duplicate": 1}
+    files = {item["name"]: item for item in store.files(job_id)}
+    assert files["c.pdf"]["duplicate_of"] == "a.pdf"
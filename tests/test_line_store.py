@@ -0,0 +1,43 @@
+from app.services.line_store import LineStore, TextLine
+
+
+def _words():
+    # (x0, y0, x1, y1, word, block, line, word_no), deliberately out of order.
+    return [
+        (160.0, 100.0, 200.0, 110.0, "2024-02-01", 1, 0, 0),
+        (40.0, 100.0, 100.0, 110.0, "202312345678", 0, 0, 0),
+        (290.0, 100.0, 330.0, 110.0, "Bank", 2, 0, 1),
+        (240.0, 100.0, 285.0, 110.0, "Mortgage", 2, 0, 0),
+        (40.0, 114.0, 100.0, 124.0, "202312345679", 0, 1, 0),
+        (240.0, 114.0, 300.0, 124.0, "Assignment", 2, 1, 0),
+    ]
+
+
+def test_from_words_groups_lines_with_union_boxes():
+    store = LineStore.from_words(_words(), page_index=3)
+
+    assert store.texts == ["202312345678", "202312345679", "2024-02-01", "Mortgage Bank", "Assignment"]
+    assert store.text_lines()[3] == TextLine("Mortgage Bank", "MORTGAGE BANK", 3, (240.0, 100.0, 330.0, 110.0))
+    assert store.pages.tolist() == [3] * 5
+
+
+def test_band_range_and_table_clustering():
+    store = LineStore.from_words(_words(), page_index=0)
+
+    assert store.in_y_band(95, 111).tolist() == [0, 2, 3]
+    assert store.in_x_range(150, 250).tolist() == [2]
+    rows = store.cluster_rows()
+    assert [[store.texts[i] for i in row] for row in rows] == [
+        ["202312345678", "2024-02-01", "Mortgage Bank"],
+        ["202312345679", "Assignment"],
+    ]
+    edges = store.cluster_columns()
+    assert edges.tolist() == [40.0, 160.0, 240.0]
+    assert store.column_of(rows[1], edges).tolist() == [0, 2]
+
+
+def test_lines_without_geometry_are_degenerate():
+    store = LineStore.from_words([(0.0, 0.0, 0.0, 0.0, "x", 0, 0, 0)], page_index=0)
+
+    assert store.degenerate()
+    assert LineStore.empty().cluster_rows() == []
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+prometheus_client = pytest.importorskip("prometheus_client")
+pytest.importorskip("reportlab")
+httpx = pytest.importorskip("httpx")
+
+from app.main import app
+from app.services import renderer
+
+XML = '<Title><TitleNumber>METRICS-1</TitleNumber><Owners/><Instruments/></Title>'
+
+
+def _sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_render_records_stage_latencies_and_pages():
+    before = {stage: _sample("titan_stage_seconds_count", stage=stage) for stage in ("compose", "draw", "save")}
+    pages_before = _sample("titan_pages_rendered_total")
+
+    renderer.render(XML, options={"pdfa": False})
+
+    for stage, count in before.items():
+        assert _sample("titan_stage_seconds_count", stage=stage) == count + 1
+    assert _sample("titan_pages_rendered_total") > pages_before
+
+
+def test_requests_are_counted_by_route_template():
+    labels = {"endpoint": "/v1/ingest-jobs/{job_id}", "method": "GET", "status": "404"}
+    before = _sample("titan_http_requests_total", **labels)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/v1/ingest-jobs/missing-1")
+            await client.get("/v1/ingest-jobs/missing-2")
+            return await client.get("/metrics")
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "titan_stage_seconds_bucket" in response.text
+    assert _sample("titan_http_requests_total", **labels) == before + 2
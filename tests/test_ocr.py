@@ -0,0 +1,118 @@
+import pytest
+
+from app.services import ocr, pdf_ingest
+
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+
+
+def _tsv(*rows):
+    return TSV_HEADER + "".join("\t".join(str(value) for value in row) + "\n" for row in rows)
+
+
+CANNED_TSV = _tsv(
+    (1, 1, 0, 0, 0, 0, 0, 0, 2550, 3300, -1, ""),
+    (5, 1, 1, 1, 1, 1, 300, 300, 200, 50, 95.1, "Title"),
+    (5, 1, 1, 1, 1, 2, 520, 300, 250, 50, 93.4, "Number"),
+    (5, 1, 1, 1, 1, 3, 800, 300, 600, 50, 90.0, "002345678901"),
+    (5, 1, 1, 1, 2, 1, 300, 400, 200, 50, -1, ""),
+    (5, 1, 2, 1, 1, 1, 300, 600, 300, 50, 88.0, "LINC"),
+)
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    calls = []
+
+    def _run(png_bytes, lang):
+        calls.append(lang)
+        return CANNED_TSV
+
+    monkeypatch.setattr(ocr, "_tesseract_cmd", lambda: "/usr/bin/tesseract")
+    monkeypatch.setattr(ocr, "_run_tesseract", _run)
+    monkeypatch.setenv(ocr.OCR_DPI_ENV_VARIABLE, "50")
+    ocr.reset_cache()
+    yield calls
+    ocr.reset_cache()
+
+
+def _scanned_pdf(text_pages=1, blank_pages=2) -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for index in range(text_pages):
+        doc.new_page().insert_text((72, 72), f"Text layer page {index + 1}")
+    for _ in range(blank_pages):
+        doc.new_page()
+    return doc.tobytes()
+
+
+def test_parse_tsv_groups_words_into_scaled_lines():
+    lines = ocr.parse_tsv(CANNED_TSV, scale=72.0 / 300)
+
+    assert [text for text, _ in lines] == ["Title Number 002345678901", "LINC"]
+    assert lines[0][1] == pytest.approx((72.0, 72.0, 336.0, 84.0))
+
+
+def test_textless_pages_are_ocrd_once_per_distinct_image(fake_tesseract):
+    lines = pdf_ingest._extract_text_lines(_scanned_pdf(), workers=1)
+
+    assert [line.page for line in lines] == [0, 1, 1, 2, 2]
+    assert lines[1].text == "Title Number 002345678901"
+    assert lines[1].upper == "TITLE NUMBER 002345678901"
+    # Both blank scans rasterise to the same image, so tesseract runs once.
+    assert len(fake_tesseract) == 1
+
+    pdf_ingest._extract_text_lines(_scanned_pdf(), workers=1)
+    assert len(fake_tesseract) == 1
+
+
+def test_ocr_results_persist_in_disk_cache(fake_tesseract, monkeypatch, tmp_path):
+    monkeypatch.setenv(ocr.OCR_CACHE_DIR_ENV_VARIABLE, str(tmp_path))
+    pdf_bytes = _scanned_pdf(text_pages=0, blank_pages=1)
+
+    first = pdf_ingest._extract_text_lines(pdf_bytes, workers=1)
+    ocr.reset_cache()
+    second = pdf_ingest._extract_text_lines(pdf_bytes, workers=1)
+
+    assert first == second
+    assert len(fake_tesseract) == 1
+    assert list(tmp_path.rglob("*.json"))
+
+
+def test_ocr_is_skipped_when_disabled(fake_tesseract, monkeypatch):
+    monkeypatch.setenv(ocr.OCR_ENABLED_ENV_VARIABLE, "0")
+
+    lines = pdf_ingest._extract_text_lines(_scanned_pdf(), workers=1)
+
+    assert [line.page for line in lines] == [0]
+    assert fake_tesseract == []
+
+
+def test_scanned_pages_are_ocrd_in_one_batch(fake_tesseract, monkeypatch):
+    batches = []
+    original = ocr.ocr_pages
+
+    def _recording(doc, page_indices, **kwargs):
+        batches.append(list(page_indices))
+        return original(doc, page_indices, **kwargs)
+
+    monkeypatch.setattr(ocr, "ocr_pages", _recording)
+
+    pdf_ingest.pdf_to_xml_candidates(_scanned_pdf(text_pages=1, blank_pages=3), mode="heuristic")
+    long_scan = _scanned_pdf(text_pages=0, blank_pages=pdf_ingest.EARLY_STOP_PAGE_LIMIT + 2)
+    pdf_ingest.pdf_to_xml_candidates(long_scan, mode="heuristic")
+
+    assert batches == [[1, 2, 3], list(range(pdf_ingest.EARLY_STOP_PAGE_LIMIT + 2))]
+
+
+def test_ocr_stays_single_threaded_inside_batch_workers(monkeypatch):
+    from app.utils import pool
+
+    monkeypatch.delenv(ocr.OCR_WORKERS_ENV_VARIABLE, raising=False)
+    monkeypatch.setattr(ocr.os, "cpu_count", lambda: 8)
+    assert ocr._workers() == 8
+    monkeypatch.setattr(pool, "_IN_WORKER", True)
+    assert ocr._workers() == 1
+
+    monkeypatch.setenv(ocr.OCR_WORKERS_ENV_VARIABLE, "3")
+    assert ocr._workers() == 3
@@ -1,3 +1,4 @@
+import pytest
 from lxml import etree
 
 from app.services import pdf_ingest
@@ -21,7 +22,7 @@ def test_pdf_ingest_returns_candidate_with_detected_fields(monkeypatch):
         _line("202312345678 2024/02/01 MORTGAGE Mortgage to Big Bank"),
     ]
 
-    monkeypatch.setattr(pdf_ingest, "_extract_text_lines", lambda _: lines)
+    monkeypatch.setattr(pdf_ingest, "_extract_text_lines", lambda _source, **_kwargs: lines)
 
     candidates, confidence = pdf_ingest.pdf_to_xml_candidates(b"%PDF")
     assert candidates
@@ -40,8 +41,311 @@ def test_pdf_ingest_requires_core_identifiers(monkeypatch):
         _line("Some Unrelated Text"),
         _line("LINC Number 0034567890"),
     ]
-    monkeypatch.setattr(pdf_ingest, "_extract_text_lines", lambda _: lines)
+    monkeypatch.setattr(pdf_ingest, "_extract_text_lines", lambda _source, **_kwargs: lines)
 
     candidates, confidence = pdf_ingest.pdf_to_xml_candidates(b"%PDF")
     assert candidates == []
     assert confidence == 0.0
+
+
+def _multi_page_pdf(page_count: int) -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for index in range(page_count):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {index + 1} heading")
+        page.insert_text((72, 100), f"202312345{index:03d} 2024/02/01 MORTGAGE Remark {index + 1}")
+    return doc.tobytes()
+
+
+def test_page_parallel_extraction_matches_serial_order():
+    pdf_bytes = _multi_page_pdf(pdf_ingest.PARALLEL_PAGE_THRESHOLD + 2)
+
+    serial = pdf_ingest._extract_text_lines(pdf_bytes, workers=1)
+    parallel = pdf_ingest._extract_text_lines(pdf_bytes, workers=2)
+
+    assert parallel == serial
+    assert [line.page for line in parallel] == sorted(line.page for line in parallel)
+    assert parallel[-1].text.startswith("202312345")
+
+
+def test_batch_ingest_reports_each_file(tmp_path):
+    from app.services import batch_ingest
+
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "one.pdf").write_bytes(_multi_page_pdf(1))
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    paths = list(batch_ingest.iter_pdf_paths(tmp_path))
+    assert paths == [str(tmp_path / "broken.pdf"), str(tmp_path / "nested" / "one.pdf")]
+
+    summary = batch_ingest.IngestSummary()
+    results = {}
+    for result in batch_ingest.ingest_batch(paths, workers=2):
+        summary.record(result)
+        results[result.source] = result
+    assert set(results) == set(paths)
+    assert results[str(tmp_path / "broken.pdf")].ok is False
+    assert summary.total == 2 and summary.failed == 2
+
+
+def test_section_index_bounds_each_section_once():
+    lines = [
+        _line("Title Number 002345678901"),
+        _line("Legal Description"),
+        _line("LOT 1 BLOCK 2 PLAN 2314KS"),
+        _line("Registered Owner(s)"),
+        _line("1. DOE JOHN A 1/2"),
+        _line("Encumbrances, Liens & Interests"),
+        _line("202312345678 2024/02/01 MORTGAGE Mortgage to Big Bank"),
+        _line("TOTAL INSTRUMENTS: 001"),
+        _line("202399999999 2024/03/01 CAVEAT After the total marker"),
+    ]
+
+    index = pdf_ingest._build_section_index(lines)
+
+    assert index.anchors("TITLE NUMBER") == [0]
+    assert index.section_range("LEGAL DESCRIPTION", ("REGISTERED OWNER", "ENCUMBRANCES")) == (2, 3)
+    assert index.section_range("REGISTERED OWNER", ("ENCUMBRANCES", "INSTRUMENTS")) == (4, 5)
+    assert index.section_range("ENCUMBRANCES", ("TOTAL",)) == (6, 7)
+    instruments = pdf_ingest._extract_instruments(lines, index)
+    assert [inst["registration_number"] for inst in instruments] == ["202312345678"]
+
+
+def _rendered_sample(extra_instruments: int = 0) -> bytes:
+    pytest.importorskip("reportlab")
+    pytest.importorskip("fitz")
+    import copy
+
+    from app.services import renderer
+
+    root = etree.parse("app/data/samples/sample.xml").getroot()
+    instruments = root.find(".//Instruments")
+    for index in range(extra_instruments):
+        instrument = copy.deepcopy(instruments[0])
+        instrument.find("RegistrationNumber").text = f"3000000{index:05d}"
+        instrument.find("DocumentType/PrintText").text = (
+            f"Caveat {index} with remarks long enough to wrap across several lines of the remarks column"
+        )
+        instruments.append(instrument)
+    return renderer.render(etree.tostring(root, encoding="unicode"), options={"pdfa": False})
+
+
+def test_generated_pdf_round_trips_through_template_regions():
+    pdf_bytes = _rendered_sample()
+
+    candidates, confidence = pdf_ingest.pdf_to_xml_candidates(pdf_bytes)
+
+    assert confidence >= 0.9
+    root = etree.fromstring(candidates[0].encode("utf-8"))
+    assert root.findtext(".//TitleNumber") == "123456789012"
+    assert root.findtext(".//LINCNumber") == "0034567890"
+    assert root.findtext(".//Municipality/Name") == "City of Edmonton"
+    assert [name.text for name in root.findall(".//Party/Name")] == ["DOE JOHN A", "DOE JANE B", "ACME HOLDINGS INC."]
+    assert [node.text for node in root.findall(".//Instrument/RegistrationDate")] == ["2024-02-01", "2024-05-12"]
+
+
+def test_template_tables_continue_across_pages_and_join_wrapped_cells():
+    fitz = pytest.importorskip("fitz")
+    pdf_bytes = _rendered_sample(extra_instruments=40)
+    assert fitz.open(stream=pdf_bytes, filetype="pdf").page_count > 1
+
+    with pdf_ingest._open_document(pdf_bytes) as doc:
+        extracted = pdf_ingest._extract_template_fields(doc, pdf_ingest.template_regions.load_geometry("alberta_title_v1"))
+
+    instruments = extracted["instruments"]
+    assert len(instruments) == 42
+    assert instruments[-1]["registration_number"] == "300000000039"
+    assert instruments[2]["remarks"].endswith("lines of the remarks column")
+    assert len(extracted["owners"]) == 3
+
+
+def test_heuristic_mode_skips_template_regions():
+    pdf_bytes = _rendered_sample()
+
+    assert pdf_ingest._read_generated(pdf_bytes, "heuristic", "alberta_title_v1") == (None, None)
+    with pytest.raises(ValueError):
+        pdf_ingest.pdf_to_xml_candidates(pdf_bytes, mode="guess")
+
+
+def test_embedded_xml_is_returned_verbatim_without_text_extraction(monkeypatch):
+    pytest.importorskip("reportlab")
+    pytest.importorskip("fitz")
+    from app.services import renderer
+
+    xml = open("app/data/samples/sample.xml", encoding="utf-8").read()
+    pdf_bytes = renderer.render(xml, options={"pdfa": False, "embed_xml": True})
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("text extraction should not run")
+
+    monkeypatch.setattr(pdf_ingest, "_extract_text_lines", _fail)
+    monkeypatch.setattr(pdf_ingest, "_extract_template_fields", _fail)
+
+    assert pdf_ingest.pdf_to_xml_candidates(pdf_bytes) == ([xml], 1.0)
+
+
+def test_embedded_xml_must_match_document_id():
+    fitz = pytest.importorskip("fitz")
+    import hashlib
+
+    xml = open("app/data/samples/sample.xml", encoding="utf-8").read()
+    digest = hashlib.sha256(xml.encode("utf-8")).hexdigest()
+    doc = fitz.open()
+    doc.new_page()
+    doc.xref_set_key(-1, "ID", f"[<{digest}><{digest}>]")
+    doc.embfile_add(pdf_ingest.EMBEDDED_XML_NAME, xml.encode("utf-8"))
+    assert pdf_ingest._embedded_xml(doc) == xml
+
+    doc.embfile_del(pdf_ingest.EMBEDDED_XML_NAME)
+    doc.embfile_add(pdf_ingest.EMBEDDED_XML_NAME, xml.replace("123456789012", "999999999999").encode("utf-8"))
+    assert pdf_ingest._embedded_xml(doc) is None
+
+
+def test_embedded_files_join_existing_name_trees():
+    fitz = pytest.importorskip("fitz")
+    import io
+
+    from reportlab.pdfbase import pdfdoc
+    from reportlab.pdfgen import canvas
+
+    from app.utils import pdfa
+
+    buffer = io.BytesIO()
+    canvas_obj = canvas.Canvas(buffer)
+    canvas_obj._doc.Catalog.Names = pdfdoc.PDFDictionary(
+        {"JavaScript": pdfdoc.PDFDictionary({"Names": pdfdoc.PDFArray([])})}
+    )
+    pdfa.embed_associated_file(canvas_obj, "b.xml", b"<b/>", "text/xml", "second")
+    pdfa.embed_associated_file(canvas_obj, "a.xml", b"<a/>", "text/xml", "first")
+    canvas_obj.showPage()
+    canvas_obj.save()
+
+    doc = fitz.open(stream=buffer.getvalue(), filetype="pdf")
+    assert doc.embfile_names() == ["a.xml", "b.xml"]
+    assert doc.embfile_get("b.xml") == b"<b/>"
+    assert doc.xref_get_key(doc.pdf_catalog(), "Names/JavaScript")[0] == "dict"
+    assert doc.xref_get_key(doc.pdf_catalog(), "AF")[1].count(" R") == 2
+
+
+def test_ingest_accepts_a_file_path(tmp_path):
+    pdf_bytes = _rendered_sample()
+    path = tmp_path / "title.pdf"
+    path.write_bytes(pdf_bytes)
+
+    assert pdf_ingest.pdf_to_xml_candidates(str(path)) == pdf_ingest.pdf_to_xml_candidates(pdf_bytes)
+    assert pdf_ingest._extract_text_lines(path, workers=1) == pdf_ingest._extract_text_lines(pdf_bytes, workers=1)
+
+
+def _text_pdf(pages) -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for page_lines in pages:
+        page = doc.new_page()
+        for row, text in enumerate(page_lines):
+            page.insert_text((72, 72 + row * 16), text)
+    return doc.tobytes()
+
+
+HEADER_PAGE = [
+    "Title Number 002345678901",
+    "LINC Number 0034567890",
+    "Encumbrances, Liens & Interests",
+    "202312345678 2024/02/01 MORTGAGE Mortgage to Big Bank",
+    "TOTAL INSTRUMENTS: 001",
+]
+
+
+def _count_pages(monkeypatch):
+    seen = []
+    original = pdf_ingest._page_text_lines
+
+    def _counting(page, page_index, *args):
+        seen.append(page_index)
+        return original(page, page_index, *args)
+
+    monkeypatch.setattr(pdf_ingest, "_page_text_lines", _counting)
+    return seen
+
+
+def test_scan_stops_after_the_page_that_completes_the_document(monkeypatch):
+    pdf_bytes = _text_pdf([HEADER_PAGE] + [[f"Schedule page {n}"] for n in range(8)])
+    seen = _count_pages(monkeypatch)
+
+    candidates, _ = pdf_ingest.pdf_to_xml_candidates(pdf_bytes, mode="heuristic")
+
+    assert candidates
+    assert seen == [0]
+
+
+def test_scan_reads_on_until_required_fields_appear(monkeypatch):
+    pages = [HEADER_PAGE[:1], ["Schedule"], HEADER_PAGE[1:], ["Trailing plan"], ["Trailing plan"]]
+    seen = _count_pages(monkeypatch)
+
+    candidates, _ = pdf_ingest.pdf_to_xml_candidates(_text_pdf(pages), mode="heuristic")
+
+    assert candidates
+    assert seen == [0, 1, 2]
+
+
+def test_incomplete_early_stop_falls_back_to_full_scan(monkeypatch):
+    # Page 1 looks complete, but its instrument has no date, so no document can be built from it.
+    undated = HEADER_PAGE[:3] + ["202312345678 MORTGAGE Mortgage to Big Bank", "TOTAL INSTRUMENTS: 001"]
+    seen = _count_pages(monkeypatch)
+
+    candidates, confidence = pdf_ingest.pdf_to_xml_candidates(_text_pdf([undated, ["Schedule"]]), mode="heuristic")
+
+    assert candidates == [] and confidence == 0.0
+    # The fallback carries on from page 2 instead of reading page 1 again.
+    assert seen == [0, 1]
+
+
+def test_long_scan_falls_back_without_rereading_pages(monkeypatch):
+    pdf_bytes = _multi_page_pdf(pdf_ingest.EARLY_STOP_PAGE_LIMIT + 3)
+    seen = _count_pages(monkeypatch)
+
+    pdf_ingest.pdf_to_xml_candidates(pdf_bytes, mode="heuristic")
+
+    assert seen == list(range(pdf_ingest.EARLY_STOP_PAGE_LIMIT + 3))
+
+
+def test_heuristic_ingest_rebuilds_instrument_table_from_geometry():
+    pdf_bytes = _rendered_sample(extra_instruments=12)
+
+    lines = pdf_ingest._extract_text_lines(pdf_bytes, workers=1)
+    instruments = pdf_ingest._extract_metadata(lines)["instruments"]
+
+    assert len(instruments) == 14
+    assert instruments[0]["document_type_name"] == "Mortgage"
+    assert instruments[0]["remarks"] == "Mortgage to Big Bank"
+    assert instruments[-1]["registration_number"] == "300000000011"
+    assert instruments[-1]["remarks"].endswith("several lines of the remarks column")
+
+
+def test_batch_workers_never_start_a_nested_page_pool(tmp_path, monkeypatch):
+    from app.services import batch_ingest
+
+    marker = tmp_path / "nested-pools"
+
+    class RecordingPool:
+        # Forked batch workers inherit this patch; any page pool they start leaves a marker behind.
+        def __init__(self, *args, **kwargs):
+            with open(marker, "a", encoding="utf-8") as handle:
+                handle.write("nested\n")
+            raise RuntimeError("nested page pool")
+
+    monkeypatch.setattr(pdf_ingest, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setenv(pdf_ingest.PAGE_WORKERS_ENV_VARIABLE, "2")
+    # Long enough that the pages left after the lazy scan would still go to the page-parallel extraction.
+    large = _multi_page_pdf(pdf_ingest.EARLY_STOP_PAGE_LIMIT + pdf_ingest.PARALLEL_PAGE_THRESHOLD + 2)
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"large-{index}.pdf"
+        path.write_bytes(large)
+        paths.append(str(path))
+
+    results = list(batch_ingest.ingest_batch(paths, workers=2, mode="heuristic"))
+    assert len(results) == 3
+    assert all(result.error is None for result in results)
+    assert not marker.exists()
@@ -0,0 +1,63 @@
+import asyncio
+import pstats
+
+import pytest
+
+pytest.importorskip("reportlab")
+httpx = pytest.importorskip("httpx")
+
+from app.api.profiling import ProfilingMiddleware
+from app.main import app
+from app.utils import profiling
+
+XML = '<Title><TitleNumber>PROFILE-1</TitleNumber><Owners/><Instruments/></Title>'
+
+
+def _post_render(client_app, url, headers=None):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=client_app), base_url="http://test") as client:
+            return await client.post(url, json={"xml": XML, "options": {"pdfa": False}}, headers=headers or {})
+
+    return asyncio.run(scenario())
+
+
+def test_profiled_render_reports_server_timing_and_writes_capture(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_TOKEN", "secret")
+    monkeypatch.setenv("PROFILING_DIR", str(tmp_path))
+    profiled_app = ProfilingMiddleware(app)
+
+    response = _post_render(profiled_app, "/v1/render?profile=1", {"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    for span in ("parse;", "compose.StaticText;", "draw;", "qr;", "save;", "total;"):
+        assert span in timing
+    captures = list(tmp_path.glob(f"*-{response.headers['x-profile-id']}.prof"))
+    assert len(captures) == 1
+    assert pstats.Stats(str(captures[0])).total_calls > 0
+
+    assert _post_render(profiled_app, "/v1/render", {"X-Profile": "1", "X-Profile-Token": "wrong"}).status_code == 403
+    plain = _post_render(profiled_app, "/v1/render")
+    assert plain.status_code == 200 and "server-timing" not in plain.headers
+
+
+def test_helpers_are_inert_without_an_active_profile():
+    def work():
+        return 42
+
+    assert profiling.current() is None
+    assert profiling.wrap(work) is work
+    with profiling.span("anything"):
+        pass
+
+    profile = profiling.Profile("test")
+    token = profiling.activate(profile)
+    try:
+        with profiling.span("step"):
+            pass
+        with profiling.span("step"):
+            pass
+        assert profiling.wrap(work)() == 42
+    finally:
+        profiling.deactivate(token)
+    assert profile.spans()["step"]["count"] == 2
+    assert 'step;dur=' in profile.server_timing()
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import scheduler
+from app.utils.singleflight import SingleFlight
+
+
+def _run_all(sched, jobs):
+    """Occupy every slot, queue ``jobs`` as ``(name, cost, lane)``, then free the slots; returns start order."""
+
+    order = []
+    gate = threading.Event()
+
+    async def scenario():
+        blockers = [asyncio.create_task(sched.run(gate.wait, cost=1, lane=scheduler.INTERACTIVE)) for _ in range(sched.workers)]
+        await asyncio.sleep(0.05)
+        queued = []
+        for name, cost, lane in jobs:
+            queued.append(asyncio.create_task(sched.run(lambda name=name: order.append(name), cost=cost, lane=lane)))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        gate.set()
+        await asyncio.gather(*blockers, *queued)
+
+    asyncio.run(scenario())
+    return order
+
+
+def test_interactive_lane_first_then_shortest_job():
+    sched = scheduler.CostScheduler(workers=1, bulk_slots=1, aging_ms_per_s=0)
+    order = _run_all(
+        sched,
+        [
+            ("bulk-small", 10, scheduler.BULK),
+            ("long", 4000, scheduler.INTERACTIVE),
+            ("short", 100, scheduler.INTERACTIVE),
+        ],
+    )
+    assert order == ["short", "long", "bulk-small"]
+    assert sched.stats()["lanes"]["bulk"]["completed"] == 1
+
+
+def test_aging_lets_long_jobs_overtake_newer_short_ones():
+    sched = scheduler.CostScheduler(workers=1, bulk_slots=1, aging_ms_per_s=1_000_000)
+    order = _run_all(sched, [("long", 4000, scheduler.INTERACTIVE), ("short", 100, scheduler.INTERACTIVE)])
+    # With aggressive aging the job queued first has the lower effective cost by the time a slot frees.
+    assert order == ["long", "short"]
+
+
+def test_bulk_lane_is_capped_and_costs_follow_the_document():
+    async def scenario():
+        sched = scheduler.CostScheduler(workers=2, bulk_slots=1)
+        gate = threading.Event()
+        bulk = [asyncio.create_task(sched.run(gate.wait, lane=scheduler.BULK)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert sched.stats()["lanes"]["bulk"] == {"running": 1, "waiting": 1, "completed": 0, "wait_s": 0.0}
+        # The slot bulk may not use still serves interactive work straight away.
+        assert await asyncio.wait_for(sched.run(lambda: "ok"), 1) == "ok"
+        gate.set()
+        await asyncio.gather(*bulk)
+
+    asyncio.run(scenario())
+
+    small = "<Title><Instruments><Instrument/></Instruments></Title>"
+    large = "<Title><Instruments>" + "<Instrument>x</Instrument>" * 500 + "</Instruments></Title>"
+    assert scheduler.estimate_render_cost(large) > 10 * scheduler.estimate_render_cost(small)
+    assert scheduler.estimate_ingest_cost(40, 8 << 20) > scheduler.estimate_ingest_cost(1, 50_000)
+
+
+def test_cancelled_leader_does_not_fail_followers_of_a_running_call():
+    flight = SingleFlight()
+    sched = scheduler.CostScheduler(workers=1, bulk_slots=1)
+    started, finished = threading.Event(), []
+
+    def slow():
+        started.set()
+        time.sleep(0.2)
+        finished.append(True)
+        return "pdf"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do_async("key", slow, runner=sched.run))
+        await asyncio.to_thread(started.wait)
+        follower = asyncio.create_task(flight.do_async("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    # The leader left while ``slow`` was running: the follower still gets its result, no second run.
+    assert asyncio.run(scenario()) == ("pdf", True)
+    assert finished == [True] and flight.in_flight() == 0
+
+
+def test_cancelled_leader_releases_followers_while_still_queued():
+    flight = SingleFlight()
+    sched = scheduler.CostScheduler(workers=1, bulk_slots=1)
+    gate, calls = threading.Event(), []
+
+    async def scenario():
+        blocker = asyncio.create_task(sched.run(gate.wait))
+        await asyncio.sleep(0.01)
+        leader = asyncio.create_task(flight.do_async("key", lambda: calls.append("ran"), runner=sched.run))
+        follower = asyncio.create_task(flight.do_async("key", lambda: calls.append("ran")))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(RuntimeError, match="cancelled before it ran"):
+            await follower
+        gate.set()
+        await blocker
+
+    asyncio.run(scenario())
+    assert calls == [] and flight.in_flight() == 0
+
+
+def test_cancelled_follower_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    sched = scheduler.CostScheduler(workers=1, bulk_slots=1)
+    gate, calls = threading.Event(), []
+
+    def render():
+        calls.append("ran")
+        return "pdf"
+
+    async def scenario():
+        blocker = asyncio.create_task(sched.run(gate.wait))
+        await asyncio.sleep(0.01)
+        leader = asyncio.create_task(flight.do_async("key", render, runner=sched.run))
+        follower = asyncio.create_task(flight.do_async("key", render))
+        other = asyncio.create_task(flight.do_async("key", render))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        try:
+            with pytest.raises(asyncio.CancelledError):
+                await follower
+        finally:
+            gate.set()
+            await blocker
+        return await leader, await other
+
+    assert asyncio.run(scenario()) == (("pdf", False), ("pdf", True))
+    assert calls == ["ran"] and flight.in_flight() == 0
+
+
+def test_self_pooled_bulk_work_is_capped_at_the_bulk_slots(monkeypatch):
+    from app.services import ingest_jobs
+
+    monkeypatch.setenv(scheduler.WORKERS_ENV_VARIABLE, "8")
+    monkeypatch.setenv(scheduler.BULK_SLOTS_ENV_VARIABLE, "2")
+    scheduler.reset_scheduler()
+    try:
+        assert [scheduler.bulk_workers(requested) for requested in (None, 8, 1, 0)] == [2, 2, 1, 0]
+        monkeypatch.setenv(ingest_jobs.JOB_WORKERS_ENV_VARIABLE, "16")
+        assert ingest_jobs._workers() == 2
+    finally:
+        scheduler.reset_scheduler()
@@ -0,0 +1,43 @@
+from app.services import template_regions
+
+
+def test_concat_bindings_compile_to_labelled_lines():
+    template = {
+        "page": {"width": 612, "height": 792, "margins": {"t": 48, "b": 48}, "baseline": {"leading": 12}},
+        "elements": [
+            {
+                "type": "TextBox",
+                "x": 36,
+                "y": 84,
+                "width": 260,
+                "height": 72,
+                "binding": "concat('Title Number: ', /T/TitleNumber, '\n', 'LINC: ', /T/LINC)",
+            },
+            {
+                "type": "RepeatingTable",
+                "x": 36,
+                "y": 288,
+                "header_size": 10,
+                "binding": "/T/Instruments/Instrument",
+                "columns": [
+                    {"header": "Registration", "binding": "./RegistrationNumber", "width": 120},
+                    {"header": "Date", "binding": "./RegistrationDate", "width": 80},
+                ],
+            },
+            {"type": "StaticText", "text": "Notes", "x": 36, "y": 400, "size": 11},
+        ],
+    }
+
+    geometry = template_regions.compile_geometry(template)
+
+    (box,) = geometry.boxes
+    assert box.rect == (36.0, 78.0, 296.0, 162.0)
+    assert [(line.label, line.xpaths) for line in box.lines] == [
+        ("Title Number:", ("/T/TitleNumber",)),
+        ("LINC:", ("/T/LINC",)),
+    ]
+    (table,) = geometry.tables
+    assert [(column.x0, column.x1) for column in table.columns] == [(36.0, 156.0), (156.0, 236.0)]
+    # StaticText is positioned by baseline, so the table ends where its glyphs start.
+    assert table.first_page_bottom == 389.0
+    assert geometry.bottom_limit == 744.0
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+
+import pytest
+
+from app.services import title_numbers
+
+
+@pytest.fixture
+def allocator_db(monkeypatch, tmp_path):
+    path = tmp_path / "title_numbers.sqlite3"
+    monkeypatch.setenv(title_numbers.DB_PATH_ENV_VARIABLE, str(path))
+    monkeypatch.setenv(title_numbers.BLOCK_SIZE_ENV_VARIABLE, "10")
+    title_numbers.reset_allocator()
+    yield str(path)
+    title_numbers.reset_allocator()
+
+
+def _reserve_in_process(path, count, queue):
+    allocator = title_numbers.TitleNumberAllocator(path, block_size=7)
+    queue.put([allocator.reserve() for _ in range(count)])
+
+
+def test_sequential_numbers_persist_across_restarts(allocator_db):
+    first = title_numbers.reserve()
+    assert first == str(title_numbers.FIRST_NUMBER)
+    assert title_numbers.reserve() == str(title_numbers.FIRST_NUMBER + 1)
+
+    # A restart abandons the rest of the leased block instead of reissuing it.
+    title_numbers.reset_allocator()
+    assert int(title_numbers.reserve()) == title_numbers.FIRST_NUMBER + 10
+
+
+def test_bulk_reserve_spans_blocks(allocator_db):
+    numbers = title_numbers.reserve_many(25)
+    assert [int(number) for number in numbers] == list(range(title_numbers.FIRST_NUMBER, title_numbers.FIRST_NUMBER + 25))
+    assert int(title_numbers.reserve()) == title_numbers.FIRST_NUMBER + 25
+    assert len(set(title_numbers.reserve_many(3, strategy="uuid"))) == 3
+    with pytest.raises(ValueError):
+        title_numbers.reserve_many(2, strategy="external", seed="EXT-1")
+    with pytest.raises(ValueError):
+        title_numbers.reserve_many(title_numbers.MAX_RESERVE_COUNT + 1)
+
+
+def test_allocators_sharing_a_database_never_collide(allocator_db):
+    allocators = [title_numbers.TitleNumberAllocator(allocator_db, block_size=5) for _ in range(3)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        batches = list(pool.map(lambda index: [allocators[index % 3].reserve() for _ in range(40)], range(6)))
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    processes = [context.Process(target=_reserve_in_process, args=(allocator_db, 30, queue)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    batches.extend(queue.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=60)
+
+    numbers = [number for batch in batches for number in batch]
+    assert len(numbers) == 6 * 40 + 2 * 30
+    assert len(set(numbers)) == len(numbers)
@@ -0,0 +1,53 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from app.services import title_requests, xml_validator
+
+
+def _request(reference: str) -> dict:
+    return {
+        "reference_number": reference,
+        "buyer_name": "Andre Yves Lacroix",
+        "purchase_price": "650000.00",
+        "purchase_date": "2025-10-08",
+        "legal_description": "PLAN 0723943 BLOCK 86 LOT 31",
+        "municipality": "CITY OF EDMONTON",
+        "render_options": {"pdfa": False},
+    }
+
+
+def test_batch_zip_holds_pdfs_and_manifest_with_per_item_errors(monkeypatch):
+    monkeypatch.setattr(xml_validator, "validate", lambda _xml: (True, []))
+    lines = [json.dumps(_request("REQ-1")), "not json", json.dumps(_request("REQ-2")), json.dumps(dict(_request("REQ-3"), template_id="missing"))]
+    items = list(title_requests.iter_ndjson(line.encode() for line in lines))
+
+    summary = title_requests.TitleBatchSummary()
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(title_requests.stream_zip(title_requests.produce_batch(items, workers=0), summary))))
+    manifest = json.loads(archive.read(title_requests.MANIFEST_NAME))
+
+    assert summary.succeeded == 2 and summary.failed == 2
+    assert [entry["index"] for entry in manifest["items"]] == [0, 1, 2, 3]
+    ok = [entry for entry in manifest["items"] if entry["ok"]]
+    assert [entry["reference_number"] for entry in ok] == ["REQ-1", "REQ-2"]
+    for entry in ok:
+        assert entry["title_number"] and entry["registration_number"] and entry["linc_number"]
+        assert archive.read(entry["filename"]).startswith(b"%PDF")
+    assert manifest["items"][1]["error"].startswith("Invalid NDJSON line")
+    assert manifest["items"][3]["status_code"] == 404
+
+
+def test_produce_title_reports_validation_failures(monkeypatch):
+    monkeypatch.setattr(xml_validator, "validate", lambda _xml: (False, [{"message": "bad"}]))
+    with pytest.raises(title_requests.TitleRequestError) as excinfo:
+        title_requests.produce_title(_request("REQ-1"))
+    assert excinfo.value.status_code == 500
+    assert excinfo.value.detail["errors"] == [{"message": "bad"}]
+
+    with pytest.raises(title_requests.TitleRequestError) as excinfo:
+        title_requests.produce_title(dict(_request("REQ-1"), buyer_name=" "))
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("reportlab")
+httpx = pytest.importorskip("httpx")
+
+from app.main import app
+from app.services import renderer, warmup
+
+
+@pytest.fixture(autouse=True)
+def _fresh_warmup():
+    warmup.reset()
+    yield
+    warmup.reset()
+
+
+def _get(path):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(scenario())
+
+
+def test_readyz_waits_for_warm_up_and_healthz_does_not():
+    assert _get("/healthz").status_code == 200
+    assert _get("/readyz").status_code == 503
+
+    warmup.start().join(timeout=60)
+
+    response = _get("/readyz")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert [step["name"] for step in body["steps"]] == [name for name, _ in warmup.STEPS]
+    assert "app/assets/images/crest.png" in renderer._IMAGES
+
+
+def test_failed_step_keeps_worker_out_of_rotation(monkeypatch):
+    def broken():
+        raise RuntimeError("schema unavailable")
+
+    monkeypatch.setattr(warmup, "STEPS", (("schema", broken), ("qr", lambda: None)))
+    steps = warmup.run()
+
+    assert steps[0].error == "RuntimeError: schema unavailable" and steps[1].error is None
+    assert not warmup.is_ready()
+    assert _get("/readyz").json()["steps"][0]["error"] == "RuntimeError: schema unavailable"
@@ -85,3 +85,76 @@ def test_validate_failure_reports_xpath():
     assert errors
     assert any("TitleNumber" in err["message"] for err in errors)
     assert all("xpath" in err for err in errors)
+
+
+def test_validation_cache_ignores_formatting(monkeypatch, tmp_path):
+    xml_validator.reset_validation_cache()
+    calls = []
+    original = xml_validator._iter_issues
+
+    def counting_iter_issues(schema, document):
+        calls.append(document)
+        return original(schema, document)
+
+    monkeypatch.setattr(xml_validator, "_iter_issues", counting_iter_issues)
+    monkeypatch.setenv(xml_validator.CACHE_DIR_ENV_VARIABLE, str(tmp_path))
+
+    compact = "".join(line.strip() for line in VALID_XML.splitlines()[1:])
+    assert xml_validator.validate(VALID_XML) == (True, [])
+    assert xml_validator.validate(compact) == (True, [])
+    assert len(calls) == 1
+
+    # A fresh process only has the disk tier.
+    xml_validator.reset_validation_cache()
+    assert xml_validator.validate(VALID_XML) == (True, [])
+    assert len(calls) == 1
+
+    # Failures are only reused for byte-identical input.
+    assert xml_validator.validate(INVALID_XML)[0] is False
+    assert xml_validator.validate(INVALID_XML)[0] is False
+    assert len(calls) == 2
+    xml_validator.validate("\n".join(INVALID_XML.splitlines()[1:]))
+    assert len(calls) == 3
+
+
+def test_validate_stream_checks_each_title(tmp_path):
+    title = VALID_XML[VALID_XML.index("<Title>") : VALID_XML.index("</Title>") + len("</Title>")]
+    bad_title = title.replace("002345678901", "1234567890123")
+    document = VALID_XML.replace(title, "\n".join([title, title, bad_title]))
+    path = tmp_path / "bulk.xml"
+    path.write_text(document, encoding="utf-8")
+
+    ok, errors = xml_validator.validate_stream(str(path))
+    assert ok is False
+    assert len(errors) == 1
+    assert errors[0]["xpath"] == "/ProductTitleResult/TitleData[1]/Title[3]/TitleNumber"
+    bad_line = document[: document.index("1234567890123")].count("\n") + 1
+    assert errors[0]["line"] == bad_line
+
+    valid_path = tmp_path / "valid.xml"
+    valid_path.write_text(VALID_XML.replace(title, "\n".join([title, title])), encoding="utf-8")
+    assert xml_validator.validate_stream(str(valid_path)) == (True, [])
+
+
+def test_validate_subtree_checks_only_the_changed_element():
+    from lxml import etree
+
+    root = etree.fromstring(VALID_XML.encode("utf-8"))
+    title = root.find("TitleData/Title")
+    instruments = etree.SubElement(title, "Instruments")
+    instrument = etree.SubElement(instruments, "Instrument")
+    etree.SubElement(instrument, "RegistrationNumber").text = "1234567890123"
+
+    ok, errors = xml_validator.validate_subtree(instrument)
+    assert ok is False
+    assert errors[0]["xpath"].startswith("/ProductTitleResult/TitleData/Title/Instruments/Instrument")
+
+    ok, errors = xml_validator.validate_subtree(
+        "<DocumentType><Code>MTGE</Code><Name>MORTGAGE</Name></DocumentType>",
+        schema_path="ProductTitleResult/TitleData/Title/AffectingInstruments/Document/DocumentType",
+    )
+    assert (ok, errors) == (True, [])
+
+    ok, errors = xml_validator.validate_subtree(etree.SubElement(title, "Bogus"))
+    assert ok is False
+    assert "not allowed" in errors[0]["message"]